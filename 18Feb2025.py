@@ -1,5 +1,8 @@
 import pandas as pd
 
+from survey_report import open_report
+from survey_tally import tally_survey
+
 
 # Helper function: creates a DataFrame from a dictionary.
 def create_dataframe_from_dict(data_dict, key_col_name, value_col_name):
@@ -22,74 +25,61 @@ def create_dataframe_from_dict(data_dict, key_col_name, value_col_name):
 # Define Dictionaries for Each Question
 # ==========================
 
+# Counts are tallied from the raw responses in data.csv.
+tally = tally_survey("data.csv")
+report = open_report("18 Feb 2025 survey tables")
+
 # 1. Year of Study
 # Mapping: 1 = 1st year, 2 = 2nd year, etc.
-year_of_study = {1: 4, 2: 4, 3: 11, 4: 3}
+year_of_study = tally.as_dict("year")
 
 # 2. Preferred Way of Studying
 # Mapping: 1 = Lecture-based, 2 = Hands-on projects, 3 = Group discussions, 4 = Self-Study
-preferred_study = {1: 9, 2: 8, 3: 2, 4: 3}
+preferred_study = tally.as_dict("study_method")
 
 # 3. Overall Course Quality (ratings 1-5)
-overall_quality = {1: 1, 2: 2, 3: 7, 4: 4, 5: 8}
+overall_quality = tally.as_dict("overall_quality")
 
 # 4. Instructor Satisfaction
 # (Using "How satisfied are you with the lecture delivery by instructors?")
-instructor_satisfaction = {1: 4, 2: 2, 3: 4, 4: 4, 5: 8}
+instructor_satisfaction = tally.as_dict("instructor_satisfaction")
 
 # 5. Engaging Assignments/Projects
-assignments_projects = {1: 1, 2: 1, 3: 4, 4: 9, 5: 7}
+assignments_projects = tally.as_dict("assignments_projects")
 
 # 6. Course Materials Effectiveness
-course_materials = {1: 5, 2: 2, 3: 2, 4: 5, 5: 8}
+course_materials = tally.as_dict("course_materials")
 
 # 7. Instructor Explains Concepts Clearly
-instructor_explains = {1: 1, 2: 3, 3: 4, 4: 9, 5: 5}
+instructor_explains = tally.as_dict("instructor_explains")
 
 # 8. Student Participation Encouraged by Instructor
-student_participation = {1: 2, 2: 2, 3: 5, 4: 5, 5: 8}
+student_participation = tally.as_dict("student_participation")
 
 # 9. Instructor is Approachable for Doubts
-approachable_for_doubts = {1: 1, 2: 2, 3: 4, 4: 9, 5: 6}
+approachable_for_doubts = tally.as_dict("approachable_for_doubts")
 
 # 10. Well-Equipped Classroom (projectors, seating, board visibility)
-well_equipped_classroom = {1: 4, 2: 1, 3: 2, 4: 7, 5: 8}
+well_equipped_classroom = tally.as_dict("well_equipped_classroom")
 
 # 11. Effective Lab Sessions
-effective_lab_sessions = {1: 2, 2: 1, 3: 2, 4: 7, 5: 10}
+effective_lab_sessions = tally.as_dict("effective_lab_sessions")
 
 # 12. University Resources (library, online databases, study areas)
-university_resources = {1: 5, 2: 1, 3: 2, 4: 9, 5: 5}
+university_resources = tally.as_dict("university_resources")
 
 # 13. Hours per Week Spent Studying Outside Class
-# (Some keys are non-numeric and will be filtered out.)
-study_hours = {
-    "0": 3,
-    "2": 1,
-    "3": 1,
-    "4": 2,
-    "5": 2,
-    "6": 1,
-    "7": 1,
-    "8": 1,
-    "10": 1,
-    "12": 2,
-    "14": 1,
-    "20": 2,
-    "24": 1,
-    "26": 1,
-    "12 hours": 1,  # Non-numeric, will be filtered out
-    "4-5 hrs": 1,  # Non-numeric, will be filtered out
-}
+# (Free-text answers are parsed, see survey_hours.py.)
+study_hours = tally.as_dict("study_hours")
 
 # 14. How Often Do You Attend Lectures?
 # Mapping: 1 = Always, 2 = Frequently, 3 = Occasionally, 4 = Rarely
-attend_lectures = {1: 11, 2: 5, 3: 4, 4: 2}
+attend_lectures = tally.as_dict("attend_lectures")
 
 # 15. Biggest Challenges Affecting Learning
 # Mapping: 1 = Difficult course material, 2 = Ineffective teaching methods,
 # 3 = Lack of study resources, 4 = Time management, 5 = Personal motivation
-biggest_challenges = {1: 10, 2: 11, 3: 12, 4: 8, 5: 6}
+biggest_challenges = tally.as_dict("biggest_challenges")
 
 # ==========================
 # Create DataFrames for Each Question
@@ -127,18 +117,11 @@ df_university_resources = create_dataframe_from_dict(
 )
 
 
-# For study hours, filter non-numeric keys.
-def is_numeric(value):
-    try:
-        float(value)
-        return True
-    except ValueError:
-        return False
-
-
-numeric_study_hours = {k: v for k, v in study_hours.items() if is_numeric(k)}
-# Convert keys to numeric (float or int)
-numeric_study_hours = {float(k): v for k, v in numeric_study_hours.items()}
+# Study hours were typed as free text. Answers such as "12 hours" or
+# "4-5 hrs" are parsed to whole hours (ranges count at their midpoint, rounded
+# half up) instead of being dropped; only answers without a usable number are
+# left out.
+numeric_study_hours = {float(k): v for k, v in study_hours.items()}
 df_study_hours = create_dataframe_from_dict(numeric_study_hours, "Hours", "Count")
 
 df_attend_lectures = create_dataframe_from_dict(attend_lectures, "Attendance", "Count")
@@ -147,52 +130,67 @@ df_biggest_challenges = create_dataframe_from_dict(
 )
 
 # ==========================
-# Print Individual DataFrames
+# Report Individual DataFrames
 # ==========================
-print("Year of Study Data:")
-print(df_year_of_study)
+# Each table is streamed to the report (see survey_report.py); the console
+# only shows a preview. Set SURVEY_OUTPUT_DIR to also write JSON Lines,
+# CSV and HTML files.
+report.section("study_hours_parsing", tally.hours_report(), "Study hours parsing")
+report.section("year_of_study", df_year_of_study, "Year of Study Data")
 
-print("\nPreferred Study Method Data:")
-print(df_preferred_study)
+report.section("preferred_study", df_preferred_study, "Preferred Study Method Data")
 
-print("\nOverall Course Quality Data:")
-print(df_overall_quality)
+report.section("overall_quality", df_overall_quality, "Overall Course Quality Data")
 
-print("\nInstructor Satisfaction Data:")
-print(df_instructor_satisfaction)
+report.section(
+    "instructor_satisfaction",
+    df_instructor_satisfaction,
+    "Instructor Satisfaction Data",
+)
 
-print("\nEngaging Assignments/Projects Data:")
-print(df_assignments_projects)
+report.section(
+    "assignments_projects",
+    df_assignments_projects,
+    "Engaging Assignments/Projects Data",
+)
 
-print("\nCourse Materials Data:")
-print(df_course_materials)
+report.section("course_materials", df_course_materials, "Course Materials Data")
 
-print("\nInstructor Explains Concepts Clearly Data:")
-print(df_instructor_explains)
+report.section(
+    "instructor_explains",
+    df_instructor_explains,
+    "Instructor Explains Concepts Clearly Data",
+)
 
-print("\nStudent Participation Data:")
-print(df_student_participation)
+report.section(
+    "student_participation", df_student_participation, "Student Participation Data"
+)
 
-print("\nInstructor Approachable for Doubts Data:")
-print(df_approachable_for_doubts)
+report.section(
+    "approachable_for_doubts",
+    df_approachable_for_doubts,
+    "Instructor Approachable for Doubts Data",
+)
 
-print("\nWell-Equipped Classroom Data:")
-print(df_well_equipped_classroom)
+report.section(
+    "well_equipped_classroom",
+    df_well_equipped_classroom,
+    "Well-Equipped Classroom Data",
+)
 
-print("\nEffective Lab Sessions Data:")
-print(df_effective_lab_sessions)
+report.section(
+    "effective_lab_sessions", df_effective_lab_sessions, "Effective Lab Sessions Data"
+)
 
-print("\nUniversity Resources Data:")
-print(df_university_resources)
+report.section(
+    "university_resources", df_university_resources, "University Resources Data"
+)
 
-print("\nStudy Hours per Week Data:")
-print(df_study_hours)
+report.section("study_hours", df_study_hours, "Study Hours per Week Data")
 
-print("\nLecture Attendance Data:")
-print(df_attend_lectures)
+report.section("attend_lectures", df_attend_lectures, "Lecture Attendance Data")
 
-print("\nBiggest Challenges Data:")
-print(df_biggest_challenges)
+report.section("biggest_challenges", df_biggest_challenges, "Biggest Challenges Data")
 
 # ==========================
 # Optional: Combine Multiple Questions into One DataFrame
@@ -227,5 +225,5 @@ append_data("Biggest Challenges", biggest_challenges, "Challenge")
 
 df_combined = pd.DataFrame(combined_data)
 
-print("\nCombined DataFrame:")
-print(df_combined)
+report.section("combined", df_combined, "Combined DataFrame")
+report.close()
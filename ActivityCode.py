@@ -1,22 +1,29 @@
 import numpy as np
-import pandas as pd
 
-# Read the CSV file into a pandas DataFrame.
-df = pd.read_csv("data.csv")
+from survey_loader import LIKERT_COLUMNS, load_survey
+from survey_report import open_report
 
-print("Collected Data as a DataFrame:\n")
-print(df)
+# Read the CSV file into a typed pandas DataFrame (see survey_loader.SCHEMA).
+df = load_survey("data.csv")
 
-data_array = df.to_numpy()  # or use df.values
-print("\nNumPy Array:")
-print(data_array)
+# Results go to the report (see survey_report.py): the console shows a
+# preview, and with SURVEY_OUTPUT_DIR set the full tables are written as
+# JSON Lines, CSV and HTML.
+report = open_report("Collected survey data")
+report.section("responses", df, "Collected Data as a DataFrame")
 
-year_counts = df["What is your year of study?"].value_counts()
-print("\nStudent counts by Year:")
-print(year_counts)
+# Only the Likert answers are numeric; convert them to a compact int8 array
+# (missing answers become 0) instead of an object array of the whole frame.
+data_array = df[LIKERT_COLUMNS].to_numpy(dtype=np.int8, na_value=0)
+report.section("likert_array", data_array, "NumPy Array")
 
-extremely_dissatisfied_count = df[
-    df["How would you rate the overall quality of your current courses?  "] == 1
-].shape[0]
-print("\nNumber of extremely dissatisfied responses for Q1:")
-print(extremely_dissatisfied_count)
+year_counts = df["year"].value_counts()
+report.section("year_counts", year_counts, "Student counts by Year")
+
+extremely_dissatisfied_count = df[df["overall_quality"] == 1].shape[0]
+report.section(
+    "extremely_dissatisfied_q1",
+    extremely_dissatisfied_count,
+    "Number of extremely dissatisfied responses for Q1",
+)
+report.close()
@@ -1,46 +1,36 @@
 import numpy as np
-import pandas as pd
+
+from survey_bootstrap import bootstrap_tensor
+from survey_moments import moments_survey
+from survey_stats import question_stats
+from survey_tally import tally_survey
+from survey_tensor import CountTensor
 
 # ============================================================
-# Step 1: Define the Survey Data (using our real counts)
+# Step 1: Tally the Survey Data from the raw responses
 # ============================================================
 
 # Each dictionary maps a numeric response (or key) to the count.
-year_of_study = {1: 4, 2: 4, 3: 11, 4: 3}
-preferred_study = {1: 9, 2: 8, 3: 2, 4: 3}
-overall_quality = {1: 1, 2: 2, 3: 7, 4: 4, 5: 8}
-instructor_satisfaction = {1: 4, 2: 2, 3: 4, 4: 4, 5: 8}
-assignments_projects = {1: 1, 2: 1, 3: 4, 4: 9, 5: 7}
-course_materials = {1: 5, 2: 2, 3: 2, 4: 5, 5: 8}
-instructor_explains = {1: 1, 2: 3, 3: 4, 4: 9, 5: 5}
-student_participation = {1: 2, 2: 2, 3: 5, 4: 5, 5: 8}
-approachable_for_doubts = {1: 1, 2: 2, 3: 4, 4: 9, 5: 6}
-well_equipped_classroom = {1: 4, 2: 1, 3: 2, 4: 7, 5: 8}
-effective_lab_sessions = {1: 2, 2: 1, 3: 2, 4: 7, 5: 10}
-university_resources = {1: 5, 2: 1, 3: 2, 4: 9, 5: 5}
-
-# For study hours, some keys are non-numeric (they will be filtered out)
-study_hours = {
-    "0": 3,
-    "2": 1,
-    "3": 1,
-    "4": 2,
-    "5": 2,
-    "6": 1,
-    "7": 1,
-    "8": 1,
-    "10": 1,
-    "12": 2,
-    "14": 1,
-    "20": 2,
-    "24": 1,
-    "26": 1,
-    "12 hours": 1,  # non-numeric key
-    "4-5 hrs": 1,  # non-numeric key
-}
-
-attend_lectures = {1: 11, 2: 5, 3: 4, 4: 2}
-biggest_challenges = {1: 10, 2: 11, 3: 12, 4: 8, 5: 6}
+tally = tally_survey("data.csv")
+
+year_of_study = tally.as_dict("year")
+preferred_study = tally.as_dict("study_method")
+overall_quality = tally.as_dict("overall_quality")
+instructor_satisfaction = tally.as_dict("instructor_satisfaction")
+assignments_projects = tally.as_dict("assignments_projects")
+course_materials = tally.as_dict("course_materials")
+instructor_explains = tally.as_dict("instructor_explains")
+student_participation = tally.as_dict("student_participation")
+approachable_for_doubts = tally.as_dict("approachable_for_doubts")
+well_equipped_classroom = tally.as_dict("well_equipped_classroom")
+effective_lab_sessions = tally.as_dict("effective_lab_sessions")
+university_resources = tally.as_dict("university_resources")
+
+# Study hours are parsed from free text ("4-5 hrs" counts as 5 hours).
+study_hours = tally.as_dict("study_hours")
+
+attend_lectures = tally.as_dict("attend_lectures")
+biggest_challenges = tally.as_dict("biggest_challenges")
 
 # ============================================================
 # Step 2: Combine All the Numerical Data into One List
@@ -52,14 +42,9 @@ combined_list = []
 def append_to_combined(data_dict):
     """
     Append the key-value pairs from data_dict into combined_list.
-    Keys that cannot be converted to a float are skipped.
     """
     for key, count in data_dict.items():
-        try:
-            numeric_key = float(key)
-        except ValueError:
-            continue  # skip non-numeric keys
-        combined_list.append([numeric_key, count])
+        combined_list.append([float(key), count])
 
 
 # Append each question's data
@@ -75,7 +60,7 @@ append_to_combined(approachable_for_doubts)
 append_to_combined(well_equipped_classroom)
 append_to_combined(effective_lab_sessions)
 append_to_combined(university_resources)
-append_to_combined(study_hours)  # only numeric keys will be kept
+append_to_combined(study_hours)
 append_to_combined(attend_lectures)
 append_to_combined(biggest_challenges)
 
@@ -93,14 +78,21 @@ print("\nShape of the array:", data_array.shape)
 print("Size (total number of elements):", data_array.size)
 
 # ============================================================
-# Step 4: Reshape the Array
+# Step 4: Reshape the Data into a Question x Level Matrix
 # ============================================================
-# Our data_array has shape (81, 2) = 162 elements.
-# We choose a shape that multiplies to 162. For example, (9, 18) works because 9*18 = 162.
-reshaped_array = data_array.reshape(9, 18)
-print("\nReshaped Array (9 rows, 18 columns):")
+# combined_list mixes every question into one ragged list, so instead of
+# reshaping data_array we build a dense (questions x levels) count matrix
+# in which row q holds the counts of question q (see survey_tensor.py).
+count_tensor = CountTensor.from_tally(tally)
+reshaped_array = count_tensor.counts
+print("\nQuestion x Level Count Matrix %s:" % (reshaped_array.shape,))
 print(reshaped_array)
 
+# Per-question shares and means are now single broadcasted operations.
+print("\nShare of each level per question:")
+print(np.round(count_tensor.shares(), 3))
+print("\nMean level per question:", np.round(count_tensor.mean(), 3))
+
 # ============================================================
 # Step 5: Extract Rows/Columns Satisfying a Condition
 # ============================================================
@@ -112,16 +104,29 @@ print(condition_filtered)
 # ============================================================
 # Step 6: Statistical Operations
 # ============================================================
-# Compute statistics column-wise.
-mean_vals = np.mean(data_array, axis=0)
-median_vals = np.median(data_array, axis=0)
-std_vals = np.std(data_array, axis=0)
-variance_vals = np.var(data_array, axis=0)
-
-print("\nMean (per column):", mean_vals)
-print("Median (per column):", median_vals)
-print("Standard Deviation (per column):", std_vals)
-print("Variance (per column):", variance_vals)
+# Compute statistics of the real response distribution of each question.
+# data_array only holds [value, count] pairs, so np.mean etc. over its
+# columns would treat the counts as samples; instead every question's
+# statistics are weighted by its counts (see survey_stats.py).
+question_summary = question_stats(tally)
+print("\nWeighted statistics per question:")
+print(question_summary[["n", "mean", "median", "std", "variance", "mode"]])
+
+# Per-year means rest on very few respondents (only a handful in 4th year),
+# so show 95% bootstrap intervals next to them (see survey_bootstrap.py).
+year_tensor = CountTensor.from_survey("data.csv", segment="year")
+year_intervals = bootstrap_tensor(year_tensor, n_boot=2000, workers=1).summary()
+print("\nMean per question and year with 95% bootstrap intervals:")
+print(year_intervals[["mean", "mean_low", "mean_high"]].round(2))
+
+# One streaming pass keeps mergeable count/min/max/mean/variance and a
+# quantile sketch per question and year, so normalized and z-scored
+# composite indices need no second pass (see survey_moments.py).
+moments = moments_survey("data.csv", segment="year", workers=1)
+print("\nOne-pass moments per question:")
+print(moments.overall.summary()[["n", "min", "max", "mean", "std", "median"]].round(3))
+print("\nComposite indices per year (z-scored against all respondents):")
+print(moments.composite()[["n", "composite_normalized", "composite_z"]].round(3))
 
 # Find the minimum and maximum values in the entire array and their indices.
 min_val = np.min(data_array)
@@ -164,11 +169,10 @@ print(subtraction_result)
 print("\nElement-wise Multiplication (data_array * ones_array):")
 print(multiplication_result)
 
-# Normalize the data_array so its values range between 0 and 1.
-normalized_array = (data_array - np.min(data_array)) / (
-    np.max(data_array) - np.min(data_array)
-)
-print("\nNormalized Array (values between 0 and 1):")
+# Normalize each column of data_array to range between 0 and 1. A global
+# min/max would scale the values by the counts' range (and vice versa).
+normalized_array = (data_array - data_array.min(axis=0)) / np.ptp(data_array, axis=0)
+print("\nNormalized Array (each column between 0 and 1):")
 print(normalized_array)
 
 # ============================================================
@@ -1,193 +1,208 @@
+import os
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from survey_dedup import Deduplicator
+from survey_majors import DEFAULT_CACHE_PATH, MajorCanonicalizer
+from survey_render import overview_specs, render_report
+from survey_report import open_report
+from survey_segments import SegmentIndex, where
+from survey_summary import grouped_summary
+from survey_tally import SurveyTally
+from survey_trace import stage
+
 # -------------------------------
 # Step 1: Create the DataFrame
 # -------------------------------
-# (This DataFrame is built from our combined survey data.
+# (This DataFrame is tallied from the raw survey responses in data.csv.
 #  Each row represents the aggregated count for a given response in a given question.)
-combined_data = [
-    {"Question": "Year of Study", "Response": 1, "Count": 4},
-    {"Question": "Year of Study", "Response": 2, "Count": 4},
-    {"Question": "Year of Study", "Response": 3, "Count": 11},
-    {"Question": "Year of Study", "Response": 4, "Count": 3},
-    {"Question": "Preferred Study Method", "Response": 1, "Count": 9},
-    {"Question": "Preferred Study Method", "Response": 2, "Count": 8},
-    {"Question": "Preferred Study Method", "Response": 3, "Count": 2},
-    {"Question": "Preferred Study Method", "Response": 4, "Count": 3},
-    {"Question": "Overall Course Quality", "Response": 1, "Count": 1},
-    {"Question": "Overall Course Quality", "Response": 2, "Count": 2},
-    {"Question": "Overall Course Quality", "Response": 3, "Count": 7},
-    {"Question": "Overall Course Quality", "Response": 4, "Count": 4},
-    {"Question": "Overall Course Quality", "Response": 5, "Count": 8},
-    {"Question": "Instructor Satisfaction", "Response": 1, "Count": 4},
-    {"Question": "Instructor Satisfaction", "Response": 2, "Count": 2},
-    {"Question": "Instructor Satisfaction", "Response": 3, "Count": 4},
-    {"Question": "Instructor Satisfaction", "Response": 4, "Count": 4},
-    {"Question": "Instructor Satisfaction", "Response": 5, "Count": 8},
-    {"Question": "Engaging Assignments/Projects", "Response": 1, "Count": 1},
-    {"Question": "Engaging Assignments/Projects", "Response": 2, "Count": 1},
-    {"Question": "Engaging Assignments/Projects", "Response": 3, "Count": 4},
-    {"Question": "Engaging Assignments/Projects", "Response": 4, "Count": 9},
-    {"Question": "Engaging Assignments/Projects", "Response": 5, "Count": 7},
-    {"Question": "Course Materials", "Response": 1, "Count": 5},
-    {"Question": "Course Materials", "Response": 2, "Count": 2},
-    {"Question": "Course Materials", "Response": 3, "Count": 2},
-    {"Question": "Course Materials", "Response": 4, "Count": 5},
-    {"Question": "Course Materials", "Response": 5, "Count": 8},
-    {"Question": "Instructor Explains", "Response": 1, "Count": 1},
-    {"Question": "Instructor Explains", "Response": 2, "Count": 3},
-    {"Question": "Instructor Explains", "Response": 3, "Count": 4},
-    {"Question": "Instructor Explains", "Response": 4, "Count": 9},
-    {"Question": "Instructor Explains", "Response": 5, "Count": 5},
-    {"Question": "Student Participation", "Response": 1, "Count": 2},
-    {"Question": "Student Participation", "Response": 2, "Count": 2},
-    {"Question": "Student Participation", "Response": 3, "Count": 5},
-    {"Question": "Student Participation", "Response": 4, "Count": 5},
-    {"Question": "Student Participation", "Response": 5, "Count": 8},
-    {"Question": "Instructor Approachable", "Response": 1, "Count": 1},
-    {"Question": "Instructor Approachable", "Response": 2, "Count": 2},
-    {"Question": "Instructor Approachable", "Response": 3, "Count": 4},
-    {"Question": "Instructor Approachable", "Response": 4, "Count": 9},
-    {"Question": "Instructor Approachable", "Response": 5, "Count": 6},
-    {"Question": "Well-Equipped Classroom", "Response": 1, "Count": 4},
-    {"Question": "Well-Equipped Classroom", "Response": 2, "Count": 1},
-    {"Question": "Well-Equipped Classroom", "Response": 3, "Count": 2},
-    {"Question": "Well-Equipped Classroom", "Response": 4, "Count": 7},
-    {"Question": "Well-Equipped Classroom", "Response": 5, "Count": 8},
-    {"Question": "Effective Lab Sessions", "Response": 1, "Count": 2},
-    {"Question": "Effective Lab Sessions", "Response": 2, "Count": 1},
-    {"Question": "Effective Lab Sessions", "Response": 3, "Count": 2},
-    {"Question": "Effective Lab Sessions", "Response": 4, "Count": 7},
-    {"Question": "Effective Lab Sessions", "Response": 5, "Count": 10},
-    {"Question": "University Resources", "Response": 1, "Count": 5},
-    {"Question": "University Resources", "Response": 2, "Count": 1},
-    {"Question": "University Resources", "Response": 3, "Count": 2},
-    {"Question": "University Resources", "Response": 4, "Count": 9},
-    {"Question": "University Resources", "Response": 5, "Count": 5},
-    {"Question": "Study Hours", "Response": 0, "Count": 3},
-    {"Question": "Study Hours", "Response": 2, "Count": 1},
-    {"Question": "Study Hours", "Response": 3, "Count": 1},
-    {"Question": "Study Hours", "Response": 4, "Count": 2},
-    {"Question": "Study Hours", "Response": 5, "Count": 2},
-    {"Question": "Study Hours", "Response": 6, "Count": 1},
-    {"Question": "Study Hours", "Response": 7, "Count": 1},
-    {"Question": "Study Hours", "Response": 8, "Count": 1},
-    {"Question": "Study Hours", "Response": 10, "Count": 1},
-    {"Question": "Study Hours", "Response": 12, "Count": 2},
-    {"Question": "Study Hours", "Response": 14, "Count": 1},
-    {"Question": "Study Hours", "Response": 20, "Count": 2},
-    {"Question": "Study Hours", "Response": 24, "Count": 1},
-    {"Question": "Study Hours", "Response": 26, "Count": 1},
-    {"Question": "Lecture Attendance", "Response": 1, "Count": 11},
-    {"Question": "Lecture Attendance", "Response": 2, "Count": 5},
-    {"Question": "Lecture Attendance", "Response": 3, "Count": 4},
-    {"Question": "Lecture Attendance", "Response": 4, "Count": 2},
-    {"Question": "Biggest Challenges", "Response": 1, "Count": 10},
-    {"Question": "Biggest Challenges", "Response": 2, "Count": 11},
-    {"Question": "Biggest Challenges", "Response": 3, "Count": 12},
-    {"Question": "Biggest Challenges", "Response": 4, "Count": 8},
-    {"Question": "Biggest Challenges", "Response": 5, "Count": 6},
-]
-
-df = pd.DataFrame(combined_data)
+# Duplicate submissions are removed from the raw rows as they are read:
+# exact repeats are dropped and near duplicates flagged (see survey_dedup.py).
+# Free-text majors ("CSE", "Cse", "Computer science ") are mapped to
+# canonical program names, each distinct spelling once, with the results
+# kept in a cache file across runs (see survey_majors.py).
+# Each stage below is timed when SURVEY_TRACE is set; see survey_trace.py.
+with stage("load") as st:
+    dedup = Deduplicator()
+    tally = SurveyTally()
+    segments = SegmentIndex()
+    majors = MajorCanonicalizer(DEFAULT_CACHE_PATH)
+    major_parts = []
+    for chunk in dedup.iter_unique("data.csv"):
+        tally.update(chunk)
+        segments.update(chunk)
+        major = majors.canonicalize(chunk["major"])
+        quality = chunk["overall_quality"].astype(float)
+        major_parts.append(
+            quality.groupby(major, observed=False).agg(["size", "count", "sum"])
+        )
+    majors.save()
+    df = tally.to_frame()
+    st.rows_out = len(df)
 
 # ------------------------------------------------
 # Data Inspection
 # ------------------------------------------------
-print("First 5 rows of the DataFrame:")
-print(df.head())
+# Tables go to the report (see survey_report.py): the console shows a
+# preview of each, and with SURVEY_OUTPUT_DIR set the full tables are
+# written as JSON Lines, CSV and HTML.
+report = open_report("Survey response counts")
+report.section("head", df.head(), "First 5 rows of the DataFrame")
 
-print("\nLast 5 rows of the DataFrame:")
-print(df.tail())
+report.section("tail", df.tail(), "Last 5 rows of the DataFrame")
 
-print("\nDataFrame Info:")
-df.info()
+if report.console:
+    print("\nDataFrame Info:")
+    df.info()
 
-print("\nDataFrame Summary Statistics:")
-print(df.describe())
+report.section("describe", df.describe(), "DataFrame Summary Statistics")
 
 # ------------------------------------------------
 # Data Cleaning
 # ------------------------------------------------
 # Check for missing values
-print("\nMissing values in each column:")
-print(df.isnull().sum())
+report.section("missing_values", df.isnull().sum(), "Missing values in each column")
 
 # (Assuming no missing values in our aggregated data;
 #  if any are found, you can choose to drop or fill them.)
-df_cleaned = df.dropna()
-
-# Remove duplicate rows if any
-df_cleaned = df_cleaned.drop_duplicates()
-print("\nDataFrame after cleaning (dropping missing and duplicate rows):")
-print(df_cleaned)
+with stage("clean", rows_in=len(df)) as st:
+    df_cleaned = df.dropna()
+    st.rows_out = len(df_cleaned)
+report.section(
+    "cleaned", df_cleaned, "DataFrame after cleaning (dropping missing rows)"
+)
+
+# Duplicate submissions were already removed from the raw responses above
+# (deduplicating the aggregated table itself would not remove anything).
+report.section("deduplication", dedup.summary(), "Duplicate submissions")
+report.section("duplicate_clusters", dedup.clusters(), "Duplicate clusters")
 
 # ------------------------------------------------
 # Filtering and Querying
 # ------------------------------------------------
 # Filter rows where 'Count' exceeds 5
-filtered_df = df_cleaned[df_cleaned["Count"] > 5]
-print("\nRows where Count > 5:")
-print(filtered_df)
-
-# Use .query() to extract data where Response is greater than 3
-query_df = df_cleaned.query("Response > 3")
-print("\nRows where Response > 3 using .query():")
-print(query_df)
+with stage("filter", rows_in=len(df_cleaned)) as st:
+    filtered_df = df_cleaned[df_cleaned["Count"] > 5]
+    st.rows_out = len(filtered_df)
+report.section("count_over_5", filtered_df, "Rows where Count > 5")
+
+# Extract data where Response is greater than 3 (a boolean mask, like the
+# filter above, instead of parsing a .query() expression string)
+with stage("query", rows_in=len(df_cleaned)) as st:
+    query_df = df_cleaned[df_cleaned["Response"] > 3]
+    st.rows_out = len(query_df)
+report.section("response_over_3", query_df, "Rows where Response > 3")
+
+# Respondent segments are counted from the bitmap index built while loading
+# (see survey_segments.py): each filter is a few bitwise ANDs/ORs and a
+# popcount, and repeated filters come from its cache.
+with stage("segments", rows_in=segments.n_rows) as st:
+    segment_filters = {
+        "3rd year": where(year="3rd year"),
+        "3rd year, attends always": where(year="3rd year", attend_lectures="Always"),
+        "3rd year, attends always, quality >= 4": where(
+            year="3rd year", attend_lectures="Always", overall_quality=">=4"
+        ),
+        "Quality <= 2 or workload too much": where(overall_quality="<=2")
+        | where(workload="No, it's too much"),
+    }
+    segment_counts = pd.DataFrame(
+        {
+            "Segment": list(segment_filters),
+            "Respondents": [segments.count(f) for f in segment_filters.values()],
+        }
+    )
+    st.rows_out = len(segment_counts)
+report.section("segments", segment_counts, "Respondents per segment")
+
+# Respondents and mean course quality per canonical major.
+major_totals = sum(major_parts)
+by_major = pd.DataFrame(
+    {
+        "Respondents": major_totals["size"],
+        "Mean Quality": major_totals["sum"] / major_totals["count"],
+    }
+)
+by_major = by_major[by_major["Respondents"] > 0].sort_values(
+    "Respondents", ascending=False
+)
+report.section("majors", by_major, "Respondents and course quality per major")
 
 # ------------------------------------------------
 # Grouping and Aggregation
 # ------------------------------------------------
-# Group the data by 'Question' and calculate aggregate statistics for 'Count'
-grouped = df_cleaned.groupby("Question")["Count"].agg(["sum", "mean", "count"])
-print("\nGrouped Data (aggregated 'Count') by Question:")
-print(grouped)
+# Group the data by 'Question' and calculate aggregate statistics for 'Count'.
+# grouped_summary computes the aggregates, each response's share of its
+# question and its rank within the question in one pass (see
+# survey_summary.py).
+with stage("group", rows_in=len(df_cleaned)) as st:
+    summary = grouped_summary(df_cleaned)
+    grouped = summary.groups
+    st.rows_out = len(grouped)
+report.section("grouped", grouped, "Grouped Data (aggregated 'Count') by Question")
 
 # ------------------------------------------------
 # Sorting and Ranking
 # ------------------------------------------------
-# Sort the DataFrame by 'Count' in descending order
-sorted_df = df_cleaned.sort_values(by="Count", ascending=False)
-print("\nDataFrame sorted by Count (descending):")
-print(sorted_df)
-
-# Rank the values in the 'Count' column and add as a new column
-df_cleaned["Rank"] = df_cleaned["Count"].rank(ascending=False)
-print("\nDataFrame with Rank based on Count:")
-print(df_cleaned)
+# Show the most frequent responses of each question. Counts of different
+# questions are not comparable, so responses are ranked within their
+# question instead of across the whole table.
+with stage("rank", rows_in=len(df_cleaned)) as st:
+    top_responses = summary.top_k(3)
+    st.rows_out = len(top_responses)
+report.section(
+    "top_responses", top_responses, "Top 3 responses of each question by Count"
+)
+
+# Rank the values in the 'Count' column within each question and add as a
+# new column
+df_cleaned["Rank"] = summary.rows["Rank"]
+report.section("ranked", df_cleaned, "DataFrame with Rank based on Count")
 
 # ------------------------------------------------
 # Visualization
 # ------------------------------------------------
-# Plot a histogram of the 'Count' column
-plt.figure(figsize=(10, 6))
-plt.hist(df_cleaned["Count"], bins=10, color="skyblue", edgecolor="black")
-plt.title("Histogram of 'Count'")
-plt.xlabel("Count")
-plt.ylabel("Frequency")
-plt.show()
-
-# Plot a boxplot of 'Response'
-plt.figure(figsize=(8, 6))
-sns.boxplot(x=df_cleaned["Response"])
-plt.title("Boxplot of 'Response'")
-plt.show()
-
-# Scatterplot between 'Response' and 'Count'
-plt.figure(figsize=(10, 6))
-sns.scatterplot(data=df_cleaned, x="Response", y="Count", hue="Question")
-plt.title("Scatterplot of Response vs Count")
-plt.show()
-
-# Plot the correlation matrix of numerical columns ('Response' and 'Count')
-corr = df_cleaned[["Response", "Count"]].corr()
-plt.figure(figsize=(6, 4))
-sns.heatmap(corr, annot=True, cmap="coolwarm")
-plt.title("Correlation Matrix")
-plt.show()
+# Set SURVEY_REPORT_DIR to write the figures there as PNG files instead of
+# showing them (for batch jobs on headless servers). Unchanged figures are
+# not re-rendered; see survey_render.py.
+with stage("plot", rows_in=len(df_cleaned)):
+    report_dir = os.environ.get("SURVEY_REPORT_DIR")
+    if report_dir:
+        result = render_report(overview_specs(df_cleaned), out_dir=report_dir)
+        print(
+            "\nFigures written to %s (%d rendered, %d unchanged)"
+            % (report_dir, len(result["rendered"]), len(result["skipped"]))
+        )
+    else:
+        # Plot a histogram of the 'Count' column
+        plt.figure(figsize=(10, 6))
+        plt.hist(df_cleaned["Count"], bins=10, color="skyblue", edgecolor="black")
+        plt.title("Histogram of 'Count'")
+        plt.xlabel("Count")
+        plt.ylabel("Frequency")
+        plt.show()
+
+        # Plot a boxplot of 'Response'
+        plt.figure(figsize=(8, 6))
+        sns.boxplot(x=df_cleaned["Response"])
+        plt.title("Boxplot of 'Response'")
+        plt.show()
+
+        # Scatterplot between 'Response' and 'Count'
+        plt.figure(figsize=(10, 6))
+        sns.scatterplot(data=df_cleaned, x="Response", y="Count", hue="Question")
+        plt.title("Scatterplot of Response vs Count")
+        plt.show()
+
+        # Plot the correlation matrix of numerical columns ('Response' and 'Count')
+        corr = df_cleaned[["Response", "Count"]].corr()
+        plt.figure(figsize=(6, 4))
+        sns.heatmap(corr, annot=True, cmap="coolwarm")
+        plt.title("Correlation Matrix")
+        plt.show()
 
 # ------------------------------------------------
 # Column Operations
@@ -195,11 +210,10 @@ plt.show()
 # Create a new column that is a transformation of existing columns.
 # For example, create a 'Score' column as Response multiplied by Count.
 df_cleaned["Score"] = df_cleaned["Response"] * df_cleaned["Count"]
-print("\nDataFrame with new 'Score' column:")
-print(df_cleaned)
+report.section("scored", df_cleaned, "DataFrame with new 'Score' column")
 
 # Drop a column that you find irrelevant.
 # For example, if we decide the 'Rank' column is not needed, we can drop it.
 df_cleaned = df_cleaned.drop(columns=["Rank"])
-print("\nDataFrame after dropping the 'Rank' column:")
-print(df_cleaned)
+report.section("final", df_cleaned, "DataFrame after dropping the 'Rank' column")
+report.close()
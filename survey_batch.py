@@ -0,0 +1,181 @@
+import glob
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from survey_challenges import encode_challenges
+from survey_crosstab import PairwiseCounts
+from survey_loader import iter_survey
+from survey_tally import CODED_COLUMNS, SurveyTally, encode_chunk, parse_study_hours
+
+# ============================================================
+# Map-Reduce over Many Survey Wave Files
+# ============================================================
+# Production data arrives as one CSV per collection wave per campus. Each
+# file is tallied in a worker process that returns only compact partial
+# aggregates (counts, pairwise crosstabs and moments); the parent
+# merges them as they complete, so memory does not grow with the number
+# of files and throughput scales with the number of cores.
+_BATCH_COLUMNS = CODED_COLUMNS + ["study_hours", "biggest_challenges"]
+
+
+def combine_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    Chan et al.'s pairwise update of (count, mean, M2) summaries, where M2
+    is the sum of squared deviations from the mean; scalars or arrays.
+
+    Returns:
+      tuple: (count, mean, m2) of the union of both samples.
+    """
+    count = count_a + count_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = mean_b - mean_a
+        weight = np.where(count > 0, count_b / count, 0.0)
+        mean = mean_a + delta * weight
+        m2 = m2_a + m2_b + delta**2 * count_a * weight
+    return count, mean, m2
+
+
+class BatchAggregate:
+    """
+    Mergeable aggregates of one or more survey files.
+
+    Attributes:
+      tally (SurveyTally): Per-question counts.
+      pairs (PairwiseCounts): Joint counts of every pair of coded questions.
+      hours_moments (np.ndarray): [n, mean, M2] of the whole study hours
+        counted by the tally, merged with combine_moments.
+      rows_per_file (dict): Number of responses read from each file.
+    """
+
+    def __init__(self):
+        self.tally = SurveyTally()
+        self.pairs = PairwiseCounts()
+        self.hours_moments = np.zeros(3)
+        self.rows_per_file = {}
+
+    def update(self, chunk):
+        """Fold one typed batch into the aggregates."""
+        codes = encode_chunk(chunk)
+        hours, parsed = parse_study_hours(chunk["study_hours"])
+        masks = encode_challenges(chunk["biggest_challenges"])
+        self.tally.add_codes(codes, hours, parsed.status, masks)
+        self.pairs.update(codes)
+        hours = hours[hours >= 0].astype(float)
+        if len(hours):
+            mean = hours.mean()
+            self._add_hours_moments(len(hours), mean, np.sum((hours - mean) ** 2))
+        return self
+
+    def _add_hours_moments(self, count, mean, m2):
+        self.hours_moments = np.array(
+            combine_moments(*self.hours_moments, count, mean, m2), dtype=float
+        )
+
+    def merge(self, other):
+        """Add another BatchAggregate into this one (associative)."""
+        self.tally.merge(other.tally)
+        self.pairs.merge(other.pairs)
+        self._add_hours_moments(*other.hours_moments)
+        self.rows_per_file.update(other.rows_per_file)
+        return self
+
+    def hours_mean_std(self):
+        """Return the mean and population std of the parsed study hours."""
+        n, mean, m2 = self.hours_moments
+        if n == 0:
+            return np.nan, np.nan
+        return mean, np.sqrt(m2 / n)
+
+
+def aggregate_file(path, chunksize=None):
+    """
+    Aggregate a single survey file (the map step, run in a worker).
+
+    Returns:
+      BatchAggregate: Partial aggregates of that file.
+    """
+    partial = BatchAggregate()
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    rows = 0
+    for chunk in iter_survey(path, columns=_BATCH_COLUMNS, **kwargs):
+        partial.update(chunk)
+        rows += len(chunk)
+    partial.rows_per_file[path] = rows
+    return partial
+
+
+def expand_sources(sources):
+    """
+    Resolve directories and glob patterns to a sorted list of CSV files.
+
+    Parameters:
+      sources (str or list): Paths, directories (all *.csv inside) or globs.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            paths.update(glob.glob(os.path.join(source, "*.csv")))
+        else:
+            matches = glob.glob(source)
+            paths.update(matches if matches else [source])
+    return sorted(paths)
+
+
+def map_merge(items, fn, merge, workers, args=()):
+    """
+    Call fn(item, *args) for every item in a process pool and hand each
+    result to merge() in the calling process as soon as it is ready.
+
+    At most 2 * workers items are in flight, so a long (or lazy) sequence
+    of items is consumed as results are merged and released, instead of
+    being submitted all at once. Results arrive in completion order.
+
+    Parameters:
+      items (iterable): Work items (e.g. file paths or typed batches).
+      fn (callable): Picklable module-level function run in the workers.
+      merge (callable): Receives every result.
+      workers (int): Worker processes; 1 runs everything in the calling
+        process, in order.
+      args (tuple): Extra arguments passed to fn after the item.
+    """
+    items = iter(items)
+    if workers <= 1:
+        for item in items:
+            merge(fn(item, *args))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {
+            pool.submit(fn, item, *args)
+            for item in itertools.islice(items, 2 * workers)
+        }
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                merge(future.result())
+                for item in itertools.islice(items, 1):
+                    running.add(pool.submit(fn, item, *args))
+
+
+def run_batch(sources, workers=None, chunksize=None):
+    """
+    Aggregate many survey files in a process pool.
+
+    Parameters:
+      sources (str or list): Files, directories or glob patterns.
+      workers (int): Worker processes (default: os.cpu_count()); 1 runs
+        everything in the calling process.
+      chunksize (int): Optional rows per batch inside each worker.
+
+    Returns:
+      BatchAggregate: Merged aggregates of every file.
+    """
+    paths = expand_sources(sources)
+    total = BatchAggregate()
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    map_merge(paths, aggregate_file, total.merge, workers, (chunksize,))
+    return total
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from survey_challenges import encode_challenges
+from survey_crosstab import PairwiseCounts
+from survey_loader import iter_survey
+from survey_synth import generate_survey
+from survey_tally import SurveyTally, encode_chunk, parse_study_hours
+from survey_tensor import CountTensor
+
+# ============================================================
+# Pipeline Benchmark Suite
+# ============================================================
+# Generates synthetic surveys of the requested sizes and times every stage
+# of the pipeline on them: parse (CSV -> typed batches), code (integer
+# codes, study hours, challenge bitmasks), tally, group (segment x question
+# tensor), rank (per-question ranking of the tally table), crosstab (all
+# pairs) and plot (headless figure rendering). Wall and CPU time of each
+# stage are saved as JSON so results from different versions can be
+# compared with --baseline. tracemalloc slows Python-heavy stages several
+# times over, so peak allocations are only measured with --memory, in a
+# separate run from the timings.
+STAGES = ["parse", "code", "tally", "group", "rank", "crosstab", "plot"]
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+class _StageTimer:
+    """Accumulates wall/CPU time (or peak traced memory) per stage."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        if trace_memory:
+            self.results = {stage: {"peak_mb": 0.0} for stage in STAGES}
+        else:
+            self.results = {stage: {"wall_s": 0.0, "cpu_s": 0.0} for stage in STAGES}
+
+    def run(self, stage, func, *args):
+        record = self.results[stage]
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = func(*args)
+            peak = (tracemalloc.get_traced_memory()[1] - before) / 1e6
+            record["peak_mb"] = max(record["peak_mb"], peak)
+            return result
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func(*args)
+        record["wall_s"] += time.perf_counter() - wall
+        record["cpu_s"] += time.process_time() - cpu
+        return result
+
+
+def _code(chunk):
+    hours, parsed = parse_study_hours(chunk["study_hours"])
+    return (
+        encode_chunk(chunk),
+        hours,
+        parsed.status,
+        encode_challenges(chunk["biggest_challenges"]),
+    )
+
+
+def _rank(frame):
+    from survey_summary import grouped_summary
+
+    return grouped_summary(frame).top_k(3)
+
+
+def _plot(tally, out_dir):
+    from survey_render import question_specs, render_report
+
+    specs = question_specs(CountTensor.from_tally(tally))
+    return render_report(specs, out_dir, workers=1, force=True)
+
+
+def benchmark_file(path, plot=True, chunksize=None, trace_memory=False):
+    """
+    Time every pipeline stage on one survey CSV.
+
+    Parameters:
+      path (str): Survey CSV.
+      plot (bool): Include the plot stage (one bar chart per question).
+      chunksize (int): Optional rows per batch.
+      trace_memory (bool): Measure peak traced allocations instead of time.
+
+    Returns:
+      dict: {"rows": n, "stages": {stage: {"wall_s", "cpu_s"}}}, or
+      {stage: {"peak_mb"}} with trace_memory.
+    """
+    timer = _StageTimer(trace_memory)
+    tally = SurveyTally()
+    pairs = PairwiseCounts()
+    group = None
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    reader = iter_survey(path, **kwargs)
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        while True:
+            chunk = timer.run("parse", next, reader, None)
+            if chunk is None:
+                break
+            codes, hours, status, masks = timer.run("code", _code, chunk)
+            timer.run("tally", tally.add_codes, codes, hours, status, masks)
+            segments = codes[:, 0].astype(np.int64) - 1  # year of study
+            part = timer.run("group", CountTensor.from_codes, codes, segments, 4)
+            group = part if group is None else group + part
+            timer.run("crosstab", pairs.update, codes)
+        timer.run("rank", _rank, tally.to_frame())
+        if plot:
+            with tempfile.TemporaryDirectory() as out_dir:
+                timer.run("plot", _plot, tally, out_dir)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return {"rows": tally.n_responses, "stages": timer.results}
+
+
+def environment():
+    """Describe the interpreter and libraries the benchmark ran with."""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes=None, work_dir=None, plot=True, seed=0, memory=False):
+    """
+    Generate synthetic surveys of each size and benchmark them.
+
+    Generated files are kept in `work_dir` and reused by later runs.
+    """
+    from survey_cli import measure_import_time
+
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), "survey_bench")
+    os.makedirs(work_dir, exist_ok=True)
+    startup_ms, heavy = measure_import_time(["--help"])
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "cli_startup": {"import_ms": startup_ms, "heavy_modules": heavy},
+        "runs": [],
+    }
+    for size in sizes or DEFAULT_SIZES:
+        path = os.path.join(work_dir, "synthetic_%d_seed%d.csv" % (size, seed))
+        if not os.path.exists(path):
+            generate_survey(path, size, seed=seed)
+        run = benchmark_file(path, plot=plot)
+        run["file_mb"] = os.path.getsize(path) / 1e6
+        if memory:
+            traced = benchmark_file(path, plot=plot, trace_memory=True)
+            for stage, record in traced["stages"].items():
+                run["stages"][stage].update(record)
+        results["runs"].append(run)
+    return results
+
+
+def compare(results, baseline):
+    """Return lines comparing wall time per stage with a baseline run."""
+    lines = []
+    previous = {run["rows"]: run for run in baseline["runs"]}
+    for run in results["runs"]:
+        old = previous.get(run["rows"])
+        if old is None:
+            continue
+        for stage in STAGES:
+            new_s = run["stages"][stage]["wall_s"]
+            old_s = old["stages"][stage]["wall_s"]
+            if old_s > 0:
+                lines.append(
+                    "%10d rows %-9s %8.3fs -> %8.3fs (%+.0f%%)"
+                    % (run["rows"], stage, old_s, new_s, 100 * (new_s / old_s - 1))
+                )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the survey pipeline.")
+    parser.add_argument("--rows", type=int, nargs="*", default=DEFAULT_SIZES)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare with")
+    parser.add_argument("--work-dir", help="where synthetic CSVs are kept")
+    parser.add_argument("--no-plot", action="store_true")
+    parser.add_argument("--memory", action="store_true", help="also trace memory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.rows, args.work_dir, not args.no_plot, args.seed, args.memory
+    )
+    with open(args.out, "w") as fh:
+        json.dump(results, fh, indent=2)
+    for run in results["runs"]:
+        print("%d rows (%.1f MB)" % (run["rows"], run["file_mb"]))
+        for stage in STAGES:
+            record = run["stages"][stage]
+            line = "  %-9s wall %8.3fs  cpu %8.3fs" % (
+                stage,
+                record["wall_s"],
+                record["cpu_s"],
+            )
+            if "peak_mb" in record:
+                line += "  peak %8.1f MB" % record["peak_mb"]
+            print(line)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            print("\n".join(compare(results, json.load(fh))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
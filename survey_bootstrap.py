@@ -0,0 +1,203 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from survey_batch import map_merge
+from survey_loader import LIKERT_COLUMNS, QUESTION_LABELS
+
+# ============================================================
+# Multinomial Bootstrap from Count Histograms
+# ============================================================
+# Resampling n respondents with replacement from a question's answers is
+# the same as drawing one multinomial vector with n trials and the observed
+# level shares, so the bootstrap never touches respondent-level data: each
+# (segment, question) cell of a survey_tensor.CountTensor gets n_boot
+# multinomial draws at once, and the mean and top-2-box share of every draw
+# are a matrix product away. Blocks of cells are resampled in parallel
+# worker processes, each with its own spawned seed.
+DEFAULT_RESAMPLES = 10_000
+
+STATISTICS = ["mean", "top2box"]
+
+# Upper bound on the int64 draws held at once per block of cells.
+_BLOCK_BYTES = 64 << 20
+
+
+def _resample_block(counts, values, top, n_boot, seed):
+    """
+    Bootstrap the statistics of a block of cells.
+
+    Parameters:
+      counts (np.ndarray): (cells, levels) observed counts.
+      values (np.ndarray): (cells, levels) level values, 0 in padded cells.
+      top (np.ndarray): (cells, levels) 1.0 for the top-2-box levels.
+      n_boot (int): Number of resamples.
+      seed (np.random.SeedSequence): Seed of this block.
+
+    Returns:
+      dict: {statistic: (n_boot, cells) float32 array}.
+    """
+    rng = np.random.default_rng(seed)
+    n = counts.sum(axis=1)
+    # Empty cells draw nothing; give them valid probabilities anyway.
+    pvals = np.where(n[:, None] > 0, counts / np.maximum(n, 1)[:, None], 0.0)
+    pvals[n == 0, 0] = 1.0
+    draws = rng.multinomial(n, pvals, size=(n_boot, len(counts)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.einsum("bcl,cl->bc", draws, values) / n
+        top2box = np.einsum("bcl,cl->bc", draws, top) / n
+    return {"mean": mean.astype(np.float32), "top2box": top2box.astype(np.float32)}
+
+
+def _numbered_resample_job(numbered_job):
+    i, job = numbered_job
+    return i, _resample_block(*job)
+
+
+def _nanquantile(samples, q):
+    """np.nanquantile over the resamples, quietly NaN for all-NaN cells."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanquantile(samples, q, axis=0)
+
+
+class BootstrapResult:
+    """
+    Bootstrap distributions of the mean and top-2-box share per cell.
+
+    Attributes:
+      samples (dict): {statistic: (n_boot, [n_segments,] n_questions)}.
+      estimates (dict): {statistic: observed value per cell}.
+      questions (list): Short question names.
+      segment (str): Name of the segment axis, or None.
+      segment_labels (list): Labels along the segment axis, or None.
+    """
+
+    def __init__(self, samples, estimates, questions, segment, segment_labels):
+        self.samples = samples
+        self.estimates = estimates
+        self.questions = questions
+        self.segment = segment
+        self.segment_labels = segment_labels
+
+    def interval(self, statistic="mean", level=0.95):
+        """Return the (low, high) percentile interval of every cell."""
+        alpha = (1 - level) / 2
+        low, high = _nanquantile(self.samples[statistic], [alpha, 1 - alpha])
+        return low, high
+
+    def difference(self, a, b, statistic="mean", level=0.95):
+        """
+        Compare two segments question by question.
+
+        Parameters:
+          a, b: Segment labels (or positions if the tensor had no labels).
+
+        Returns:
+          pd.DataFrame: Observed difference a - b with its percentile
+          interval and the bootstrap share of resamples where a <= b.
+        """
+        labels = list(self.segment_labels or range(self.samples[statistic].shape[1]))
+        i, j = labels.index(a), labels.index(b)
+        samples = self.samples[statistic]
+        delta = samples[:, i] - samples[:, j]
+        alpha = (1 - level) / 2
+        low, high = _nanquantile(delta, [alpha, 1 - alpha])
+        estimate = self.estimates[statistic]
+        return pd.DataFrame(
+            {
+                "difference": estimate[i] - estimate[j],
+                "low": low,
+                "high": high,
+                "p_not_greater": np.mean(delta <= 0, axis=0),
+            },
+            index=pd.Index(
+                [QUESTION_LABELS[name] for name in self.questions], name="Question"
+            ),
+        )
+
+    def summary(self, level=0.95):
+        """Return every statistic with its interval as a DataFrame."""
+        labels = [QUESTION_LABELS[name] for name in self.questions]
+        data = {}
+        for statistic in STATISTICS:
+            low, high = self.interval(statistic, level)
+            data[statistic] = self.estimates[statistic]
+            data[statistic + "_low"] = low
+            data[statistic + "_high"] = high
+        if self.samples["mean"].ndim == 2:
+            return pd.DataFrame(data, index=pd.Index(labels, name="Question"))
+        segments = self.segment_labels or range(self.samples["mean"].shape[1])
+        index = pd.MultiIndex.from_product(
+            [segments, labels], names=[self.segment or "segment", "Question"]
+        )
+        return pd.DataFrame({key: value.ravel() for key, value in data.items()}, index)
+
+
+def bootstrap_tensor(tensor, n_boot=DEFAULT_RESAMPLES, seed=0, workers=None):
+    """
+    Bootstrap the mean and top-2-box share of every cell of a CountTensor.
+
+    As in CountTensor.summary, the top-2-box share is only resampled for
+    Likert questions; it is NaN for the categorical ones.
+
+    Parameters:
+      tensor (CountTensor): Counts, optionally split by segment.
+      n_boot (int): Resamples per cell.
+      seed (int): Seed; results do not depend on the number of workers.
+      workers (int): Worker processes (default: os.cpu_count()); 1 runs in
+        the calling process.
+
+    Returns:
+      BootstrapResult: Distributions shaped (n_boot,) + tensor.totals().shape.
+    """
+    shape = tensor.counts.shape[:-1]
+    width = tensor.counts.shape[-1]
+    counts = tensor.counts.reshape(-1, width)
+    n_levels = tensor.mask.sum(axis=1)
+    is_likert = np.array([name in LIKERT_COLUMNS for name in tensor.questions])
+    top = (np.arange(width) >= (n_levels - 2)[:, None]) & tensor.mask
+    top &= is_likert[:, None]
+    values = np.broadcast_to(np.nan_to_num(tensor.values), shape + (width,))
+    top = np.broadcast_to(top.astype(float), shape + (width,))
+    values, top = values.reshape(-1, width), top.reshape(-1, width)
+
+    cells_per_block = max(1, _BLOCK_BYTES // (8 * n_boot * width))
+    starts = range(0, len(counts), cells_per_block)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    jobs = [
+        (
+            counts[start : start + cells_per_block],
+            values[start : start + cells_per_block],
+            top[start : start + cells_per_block],
+            n_boot,
+            block_seed,
+        )
+        for start, block_seed in zip(starts, seeds)
+    ]
+
+    blocks = [None] * len(jobs)
+
+    def keep(result):
+        i, block = result
+        blocks[i] = block
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    map_merge(enumerate(jobs), _numbered_resample_job, keep, workers)
+
+    samples = {
+        statistic: np.concatenate(
+            [block[statistic] for block in blocks], axis=1
+        ).reshape((n_boot,) + shape)
+        for statistic in STATISTICS
+    }
+    samples["top2box"][..., ~is_likert] = np.nan
+    estimates = {
+        "mean": tensor.mean(),
+        "top2box": np.where(is_likert, tensor.top2box(), np.nan),
+    }
+    return BootstrapResult(
+        samples, estimates, tensor.questions, tensor.segment, tensor.segment_labels
+    )
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+
+import numpy as np
+import pandas as pd
+
+from survey_challenges import MASK_DTYPE, encode_challenges
+from survey_hours import parse_hours
+from survey_loader import iter_survey
+from survey_tally import CODED_COLUMNS, SurveyTally, encode_chunk, whole_hours
+
+# ============================================================
+# Content-Hashed Columnar Cache
+# ============================================================
+# The typed, coded survey is written once to a directory of per-column
+# .npy files next to the source CSV (data.csv -> data.csv.cache/). Later
+# runs memory-map those files instead of parsing the CSV text again. The
+# manifest records the source size and content hash; a cache whose source
+# changed is rebuilt automatically.
+CACHE_SUFFIX = ".cache"
+MANIFEST = "manifest.json"
+
+# Bump when the set or encoding of cached columns changes.
+CACHE_VERSION = 1
+
+# Free-text columns kept as one UTF-8 byte buffer plus row offsets.
+# Missing answers are stored as empty strings.
+TEXT_COLUMNS = ["major", "improvements", "feedback"]
+
+NUMERIC_COLUMNS = {
+    "timestamp": np.dtype("datetime64[s]"),
+    **{name: np.dtype(np.uint8) for name in CODED_COLUMNS},
+    "study_hours_low": np.dtype(np.float32),
+    "study_hours_high": np.dtype(np.float32),
+    "study_hours_status": np.dtype(np.uint8),
+    "biggest_challenges": np.dtype(MASK_DTYPE),
+}
+
+_HASH_BLOCK = 1 << 20
+_HEADER_SIZE = 128
+
+
+def file_digest(path):
+    """Return the BLAKE2b hex digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _npy_header(dtype, length):
+    """Return a fixed-size .npy v1.0 header for a 1-D array of `length`."""
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(dtype),
+        length,
+    )
+    text = text.ljust(_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+class _ColumnWriter:
+    """
+    Append-only writer of a 1-D .npy file whose length is unknown up front.
+
+    A header of fixed size is written first and patched with the final
+    length on close, so chunks go straight to disk and memory stays flat.
+    """
+
+    def __init__(self, path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.fh = open(path, "wb")
+        self.fh.write(_npy_header(self.dtype, 0))
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self.fh.write(values.tobytes())
+        self.length += len(values)
+
+    def close(self):
+        self.fh.seek(0)
+        self.fh.write(_npy_header(self.dtype, self.length))
+        self.fh.close()
+
+
+class _TextWriter:
+    """Writes a text column as <name>.bytes.npy and <name>.offsets.npy."""
+
+    def __init__(self, directory, name):
+        self.data = _ColumnWriter(
+            os.path.join(directory, name + ".bytes.npy"), np.uint8
+        )
+        self.offsets = _ColumnWriter(
+            os.path.join(directory, name + ".offsets.npy"), np.int64
+        )
+        self.offsets.append([0])
+
+    def append(self, series):
+        encoded = [text.encode("utf-8") for text in series.fillna("")]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self.offsets.append(self.data.length + np.cumsum(lengths))
+        self.data.append(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def close(self):
+        self.data.close()
+        self.offsets.close()
+
+
+class ColumnarCache:
+    """
+    Memory-mapped columns of a cached survey.
+
+    Numeric columns are read with cache[name]; text columns with
+    cache.text(name), which decodes them into a pandas Series.
+    """
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.n_rows = manifest["n_rows"]
+        self._columns = {}
+
+    def _load(self, filename):
+        return np.load(os.path.join(self.directory, filename), mmap_mode="r")
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            if name not in NUMERIC_COLUMNS:
+                raise KeyError(name)
+            self._columns[name] = self._load(name + ".npy")
+        return self._columns[name]
+
+    def text_buffers(self, name):
+        """Return the (bytes, offsets) arrays of a text column."""
+        if name not in TEXT_COLUMNS:
+            raise KeyError(name)
+        return self._load(name + ".bytes.npy"), self._load(name + ".offsets.npy")
+
+    def text(self, name):
+        """Decode a text column into a Series of str (empty = missing)."""
+        data, offsets = self.text_buffers(name)
+        raw = data.tobytes()
+        return pd.Series(
+            [
+                raw[start:stop].decode("utf-8")
+                for start, stop in zip(offsets[:-1], offsets[1:])
+            ],
+            dtype=object,
+        )
+
+    def codes(self):
+        """Return the (n_rows, len(CODED_COLUMNS)) code matrix."""
+        return np.column_stack([self[name] for name in CODED_COLUMNS])
+
+    def tally(self):
+        """Tally every question straight from the cached codes."""
+        return SurveyTally().add_codes(
+            self.codes(),
+            whole_hours((self["study_hours_low"] + self["study_hours_high"]) / 2),
+            self["study_hours_status"],
+            self["biggest_challenges"],
+        )
+
+
+def cache_dir(source):
+    """Return the cache directory of a survey CSV."""
+    return source + CACHE_SUFFIX
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(manifest, source):
+    """
+    Check a manifest against its source file.
+
+    Size and modification time are compared first; the content hash is only
+    recomputed when they differ, so a fresh cache opens without reading the
+    source. A source that was touched but not changed keeps its cache.
+    """
+    if manifest is None or manifest.get("version") != CACHE_VERSION:
+        return False
+    stat = os.stat(source)
+    if stat.st_size != manifest["size"]:
+        return False
+    if stat.st_mtime_ns == manifest["mtime_ns"]:
+        return True
+    if file_digest(source) != manifest["digest"]:
+        return False
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def build_cache(source, directory=None):
+    """
+    Parse a survey CSV once and write its typed, coded columns.
+
+    The columns are written chunk by chunk to a temporary directory which
+    replaces the old cache when complete.
+
+    Returns:
+      ColumnarCache: The freshly built cache.
+    """
+    directory = directory or cache_dir(source)
+    stat = os.stat(source)
+    digest = file_digest(source)
+
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    numeric = {
+        name: _ColumnWriter(os.path.join(tmp_dir, name + ".npy"), dtype)
+        for name, dtype in NUMERIC_COLUMNS.items()
+    }
+    text = {name: _TextWriter(tmp_dir, name) for name in TEXT_COLUMNS}
+
+    n_rows = 0
+    for chunk in iter_survey(source):
+        numeric["timestamp"].append(chunk["timestamp"].to_numpy("datetime64[s]"))
+        codes = encode_chunk(chunk)
+        for i, name in enumerate(CODED_COLUMNS):
+            numeric[name].append(codes[:, i])
+        parsed = parse_hours(chunk["study_hours"])
+        numeric["study_hours_low"].append(parsed.low)
+        numeric["study_hours_high"].append(parsed.high)
+        numeric["study_hours_status"].append(parsed.status)
+        numeric["biggest_challenges"].append(
+            encode_challenges(chunk["biggest_challenges"])
+        )
+        for name, writer in text.items():
+            writer.append(chunk[name])
+        n_rows += len(chunk)
+
+    for writer in list(numeric.values()) + list(text.values()):
+        writer.close()
+    manifest = {
+        "version": CACHE_VERSION,
+        "source": os.path.basename(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": digest,
+        "n_rows": n_rows,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    return ColumnarCache(directory, manifest)
+
+
+def open_cache(source="data.csv", directory=None):
+    """
+    Return the memory-mapped cache of a survey CSV, rebuilding it if stale.
+
+    Parameters:
+      source (str): Path to the survey CSV file.
+      directory (str): Optional cache directory (default: <source>.cache).
+
+    Returns:
+      ColumnarCache: Cached columns matching the current source contents.
+    """
+    directory = directory or cache_dir(source)
+    manifest = _read_manifest(directory)
+    recorded_mtime = manifest.get("mtime_ns") if manifest else None
+    if not _is_fresh(manifest, source):
+        return build_cache(source, directory)
+    if manifest["mtime_ns"] != recorded_mtime:
+        with open(os.path.join(directory, MANIFEST), "w") as fh:
+            json.dump(manifest, fh, indent=2)
+    return ColumnarCache(directory, manifest)
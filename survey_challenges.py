@@ -0,0 +1,119 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from survey_loader import CHALLENGE_OPTIONS
+
+# ============================================================
+# Bit-Packed "Biggest Challenge" Selections
+# ============================================================
+# The multi-select answer is a comma-joined string such as
+# "Difficult course material, Time management". Each respondent is stored
+# as one small integer with bit j set when CHALLENGE_OPTIONS[j] was chosen,
+# plus an extra bit for any typed-in "Other" answer.
+OTHER = "Other"
+OPTIONS = CHALLENGE_OPTIONS + [OTHER]
+OTHER_BIT = len(CHALLENGE_OPTIONS)
+
+MASK_DTYPE = np.uint8 if len(OPTIONS) <= 8 else np.uint16
+
+_BIT = {option.lower(): j for j, option in enumerate(CHALLENGE_OPTIONS)}
+
+# Row m holds the bits of mask value m, so per-mask tables can be turned
+# into per-option sums with a matrix product.
+_BITS_TABLE = (
+    (np.arange(1 << len(OPTIONS))[:, None] >> np.arange(len(OPTIONS))) & 1
+).astype(np.int64)
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_selection(text):
+    """
+    Return the bitmask of one raw multi-select answer.
+
+    Parsed once per distinct spelling; the survey only has a few dozen.
+    """
+    mask = 0
+    for part in text.split(","):
+        part = part.strip().lower()
+        if part:
+            mask |= 1 << _BIT.get(part, OTHER_BIT)
+    return mask
+
+
+def encode_challenges(series):
+    """
+    Convert the raw "biggest challenge" column to one bitmask per respondent.
+
+    The strings are factorized first, so only the distinct answers are split
+    and looked up; the per-row work is a single array gather.
+
+    Parameters:
+      series (pd.Series): Raw column (missing answers give an empty mask).
+
+    Returns:
+      np.ndarray: MASK_DTYPE bitmasks, one per row.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    table = np.array([parse_selection(text) for text in uniques], dtype=MASK_DTYPE)
+    # Append a zero mask so the NA sentinel (-1) picks up "no selection".
+    table = np.append(table, MASK_DTYPE(0))
+    return table[codes]
+
+
+def mask_of(*options):
+    """Return the bitmask selecting the given option names."""
+    mask = 0
+    for option in options:
+        mask |= 1 << OPTIONS.index(option)
+    return mask
+
+
+def mask_histogram(masks):
+    """Return how many respondents have each possible mask value."""
+    return np.bincount(masks, minlength=len(_BITS_TABLE))
+
+
+def option_counts(masks):
+    """
+    Return the number of respondents choosing each option (OPTIONS order).
+
+    One bincount over the masks followed by a tiny matrix product, instead
+    of one pass per option.
+    """
+    return mask_histogram(masks) @ _BITS_TABLE
+
+
+def cooccurrence(masks):
+    """
+    Return the (len(OPTIONS), len(OPTIONS)) co-occurrence matrix.
+
+    Entry [i, j] counts respondents choosing both option i and option j; the
+    diagonal equals option_counts().
+    """
+    weighted = _BITS_TABLE * mask_histogram(masks)[:, None]
+    return weighted.T @ _BITS_TABLE
+
+
+def popcount(masks):
+    """Return the number of options chosen by each respondent."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    return _BITS_TABLE.sum(axis=1).astype(np.uint8)[masks]
+
+
+def count_all(masks, *options):
+    """Count respondents who chose every one of `options`."""
+    required = MASK_DTYPE(mask_of(*options))
+    return int(np.count_nonzero((masks & required) == required))
+
+
+def count_any(masks, *options):
+    """Count respondents who chose at least one of `options`."""
+    return int(np.count_nonzero(masks & MASK_DTYPE(mask_of(*options))))
+
+
+def cooccurrence_frame(masks):
+    """Return cooccurrence() as a DataFrame labelled with the option names."""
+    return pd.DataFrame(cooccurrence(masks), index=OPTIONS, columns=OPTIONS)
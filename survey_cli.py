@@ -0,0 +1,482 @@
+"""
+Command-line entry point for the survey analysis.
+
+    python survey_cli.py tally [data.csv ...]
+    python survey_cli.py stats [--segment year]
+    python survey_cli.py crosstab [data.csv ...] --pair year overall_quality
+    python survey_cli.py plot --out figures
+    python survey_cli.py report
+    python survey_cli.py terms [--segment year]
+    python survey_cli.py majors
+    python survey_cli.py serve [--port 8765] [--wal responses.wal]
+    python survey_cli.py submit data.csv [--port 8765]
+    python survey_cli.py importtime [--budget-ms 150]
+    python survey_cli.py --trace trace.json report
+
+Only the standard library is imported at startup. Each subcommand imports
+what it needs when it runs: pandas/numpy for the data commands, and
+matplotlib/seaborn only in the worker processes of `plot`.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Modules that must not be imported just to start the CLI.
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "seaborn"]
+
+DEFAULT_BUDGET_MS = 150.0
+
+
+# ============================================================
+# Subcommands
+# ============================================================
+def _is_multi_source(path):
+    return os.path.isdir(path) or any(ch in path for ch in "*?[")
+
+
+def _is_batch(args):
+    return len(args.paths) > 1 or _is_multi_source(args.paths[0])
+
+
+def _load_tally(args):
+    if getattr(args, "cached", False):
+        from survey_batch import expand_sources
+        from survey_cache import open_cache
+        from survey_tally import SurveyTally
+
+        tally = SurveyTally()
+        for path in expand_sources(args.paths):
+            tally.merge(open_cache(path).tally())
+        return tally
+    if _is_batch(args):
+        from survey_batch import run_batch
+
+        return run_batch(args.paths, workers=args.workers).tally
+    from survey_tally import tally_survey
+
+    return tally_survey(args.paths[0])
+
+
+def _load_tensor(args):
+    """Count every source, split by args.segment, into one CountTensor."""
+    from survey_batch import expand_sources
+    from survey_tensor import CountTensor
+
+    paths = expand_sources(args.paths)
+    if not paths:
+        raise ValueError("No survey files in %s" % ", ".join(args.paths))
+    tensors = [CountTensor.from_survey(path, segment=args.segment) for path in paths]
+    return sum(tensors[1:], tensors[0])
+
+
+def cmd_tally(args):
+    """Print the [Question, Response, Count] table."""
+    frame = _load_tally(args).to_frame()
+    if args.question:
+        from survey_loader import QUESTION_LABELS
+
+        frame = frame[frame["Question"] == QUESTION_LABELS[args.question]]
+    print(frame.to_csv(index=False) if args.csv else frame.to_string(index=False))
+
+
+def cmd_stats(args):
+    """Print weighted statistics per question, optionally per segment."""
+    if args.segment:
+        print(_load_tensor(args).summary().to_string())
+        return
+    from survey_stats import question_stats
+
+    print(question_stats(_load_tally(args)).to_string())
+
+
+def cmd_crosstab(args):
+    """Print one crosstab with its association measures, or all pairs."""
+    if _is_batch(args):
+        from survey_batch import run_batch
+
+        pairs = run_batch(args.paths, workers=args.workers).pairs
+    else:
+        from survey_crosstab import pairwise_survey
+
+        pairs = pairwise_survey(args.paths[0])
+    matrices = pairs.associations()
+    if args.all:
+        print(matrices[args.measure].round(3).to_string())
+        return
+    from survey_loader import QUESTION_LABELS
+
+    a, b = args.pair
+    print(pairs.table(a, b).to_string())
+    a, b = QUESTION_LABELS[a], QUESTION_LABELS[b]
+    print()
+    for key in ["chi2", "dof", "p_value", "cramers_v", "spearman"]:
+        print("%-10s %.4g" % (key, matrices[key].loc[a, b]))
+
+
+def cmd_plot(args):
+    """Render the overview and per-question figures headlessly."""
+    from survey_render import overview_specs, question_specs, render_report
+    from survey_tensor import CountTensor
+
+    # Both the overview and the per-question figures count every source.
+    tally = _load_tally(args)
+    tensor = _load_tensor(args) if args.segment else CountTensor.from_tally(tally)
+    specs = overview_specs(tally.to_frame()) + question_specs(tensor)
+    result = render_report(
+        specs, out_dir=args.out, fmt=args.format, workers=args.workers
+    )
+    print(
+        "%d figures rendered, %d unchanged, in %s"
+        % (len(result["rendered"]), len(result["skipped"]), args.out)
+    )
+
+
+def cmd_report(args):
+    """Print the summary tables of the analysis scripts."""
+    tally = _load_tally(args)
+    frame = tally.to_frame()
+    print("Student counts by Year:")
+    print(tally.as_dict("year"))
+    print("\nNumber of extremely dissatisfied responses for Q1:")
+    print(tally.as_dict("overall_quality")[1])
+    from survey_summary import grouped_summary
+
+    summary = grouped_summary(frame)
+    print("\nGrouped Data (aggregated 'Count') by Question:")
+    print(summary.groups)
+    print("\nTop %d responses of each question:" % args.top)
+    print(summary.top_k(args.top).to_string(index=False))
+
+
+def cmd_terms(args):
+    """Print the most frequent terms and bigrams of the free-text answers."""
+    from survey_text import mine_text
+
+    counts = mine_text(args.paths, workers=args.workers)
+    top = counts.top_terms(args.top, segment=args.segment, kind=args.kind)
+    print(top.to_string(index=False))
+
+
+def cmd_majors(args):
+    """Print each major spelling with its canonical name and count."""
+    import pandas as pd
+
+    from survey_batch import expand_sources
+    from survey_loader import iter_survey
+    from survey_majors import MajorCanonicalizer
+
+    majors = MajorCanonicalizer(args.cache)
+    counts = []
+    for path in expand_sources(args.paths):
+        for chunk in iter_survey(path, columns=["major"]):
+            counts.append(chunk["major"].value_counts())
+    counts = pd.concat(counts).groupby(level=0).sum() if counts else pd.Series()
+    table = pd.DataFrame(
+        {
+            "Major": [majors.canonical(raw) for raw in counts.index],
+            "Spelling": [repr(raw) for raw in counts.index],
+            "Respondents": counts.to_numpy(),
+        }
+    )
+    majors.save()
+    print(table.sort_values(["Major", "Respondents"]).to_string(index=False))
+    print("\n%d spellings, %d matched now" % (len(table), majors.matched))
+
+
+def cmd_dedup(args):
+    """Drop exact duplicate submissions and report near-duplicate clusters."""
+    from survey_dedup import dedup_survey
+
+    dedup = dedup_survey(
+        args.paths, out_path=args.out, threshold=args.threshold, near=not args.exact
+    )
+    for key, value in dedup.summary().items():
+        print("%-18s %d" % (key, value))
+    clusters = dedup.clusters()
+    if len(clusters):
+        print("\nLargest duplicate clusters (Cluster = first row):")
+        print(clusters.head(args.top).to_string(index=False))
+
+
+def cmd_trend(args):
+    """Print rolling per-question trends from hourly/daily/weekly buckets."""
+    from survey_rollup import TimeRollup, rollup_survey
+
+    rollup = TimeRollup.load(args.load) if args.load else rollup_survey(args.paths)
+    if args.save:
+        rollup.save(args.save)
+    questions = [args.question] if args.question else None
+    if args.shares:
+        table = rollup.share_trend(
+            args.question or "overall_quality",
+            args.freq,
+            args.window,
+            args.start,
+            args.end,
+        )
+    else:
+        table = rollup.trend(
+            args.freq, args.window, args.stat, args.start, args.end, questions
+        )
+    print(table.to_string(float_format="%.3f"))
+
+
+def cmd_segment(args):
+    """Count the respondents of a segment, optionally by a question's levels."""
+    from survey_segments import SegmentIndex, question_levels, where
+
+    conditions = {}
+    for condition in args.where or []:
+        question, _, spec = condition.partition("=")
+        conditions[question.strip()] = spec.strip()
+    segment = where(**conditions)
+    index = SegmentIndex.from_survey(args.paths)
+    print("%d of %d respondents" % (index.count(segment), index.n_rows))
+    if args.by:
+        counts = index.counts(args.by, segment)
+        for level, count in zip(question_levels(args.by), counts):
+            print("  %-30s %d" % (level, count))
+
+
+def cmd_moments(args):
+    """Print one-pass moments per question and composite indices."""
+    from survey_moments import moments_survey
+
+    moments = moments_survey(args.paths, segment=args.segment, workers=args.workers)
+    print(moments.overall.summary().round(3).to_string())
+    if args.segment:
+        print()
+        print(moments.composite().round(3).to_string())
+
+
+def cmd_serve(args):
+    """Run the local ingestion service until interrupted."""
+    from survey_service import run_service
+
+    run_service(args.host, args.port, args.wal, fsync=args.fsync)
+
+
+def cmd_submit(args):
+    """Post the rows of survey CSVs to a running service."""
+    from survey_batch import expand_sources
+    from survey_service import SurveyClient, survey_responses
+
+    accepted = 0
+    with SurveyClient(args.host, args.port) as client:
+        for path in expand_sources(args.paths):
+            for batch in survey_responses(path, chunksize=args.batch):
+                accepted += client.submit(batch)
+        stats = client.stats()
+    print("%d responses accepted, %d held" % (accepted, stats["n_responses"]))
+
+
+def measure_import_time(argv=None):
+    """
+    Run `python -X importtime survey_cli.py <argv>` in a fresh interpreter.
+
+    Returns:
+      (float, list): Total import time in milliseconds and the heavy
+      modules (see HEAVY_MODULES) that were imported.
+    """
+    script = os.path.abspath(__file__)
+    command = [sys.executable, "-X", "importtime", script] + list(argv or ["--help"])
+    result = subprocess.run(command, capture_output=True, text=True)
+    return parse_import_times(result.stderr)
+
+
+def parse_import_times(stderr):
+    """
+    Sum the top-level cumulative times of `-X importtime` output.
+
+    Returns:
+      (float, list): Total import time in milliseconds and the heavy
+      modules (see HEAVY_MODULES) that were imported.
+    """
+    total_us = 0
+    heavy = set()
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if not match:
+            continue
+        if match.group(3) == " ":  # top-level import: cumulative time
+            total_us += int(match.group(2))
+        package = match.group(4).split(".")[0]
+        if package in HEAVY_MODULES:
+            heavy.add(package)
+    return total_us / 1000.0, sorted(heavy)
+
+
+def cmd_importtime(args):
+    """Check that starting the CLI stays within the import-time budget."""
+    total_ms, heavy = measure_import_time(args.argv or ["--help"])
+    print("startup imports: %.1f ms (budget %.1f ms)" % (total_ms, args.budget_ms))
+    if heavy:
+        print("heavy modules imported at startup: %s" % ", ".join(heavy))
+    return 0 if total_ms <= args.budget_ms and not heavy else 1
+
+
+# ============================================================
+# Argument Parsing
+# ============================================================
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="survey_cli.py", description="Student survey analysis."
+    )
+    parser.add_argument("--trace", metavar="PATH", help="write a JSON stage trace")
+    parser.add_argument(
+        "--chrome-trace", metavar="PATH", help="write a Chrome trace (chrome://tracing)"
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="also trace Python allocations"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, func, help_text, cached=False, workers=False):
+        command = commands.add_parser(name, help=help_text)
+        command.set_defaults(func=func)
+        command.add_argument(
+            "paths",
+            nargs="*",
+            default=["data.csv"],
+            help="survey CSV files, directories or globs (default: data.csv)",
+        )
+        if cached:
+            command.add_argument(
+                "--cached",
+                action="store_true",
+                help="read the memory-mapped column cache of each file",
+            )
+        if workers:
+            command.add_argument(
+                "--workers", type=int, default=None, help="worker processes"
+            )
+        return command
+
+    tally = add_command(
+        "tally", cmd_tally, "per-question response counts", cached=True, workers=True
+    )
+    tally.add_argument("--question", help="only this question (short name)")
+    tally.add_argument("--csv", action="store_true", help="print as CSV")
+
+    stats = add_command(
+        "stats",
+        cmd_stats,
+        "weighted statistics per question",
+        cached=True,
+        workers=True,
+    )
+    stats.add_argument("--segment", help="split by a coded question, e.g. year")
+
+    crosstab = add_command(
+        "crosstab", cmd_crosstab, "crosstab of two questions", workers=True
+    )
+    crosstab.add_argument(
+        "--pair",
+        nargs=2,
+        metavar=("A", "B"),
+        default=["year", "overall_quality"],
+        help="the two questions (short names)",
+    )
+    crosstab.add_argument("--all", action="store_true", help="all pairs")
+    crosstab.add_argument(
+        "--measure",
+        default="cramers_v",
+        choices=["chi2", "p_value", "cramers_v", "spearman"],
+    )
+
+    plot = add_command(
+        "plot", cmd_plot, "render figures to files", cached=True, workers=True
+    )
+    plot.add_argument("--out", default="figures", help="output directory")
+    plot.add_argument("--format", default="png", choices=["png", "svg"])
+    plot.add_argument("--segment", help="one chart per level of this question")
+
+    report = add_command(
+        "report", cmd_report, "summary tables", cached=True, workers=True
+    )
+    report.add_argument("--top", type=int, default=10)
+
+    terms = add_command(
+        "terms", cmd_terms, "top terms of the free-text answers", workers=True
+    )
+    terms.add_argument("--top", type=int, default=10)
+    terms.add_argument("--segment", default="all", help="all, year or major")
+    terms.add_argument("--kind", choices=["term", "bigram"])
+
+    majors = add_command("majors", cmd_majors, "canonical names of the majors")
+    majors.add_argument("--cache", default="majors.cache.json", help="cache file")
+
+    dedup = add_command("dedup", cmd_dedup, "drop duplicate submissions")
+    dedup.add_argument("--out", help="write the rows kept to this CSV")
+    dedup.add_argument("--threshold", type=float, default=0.8)
+    dedup.add_argument("--exact", action="store_true", help="skip near duplicates")
+    dedup.add_argument("--top", type=int, default=10)
+
+    trend = add_command("trend", cmd_trend, "rolling trends over time buckets")
+    trend.add_argument("--freq", default="day", choices=["hour", "day", "week"])
+    trend.add_argument("--window", type=int, default=1, help="buckets per window")
+    trend.add_argument("--stat", default="mean", choices=["n", "mean", "top2box"])
+    trend.add_argument("--question", help="only this question (short name)")
+    trend.add_argument("--shares", action="store_true", help="level shares")
+    trend.add_argument("--start", help="first time of the range")
+    trend.add_argument("--end", help="last time of the range")
+    trend.add_argument("--save", metavar="PATH", help="save the rollup (.npz)")
+    trend.add_argument("--load", metavar="PATH", help="read a saved rollup")
+
+    segment = add_command("segment", cmd_segment, "respondents in a segment")
+    segment.add_argument(
+        "--where",
+        action="append",
+        metavar="QUESTION=LEVELS",
+        help='a condition, e.g. year="3rd year" or overall_quality=">=4"',
+    )
+    segment.add_argument("--by", help="also count the levels of this question")
+
+    moments = add_command(
+        "moments", cmd_moments, "one-pass moments and composites", workers=True
+    )
+    moments.add_argument("--segment", help="composites per level of this question")
+
+    serve = commands.add_parser("serve", help="local ingestion service")
+    serve.set_defaults(func=cmd_serve)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--wal", default="responses.wal", help="write-ahead log")
+    serve.add_argument("--fsync", action="store_true", help="fsync every commit")
+
+    submit = add_command("submit", cmd_submit, "post survey rows to the service")
+    submit.add_argument("--host", default="127.0.0.1")
+    submit.add_argument("--port", type=int, default=8765)
+    submit.add_argument("--batch", type=int, default=1000, help="rows per request")
+
+    importtime = commands.add_parser(
+        "importtime", help="measure the CLI's startup import time"
+    )
+    importtime.set_defaults(func=cmd_importtime)
+    importtime.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    importtime.add_argument(
+        "argv",
+        nargs=argparse.REMAINDER,
+        help="CLI arguments to measure (default: --help)",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not (args.trace or args.chrome_trace):
+        return args.func(args) or 0
+    import survey_trace
+
+    tracer = survey_trace.enable(args.trace, args.chrome_trace, args.trace_memory)
+    with survey_trace.stage(args.command):
+        status = args.func(args) or 0
+    print(tracer.report(), file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from survey_loader import QUESTION_LABELS, iter_survey
+from survey_tally import CODED_COLUMNS, LEVELS, encode_chunk
+from survey_tensor import MAX_LEVELS
+
+# ============================================================
+# All-Pairs Crosstabs and Association Measures
+# ============================================================
+# For the coded questions (the 12 Likert questions plus the categoricals)
+# every pairwise contingency table is built from the integer codes in one
+# pass: for question a, the combined code a * WIDTH + b of all later
+# questions b is counted with a single bincount. Chi-square, Cramer's V and
+# Spearman's rho for all pairs are then computed on the stacked tables.
+WIDTH = MAX_LEVELS + 1  # code 0 (missing) plus up to MAX_LEVELS levels
+
+
+class PairwiseCounts:
+    """
+    Joint code counts of every pair of coded questions.
+
+    joint[a, b] is a (WIDTH, WIDTH) table of question a's code (rows) against
+    question b's code (columns); row/column 0 hold missing answers. Only
+    a < b is accumulated, the lower triangle is filled by transposition.
+    """
+
+    def __init__(self, questions=None):
+        self.questions = list(questions or CODED_COLUMNS)
+        n = len(self.questions)
+        self._columns = [CODED_COLUMNS.index(name) for name in self.questions]
+        self.upper = np.zeros((n, n, WIDTH, WIDTH), dtype=np.int64)
+
+    def update(self, codes):
+        """Fold a (rows, len(CODED_COLUMNS)) code matrix into the counts."""
+        sub = codes[:, self._columns].astype(np.intp)
+        n = len(self.questions)
+        for a in range(n - 1):
+            later = n - a - 1
+            cells = (
+                np.arange(later) * (WIDTH * WIDTH)
+                + sub[:, a, None] * WIDTH
+                + sub[:, a + 1 :]
+            )
+            counts = np.bincount(cells.ravel(), minlength=later * WIDTH * WIDTH)
+            self.upper[a, a + 1 :] += counts.reshape(later, WIDTH, WIDTH)
+        return self
+
+    def merge(self, other):
+        self.upper += other.upper
+        return self
+
+    @property
+    def joint(self):
+        """Full symmetric (n, n, WIDTH, WIDTH) array of joint counts."""
+        return self.upper + self.upper.transpose(1, 0, 3, 2)
+
+    def table(self, a, b):
+        """Return the crosstab of two questions (missing answers left out)."""
+        i, j = self.questions.index(a), self.questions.index(b)
+        counts = self.joint[i, j, 1 : len(LEVELS[a]) + 1, 1 : len(LEVELS[b]) + 1]
+        return pd.DataFrame(
+            counts,
+            index=pd.Index(LEVELS[a], name=a),
+            columns=pd.Index(LEVELS[b], name=b),
+        )
+
+    def associations(self):
+        """Return chi-square, p-value, Cramer's V and Spearman's rho matrices."""
+        return association_matrices(self.joint[:, :, 1:, 1:], self.questions)
+
+
+def chi2_sf(x, dof):
+    """
+    Upper tail probability of the chi-square distribution.
+
+    Computed as the regularized upper incomplete gamma function Q(dof/2,
+    x/2) by series expansion or continued fraction (Numerical Recipes).
+    """
+    if dof <= 0 or not np.isfinite(x):
+        return np.nan
+    a, x = dof / 2.0, x / 2.0
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        n = a
+        while abs(term) > abs(total) * 1e-15:
+            n += 1
+            term *= x / n
+            total += term
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+def association_matrices(tables, questions):
+    """
+    Compute association measures for a stack of contingency tables.
+
+    Parameters:
+      tables (np.ndarray): (n, n, r, c) counts, tables[i, j] crossing
+        question i (rows) with question j (columns); empty rows/columns are
+        ignored.
+      questions (list): Short question names along the first two axes.
+
+    Returns:
+      dict of pd.DataFrame: "chi2", "dof", "p_value", "cramers_v" and
+      "spearman", each an (n, n) matrix labelled with question labels.
+      Spearman's rho uses midranks of the level order, so it is only
+      meaningful for ordinal questions.
+    """
+    tables = tables.astype(float)
+    total = tables.sum(axis=(-2, -1))
+    rows = tables.sum(axis=-1)
+    cols = tables.sum(axis=-2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expected = rows[..., :, None] * cols[..., None, :] / total[..., None, None]
+        cells = np.where(expected > 0, (tables - expected) ** 2 / expected, 0.0)
+    chi2 = cells.sum(axis=(-2, -1))
+    r = (rows > 0).sum(axis=-1)
+    c = (cols > 0).sum(axis=-1)
+    dof = (r - 1) * (c - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cramers_v = np.sqrt(chi2 / (total * (np.minimum(r, c) - 1)))
+
+    # Spearman's rho: Pearson correlation of the midranks of both answers,
+    # weighted by the joint counts.
+    row_ranks = np.cumsum(rows, axis=-1) - (rows - 1) / 2
+    col_ranks = np.cumsum(cols, axis=-1) - (cols - 1) / 2
+    centre = (total[..., None] + 1) / 2
+    row_dev = row_ranks - centre
+    col_dev = col_ranks - centre
+    cov = np.einsum("...ij,...i,...j->...", tables, row_dev, col_dev)
+    var_rows = (rows * row_dev**2).sum(axis=-1)
+    var_cols = (cols * col_dev**2).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spearman = cov / np.sqrt(var_rows * var_cols)
+
+    p_value = np.vectorize(chi2_sf, otypes=[float])(chi2, dof)
+    for matrix in (chi2, cramers_v, spearman, p_value):
+        np.fill_diagonal(matrix, np.nan)
+
+    labels = pd.Index([QUESTION_LABELS[name] for name in questions])
+    return {
+        key: pd.DataFrame(value, index=labels, columns=labels)
+        for key, value in [
+            ("chi2", chi2),
+            ("dof", dof),
+            ("p_value", p_value),
+            ("cramers_v", cramers_v),
+            ("spearman", spearman),
+        ]
+    }
+
+
+def pairwise_survey(path="data.csv", questions=None, chunksize=None):
+    """
+    Build every pairwise crosstab of a survey CSV in one chunked scan.
+
+    Returns:
+      PairwiseCounts: Joint counts; call .associations() for the matrices.
+    """
+    pairs = PairwiseCounts(questions)
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    for chunk in iter_survey(path, columns=CODED_COLUMNS, **kwargs):
+        pairs.update(encode_chunk(chunk))
+    return pairs
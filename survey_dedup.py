@@ -0,0 +1,524 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from survey_batch import expand_sources
+from survey_challenges import encode_challenges
+from survey_loader import COLUMN_NAMES, TIMESTAMP_FORMAT, iter_survey, resolve_columns
+from survey_tally import CODED_COLUMNS, encode_chunk
+from survey_text import analyze, normalize
+from survey_trace import stage
+
+# ============================================================
+# Streaming Deduplication of Raw Submissions
+# ============================================================
+# Rows are checked batch by batch as they are read, in one pass:
+#
+# Exact duplicates have the same answers in every column but the
+# Timestamp. Each row is hashed to 64 bits (pandas' vectorized
+# hash_pandas_object) and looked up in the set of hashes seen so far; a
+# hit is dropped. The set is a few sorted NumPy runs of (hash, first row),
+# merged like a binary counter, so it costs 16 bytes per distinct row and
+# a lookup is a handful of binary searches. Beyond MAX_HASHES distinct rows
+# the older half is forgotten, so a repeat is only caught within the last
+# MAX_HASHES / 2 distinct rows or more.
+#
+# Near duplicates (the same person submitting twice with a changed answer,
+# bot spam with shuffled text) are flagged, not dropped. Every row becomes
+# a set of features - its coded answers, challenge selection, major, study
+# hours and the terms of its comments - summarized by a MinHash signature
+# of NUM_PERM 32-bit minima. Signatures are split into BANDS bands; rows
+# sharing a band are candidates (locality-sensitive hashing), and a
+# candidate is flagged when the signatures agree on at least `threshold`
+# of their positions (the estimated Jaccard similarity of the features).
+# Signatures of the distinct answers of each column are computed once per
+# batch, then combined per row with np.minimum.
+#
+# Near-duplicate memory is bounded: each band is a direct-mapped table of
+# up to BAND_SLOTS (key, row) entries, where a newer key evicts an older
+# one, and only the last WINDOW_ROWS signatures are kept for verification.
+# Both start small and double with the rows seen until they reach those
+# sizes, so a small file does not pay for the full tables. Matches
+# are therefore found among recent rows, which is where double
+# submissions and spam bursts are. Flagged rows are grouped into clusters
+# under their earliest row.
+EXACT = "exact"
+NEAR = "near"
+
+NUM_PERM = 64
+BANDS = 8
+BAND_ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.8
+
+BAND_SLOTS = 1 << 19
+WINDOW_ROWS = 1 << 18
+MAX_HASHES = 1 << 22
+
+# Smallest band table and signature window; they grow by doubling.
+_MIN_SLOTS = 1 << 8
+
+# Columns whose whole (normalized) answer is one feature.
+_WHOLE_ANSWER_COLUMNS = ["major", "study_hours"]
+# Columns contributing one feature per term (survey_text.analyze).
+_TERM_COLUMNS = ["improvements", "feedback"]
+
+_EMPTY = np.uint32(0xFFFFFFFF)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+_SEEDS = np.random.default_rng(0x5EED).integers(
+    0, 1 << 63, size=NUM_PERM, dtype=np.uint64
+)
+
+
+def _mix(x):
+    """SplitMix64 finalizer: a fast bijective 64-bit scramble (wrapping)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * _M1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def _minhash(features):
+    """Return the (NUM_PERM,) uint32 signature of an array of uint64 features."""
+    if len(features) == 0:
+        return np.full(NUM_PERM, _EMPTY, dtype=np.uint32)
+    hashed = _mix(features[:, None] ^ _SEEDS) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def _feature(salt, text):
+    return (salt << 32) | zlib.crc32(text.encode("utf-8"))
+
+
+def _column_signatures(codes, features):
+    """
+    Map factorized answers to signatures.
+
+    Parameters:
+      codes (np.ndarray): Factorized codes of one column, -1 if missing.
+      features (list): uint64 feature array of each unique answer.
+
+    Returns:
+      np.ndarray: (n_rows, NUM_PERM) signatures; missing answers are empty.
+    """
+    table = np.full((len(features) + 1, NUM_PERM), _EMPTY, dtype=np.uint32)
+    for i, unique_features in enumerate(features):
+        table[i] = _minhash(unique_features)
+    return table[codes]
+
+
+def signatures(chunk):
+    """
+    Return the MinHash signatures of the rows of a typed batch.
+
+    Returns:
+      np.ndarray: (n_rows, NUM_PERM) uint32 signatures.
+    """
+    # Coded answers: one feature per (question, code) pair.
+    codes = encode_chunk(chunk).astype(np.int64)
+    pairs = codes + 16 * np.arange(len(CODED_COLUMNS))
+    pair_codes, pair_uniques = pd.factorize(pairs.ravel())
+    pair_features = [
+        np.zeros(0, np.uint64) if pair % 16 == 0 else np.array([pair], np.uint64)
+        for pair in pair_uniques
+    ]
+    table = np.full((len(pair_uniques) + 1, NUM_PERM), _EMPTY, dtype=np.uint32)
+    for i, features in enumerate(pair_features):
+        table[i] = _minhash(features)
+    sig = table[pair_codes].reshape(len(chunk), len(CODED_COLUMNS), NUM_PERM)
+    sig = sig.min(axis=1)
+
+    masks = encode_challenges(chunk["biggest_challenges"])
+    mask_codes, mask_uniques = pd.factorize(masks)
+    np.minimum(
+        sig,
+        _column_signatures(
+            mask_codes,
+            [np.array([(1 << 40) | int(m)], np.uint64) for m in mask_uniques],
+        ),
+        out=sig,
+    )
+    for salt, column in enumerate(_WHOLE_ANSWER_COLUMNS, 2):
+        column_codes, uniques = pd.factorize(chunk[column])
+        features = [
+            np.array([_feature(salt, normalize(text))], np.uint64) for text in uniques
+        ]
+        np.minimum(sig, _column_signatures(column_codes, features), out=sig)
+    for salt, column in enumerate(_TERM_COLUMNS, 2 + len(_WHOLE_ANSWER_COLUMNS)):
+        column_codes, uniques = pd.factorize(chunk[column])
+        features = [
+            np.array([_feature(salt, term) for term in set(analyze(text))], np.uint64)
+            for text in uniques
+        ]
+        np.minimum(sig, _column_signatures(column_codes, features), out=sig)
+    return sig
+
+
+def band_keys(sig):
+    """Return the (n_rows, BANDS) uint64 LSH keys of a signature matrix."""
+    keys = np.empty((len(sig), BANDS), dtype=np.uint64)
+    wide = sig.astype(np.uint64)
+    for band in range(BANDS):
+        cols = wide[:, band * BAND_ROWS : (band + 1) * BAND_ROWS]
+        key = np.full(len(sig), band, dtype=np.uint64)
+        for j in range(0, BAND_ROWS, 2):
+            pair = cols[:, j] << np.uint64(32)
+            if j + 1 < BAND_ROWS:
+                pair |= cols[:, j + 1]
+            key = _mix(key ^ pair)
+        keys[:, band] = key
+    return keys
+
+
+class _SeenHashes:
+    """
+    Set of 64-bit row hashes, each remembering the first row it was seen in.
+
+    Stored as sorted runs; a new run is merged into the previous one while
+    that one is at most twice its size, so there are O(log n) runs. Past
+    `max_hashes` entries, only the newest half (by first row) is kept.
+    """
+
+    def __init__(self, max_hashes=MAX_HASHES):
+        self.max_hashes = max_hashes
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self.runs)
+
+    @property
+    def nbytes(self):
+        return sum(keys.nbytes + rows.nbytes for keys, rows in self.runs)
+
+    def lookup(self, hashes):
+        """Return the first row of every hash, or -1 if it is new."""
+        found = np.full(len(hashes), -1, dtype=np.int64)
+        for keys, rows in self.runs:
+            pos = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+            hit = keys[pos] == hashes
+            found[hit] = rows[pos[hit]]
+        return found
+
+    def add(self, hashes, rows):
+        """Add distinct, new hashes."""
+        if len(hashes) == 0:
+            return
+        order = np.argsort(hashes)
+        self.runs.append((hashes[order], rows[order]))
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+            newer, older = self.runs.pop(), self.runs.pop()
+            keys = np.concatenate([older[0], newer[0]])
+            order = np.argsort(keys, kind="stable")
+            self.runs.append((keys[order], np.concatenate([older[1], newer[1]])[order]))
+        if len(self) > self.max_hashes:
+            self._forget_oldest(self.max_hashes // 2)
+
+    def _forget_oldest(self, keep):
+        keys = np.concatenate([keys for keys, _ in self.runs])
+        rows = np.concatenate([rows for _, rows in self.runs])
+        newest = np.argpartition(rows, len(rows) - keep)[len(rows) - keep :]
+        order = newest[np.argsort(keys[newest])]
+        self.runs = [(keys[order], rows[order])]
+
+
+class Deduplicator:
+    """
+    Streaming exact and near-duplicate detection over typed batches.
+
+    Rows are numbered in the order they are passed to filter(), from 0.
+
+    Parameters:
+      threshold (float): Estimated Jaccard similarity at which a row is
+        flagged as a near duplicate of an earlier one.
+      near (bool): Detect near duplicates (exact ones are always dropped).
+      band_slots (int): Largest LSH band table (a power of two).
+      window_rows (int): Most recent signatures kept to verify candidates.
+      max_hashes (int): Most exact-duplicate hashes kept.
+
+    Attributes:
+      n_rows (int): Rows seen.
+      n_exact (int): Exact duplicates dropped.
+      n_near (int): Near duplicates flagged.
+    """
+
+    def __init__(
+        self,
+        threshold=DEFAULT_THRESHOLD,
+        near=True,
+        band_slots=BAND_SLOTS,
+        window_rows=WINDOW_ROWS,
+        max_hashes=MAX_HASHES,
+    ):
+        if band_slots & (band_slots - 1):
+            raise ValueError("band_slots must be a power of two: %d" % band_slots)
+        self.threshold = threshold
+        self.near = near
+        self.band_slots = band_slots
+        self.window_rows = window_rows
+        self.n_rows = 0
+        self.n_exact = 0
+        self.n_near = 0
+        self._seen = _SeenHashes(max_hashes)
+        self._flags = []
+        self._band_keys = np.zeros((BANDS, 0), dtype=np.uint64)
+        self._band_rows = np.full((BANDS, 0), -1, dtype=np.int64)
+        self._window = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._window_rows = np.full(0, -1, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the hash set, band tables and signature window."""
+        return (
+            self._seen.nbytes
+            + self._band_keys.nbytes
+            + self._band_rows.nbytes
+            + self._window.nbytes
+            + self._window_rows.nbytes
+        )
+
+    def _reserve(self, n_rows):
+        """
+        Grow the band tables and the signature window (by doubling, up to
+        band_slots and window_rows) to suit `n_rows` rows. Entries keep
+        their place: a key's slot only gains high bits, and the window has
+        not wrapped around while it is smaller than window_rows.
+        """
+        # Four slots per row keep band collisions about as rare as in the
+        # full-size tables.
+        size = _MIN_SLOTS
+        while size < 4 * n_rows:
+            size *= 2
+        slots = min(size, self.band_slots)
+        if slots > self._band_keys.shape[1]:
+            keys = np.zeros((BANDS, slots), dtype=np.uint64)
+            rows = np.full((BANDS, slots), -1, dtype=np.int64)
+            for band in range(BANDS):
+                used = self._band_rows[band] >= 0
+                slot = (self._band_keys[band, used] & np.uint64(slots - 1)).astype(
+                    np.int64
+                )
+                keys[band, slot] = self._band_keys[band, used]
+                rows[band, slot] = self._band_rows[band, used]
+            self._band_keys, self._band_rows = keys, rows
+        window = min(size, self.window_rows)
+        if window > len(self._window_rows):
+            used = self._window_rows >= 0
+            slot = self._window_rows[used] % window
+            sig = np.zeros((window, NUM_PERM), dtype=np.uint32)
+            rows = np.full(window, -1, dtype=np.int64)
+            sig[slot] = self._window[used]
+            rows[slot] = self._window_rows[used]
+            self._window, self._window_rows = sig, rows
+
+    def _flag(self, rows, parents, kind, similarity):
+        self._flags.append((rows, parents, np.full(len(rows), kind), similarity))
+
+    def filter(self, chunk):
+        """
+        Drop the exact duplicates of a typed batch and flag near duplicates.
+
+        Parameters:
+          chunk (pd.DataFrame): Batch from survey_loader.iter_survey with
+            all columns.
+
+        Returns:
+          pd.DataFrame: The rows that are not exact duplicates.
+        """
+        rows = np.arange(self.n_rows, self.n_rows + len(chunk), dtype=np.int64)
+        self.n_rows += len(chunk)
+        answers = chunk[[name for name in chunk.columns if name != "timestamp"]]
+        hashes = pd.util.hash_pandas_object(answers, index=False).to_numpy()
+
+        # First occurrence of every hash: an earlier batch, else this one.
+        unique, first, inverse = np.unique(
+            hashes, return_index=True, return_inverse=True
+        )
+        earlier = self._seen.lookup(unique)
+        first_row = np.where(earlier >= 0, earlier, rows[first])[inverse.ravel()]
+        duplicate = first_row != rows
+        new = earlier < 0
+        self._seen.add(unique[new], rows[first[new]])
+
+        if duplicate.any():
+            self.n_exact += int(duplicate.sum())
+            self._flag(
+                rows[duplicate], first_row[duplicate], EXACT, np.ones(duplicate.sum())
+            )
+        kept = chunk[~duplicate]
+        if self.near and len(kept):
+            # Keep a block's row span within the window, so its own
+            # signatures are not evicted before they are compared.
+            step = self.window_rows // 2
+            kept_rows = rows[~duplicate]
+            for start in range(0, len(kept), step):
+                self._near(kept.iloc[start : start + step], kept_rows[start:][:step])
+        return kept
+
+    def _near(self, chunk, rows):
+        self._reserve(int(rows[-1]) + 1)
+        sig = signatures(chunk)
+        slots = rows % len(self._window_rows)
+        self._window[slots] = sig
+        self._window_rows[slots] = rows
+
+        keys = band_keys(sig)
+        mask = np.uint64(self._band_keys.shape[1] - 1)
+        best_row = np.full(len(rows), -1, dtype=np.int64)
+        best_sim = np.zeros(len(rows))
+        for band in range(BANDS):
+            key = keys[:, band]
+            slot = (key & mask).astype(np.int64)
+            stored = self._band_rows[band, slot]
+            match = (self._band_keys[band, slot] == key) & (stored >= 0)
+            # Within the batch, the candidate is the previous row with the
+            # same key; otherwise the row stored in the table.
+            order = np.argsort(key, kind="stable")
+            same = key[order[1:]] == key[order[:-1]]
+            previous = np.full(len(rows), -1, dtype=np.int64)
+            previous[order[1:][same]] = rows[order[:-1][same]]
+            candidate = np.where(previous >= 0, previous, np.where(match, stored, -1))
+            # The latest row of every key takes its slot (rows ascend, and
+            # the last of repeated fancy-index writes is the one kept).
+            self._band_keys[band, slot] = key
+            self._band_rows[band, slot] = rows
+
+            # Verify candidates whose signature is still in the window.
+            check = np.flatnonzero(candidate >= 0)
+            candidate = candidate[check]
+            window_slots = candidate % len(self._window_rows)
+            present = self._window_rows[window_slots] == candidate
+            check, candidate = check[present], candidate[present]
+            similarity = (sig[check] == self._window[window_slots[present]]).mean(1)
+            better = (similarity > best_sim[check]) | (
+                (similarity == best_sim[check]) & (candidate < best_row[check])
+            )
+            best_row[check[better]] = candidate[better]
+            best_sim[check[better]] = similarity[better]
+
+        empty = (sig == _EMPTY).all(axis=1)
+        near = (best_row >= 0) & (best_sim >= self.threshold) & ~empty
+        if near.any():
+            self.n_near += int(near.sum())
+            self._flag(rows[near], best_row[near], NEAR, best_sim[near])
+
+    def duplicates(self):
+        """
+        Return every dropped or flagged row.
+
+        Returns:
+          pd.DataFrame: [Row, DuplicateOf, Cluster, Kind, Similarity] sorted
+          by Row. DuplicateOf is the matched earlier row and Cluster the
+          earliest row of its cluster.
+        """
+        columns = ["Row", "DuplicateOf", "Cluster", "Kind", "Similarity"]
+        if not self._flags:
+            return pd.DataFrame({name: [] for name in columns})
+        rows, parents, kinds, similarity = (
+            np.concatenate(part) for part in zip(*self._flags)
+        )
+        order = np.argsort(rows, kind="stable")
+        rows, parents = rows[order], parents[order]
+        # Follow DuplicateOf links up to a row that is not itself flagged.
+        cluster = parents.copy()
+        while True:
+            pos = np.minimum(np.searchsorted(rows, cluster), len(rows) - 1)
+            linked = rows[pos] == cluster
+            if not linked.any():
+                break
+            cluster[linked] = parents[pos[linked]]
+        return pd.DataFrame(
+            {
+                "Row": rows,
+                "DuplicateOf": parents,
+                "Cluster": cluster,
+                "Kind": kinds[order],
+                "Similarity": similarity[order],
+            }
+        )
+
+    def clusters(self):
+        """
+        Return one line per duplicate cluster, largest first.
+
+        Returns:
+          pd.DataFrame: [Cluster, Size, Exact, Near]; Size counts the
+          cluster's first row too.
+        """
+        flagged = self.duplicates()
+        exact = (flagged["Kind"] == EXACT).to_numpy()
+        cluster, inverse = np.unique(flagged["Cluster"], return_inverse=True)
+        n_exact = np.bincount(inverse, weights=exact, minlength=len(cluster))
+        n_near = np.bincount(inverse, weights=~exact, minlength=len(cluster))
+        table = pd.DataFrame(
+            {
+                "Cluster": cluster.astype(np.int64),
+                "Size": (1 + n_exact + n_near).astype(np.int64),
+                "Exact": n_exact.astype(np.int64),
+                "Near": n_near.astype(np.int64),
+            }
+        )
+        return table.sort_values(
+            ["Size", "Cluster"], ascending=[False, True], ignore_index=True
+        )
+
+    def summary(self):
+        """Return the row counts as a dict."""
+        return {
+            "rows": self.n_rows,
+            "kept": self.n_rows - self.n_exact,
+            "exact_duplicates": self.n_exact,
+            "near_duplicates": self.n_near,
+        }
+
+    def iter_unique(self, sources="data.csv", chunksize=None):
+        """
+        Read survey files and yield their batches without exact duplicates.
+
+        Parameters:
+          sources (str or list): Files, directories or glob patterns.
+          chunksize (int): Optional rows per batch.
+
+        Yields:
+          pd.DataFrame: Typed batches (all columns).
+        """
+        kwargs = {} if chunksize is None else {"chunksize": chunksize}
+        for path in expand_sources(sources):
+            for chunk in iter_survey(path, **kwargs):
+                yield self.filter(chunk)
+
+
+def dedup_survey(sources="data.csv", out_path=None, chunksize=None, **kwargs):
+    """
+    Deduplicate one or more survey files in a single streaming pass.
+
+    Parameters:
+      sources (str or list): Files, directories or glob patterns.
+      out_path (str): Optional CSV to write the rows that are not exact
+        duplicates to, with the original headers of the first file.
+      chunksize (int): Optional rows per batch.
+      **kwargs: Deduplicator options (threshold, near, ...).
+
+    Returns:
+      Deduplicator: Counts, duplicates() and clusters() of the pass.
+    """
+    dedup = Deduplicator(**kwargs)
+    out = None
+    with stage("dedup") as st:
+        for chunk in dedup.iter_unique(sources, chunksize):
+            if out_path is None:
+                continue
+            if out is None:
+                first = expand_sources(sources)[0]
+                headers = {name: raw for raw, name in resolve_columns(first).items()}
+                out = open(out_path, "w", newline="", encoding="utf-8")
+                header = True
+            chunk[COLUMN_NAMES].rename(columns=headers).to_csv(
+                out, index=False, header=header, date_format=TIMESTAMP_FORMAT
+            )
+            header = False
+        if out is not None:
+            out.close()
+        st.rows_out = dedup.n_rows - dedup.n_exact
+    return dedup
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Free-Text Study Hours Parser
+# ============================================================
+# "How many hours per week do you spend studying outside of class?" is a
+# free-text answer. Most respondents type a number ("9"), but many add
+# units or ranges ("12 hours", "4-5 hrs", "3-4", "2 hours per day").
+# Instead of dropping everything float() cannot read, each distinct
+# spelling is parsed once with a regex and classified as:
+#   PARSED   - a plain number of hours
+#   COERCED  - a number recovered from a range, units or extra text
+#   REJECTED - no usable number (e.g. "CSE"), or outside 0..MAX_HOURS
+#   MISSING  - no answer
+PARSED, COERCED, REJECTED, MISSING = 0, 1, 2, 3
+STATUS_NAMES = ["parsed", "coerced", "rejected", "missing"]
+
+MAX_HOURS = 168
+
+_PLAIN = r"^\s*\d+(?:\.\d+)?\s*$"
+_RANGE = r"(\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(\d+(?:\.\d+)?))?"
+_PER_DAY = r"(?i)\b(?:per\s+day|a\s+day|daily|/\s*day)\b"
+
+# raw string -> (low, high, status); filled in as new spellings appear.
+_CACHE = {}
+_CACHE_LIMIT = 100_000
+
+
+def _parse_new(raw_values):
+    """Parse previously unseen spellings with vectorized regex extraction."""
+    text = pd.Series(raw_values, dtype=object).astype(str)
+    bounds = text.str.extract(_RANGE).astype(float).to_numpy()
+    low = bounds[:, 0]
+    high = np.where(np.isnan(bounds[:, 1]), low, bounds[:, 1])
+    low, high = np.minimum(low, high), np.maximum(low, high)
+
+    per_day = text.str.contains(_PER_DAY, regex=True).to_numpy()
+    low = np.where(per_day, low * 7, low)
+    high = np.where(per_day, high * 7, high)
+
+    status = np.where(text.str.match(_PLAIN).to_numpy(), PARSED, COERCED)
+    invalid = np.isnan(low) | (low < 0) | (high > MAX_HOURS)
+    status = np.where(invalid, REJECTED, status)
+    low = np.where(invalid, np.nan, low)
+    high = np.where(invalid, np.nan, high)
+
+    for raw, lo, hi, st in zip(raw_values, low, high, status):
+        _CACHE[raw] = (lo, hi, int(st))
+
+
+class HoursParseResult:
+    """
+    Parsed study hours of a column, aligned with its rows.
+
+    Attributes:
+      low, high (np.ndarray): float bounds per row (equal unless a range was
+        given), NaN when the answer was rejected or missing.
+      status (np.ndarray): uint8 PARSED/COERCED/REJECTED/MISSING per row.
+    """
+
+    def __init__(self, low, high, status):
+        self.low = low
+        self.high = high
+        self.status = status
+
+    @property
+    def midpoint(self):
+        """Return one value per row: the midpoint of ranges, else the number."""
+        return (self.low + self.high) / 2
+
+    def report(self):
+        """Return {"parsed": n, "coerced": n, "rejected": n, "missing": n}."""
+        counts = np.bincount(self.status, minlength=len(STATUS_NAMES))
+        return dict(zip(STATUS_NAMES, (int(c) for c in counts)))
+
+
+def parse_hours(series):
+    """
+    Parse a whole study-hours column at once.
+
+    The column is factorized and only spellings not seen before go through
+    the regex, so a column of millions of rows with a few thousand distinct
+    answers costs a few thousand parses plus array gathers.
+
+    Parameters:
+      series (pd.Series): Raw study-hours answers (strings, NaN if missing).
+
+    Returns:
+      HoursParseResult: Per-row bounds and parse status.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = list(uniques)
+    if len(_CACHE) > _CACHE_LIMIT:
+        _CACHE.clear()
+    new = [raw for raw in uniques if raw not in _CACHE]
+    if new:
+        _parse_new(new)
+
+    # One extra table entry at the end for the NA sentinel (-1).
+    low = np.empty(len(uniques) + 1)
+    high = np.empty(len(uniques) + 1)
+    status = np.empty(len(uniques) + 1, dtype=np.uint8)
+    for i, raw in enumerate(uniques):
+        low[i], high[i], status[i] = _CACHE[raw]
+    low[-1], high[-1], status[-1] = np.nan, np.nan, MISSING
+    return HoursParseResult(low[codes], high[codes], status[codes])
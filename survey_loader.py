@@ -0,0 +1,394 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Survey Schema
+# ============================================================
+# One entry per column of data.csv: (short name, raw header, kind).
+# The raw headers in the Google Forms export carry trailing spaces, so
+# headers are matched after stripping whitespace.
+SCHEMA = [
+    ("timestamp", "Timestamp", "timestamp"),
+    ("year", "What is your year of study?", "category"),
+    ("major", "What is your major/course?", "text"),
+    ("study_method", "How do you prefer to study?", "category"),
+    (
+        "overall_quality",
+        "How would you rate the overall quality of your current courses?",
+        "likert",
+    ),
+    (
+        "instructor_satisfaction",
+        "How satisfied are you with the lecture delivery by instructors?",
+        "likert",
+    ),
+    (
+        "assignments_projects",
+        "How engaging are the assignments and projects?",
+        "likert",
+    ),
+    (
+        "course_materials",
+        "How effective are the course materials (books, slides, online resources)?",
+        "likert",
+    ),
+    ("instructor_explains", "The instructors explains concepts clearly.", "likert"),
+    (
+        "student_participation",
+        "The instructors encourage student participation.",
+        "likert",
+    ),
+    (
+        "approachable_for_doubts",
+        "The instructors are approachable for doubts and discussions.",
+        "likert",
+    ),
+    (
+        "well_equipped_classroom",
+        "How well-equipped are the classrooms (projectors, seating, board visibility)?",
+        "likert",
+    ),
+    (
+        "effective_lab_sessions",
+        "How effective are the practical/lab sessions in reinforcing learning?",
+        "likert",
+    ),
+    (
+        "university_resources",
+        "How helpful are university resources (library, online databases, study areas)?",
+        "likert",
+    ),
+    (
+        "study_hours",
+        "How many hours per week do you spend studying outside of class?",
+        "text",
+    ),
+    ("attend_lectures", "How often do you attend lectures?", "category"),
+    ("workload", "Do you feel the course workload is manageable?", "category"),
+    (
+        "biggest_challenges",
+        "What is/are the biggest challenge affecting your learning?",
+        "text",
+    ),
+    ("improvements", "What improvements would you suggest for your courses?", "text"),
+    ("feedback", "Any additional comments or feedback?", "text"),
+]
+
+# Display names used in the aggregated [Question, Response, Count] tables.
+QUESTION_LABELS = {
+    "year": "Year of Study",
+    "study_method": "Preferred Study Method",
+    "overall_quality": "Overall Course Quality",
+    "instructor_satisfaction": "Instructor Satisfaction",
+    "assignments_projects": "Engaging Assignments/Projects",
+    "course_materials": "Course Materials",
+    "instructor_explains": "Instructor Explains",
+    "student_participation": "Student Participation",
+    "approachable_for_doubts": "Instructor Approachable",
+    "well_equipped_classroom": "Well-Equipped Classroom",
+    "effective_lab_sessions": "Effective Lab Sessions",
+    "university_resources": "University Resources",
+    "study_hours": "Study Hours",
+    "attend_lectures": "Lecture Attendance",
+    "workload": "Workload Manageable",
+    "biggest_challenges": "Biggest Challenges",
+}
+
+# Likert questions are answered on a 1-5 scale.
+LIKERT_LEVELS = [1, 2, 3, 4, 5]
+
+# Categorical questions, levels in the order used for the numeric mappings
+# in Activity_1_Pandas.py (1 = first level, 2 = second level, ...).
+CATEGORY_LEVELS = {
+    "year": ["1st year", "2nd year", "3rd year", "4th year"],
+    "study_method": [
+        "Lecture-based learning",
+        "Hands-on projects",
+        "Group discussions",
+        "Self-Study",
+    ],
+    "attend_lectures": ["Always", "Frequently", "Occasionally", "Rarely"],
+    "workload": ["Yes", "No, it's too much", "No, it's too little"],
+}
+
+# Options offered by the multi-select "biggest challenge" question, in the
+# order of the 1-5 mapping used in Activity_1_Pandas.py. Respondents could
+# also type their own answer ("Other"), which matches none of these.
+CHALLENGE_OPTIONS = [
+    "Difficult course material",
+    "Ineffective teaching methods",
+    "Lack of study resources",
+    "Time management",
+    "Personal motivation",
+]
+
+TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S"
+
+LIKERT_COLUMNS = [name for name, _, kind in SCHEMA if kind == "likert"]
+CATEGORY_COLUMNS = [name for name, _, kind in SCHEMA if kind == "category"]
+TEXT_COLUMNS = [name for name, _, kind in SCHEMA if kind == "text"]
+COLUMN_NAMES = [name for name, _, _ in SCHEMA]
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# TIMESTAMP_FORMAT as bytes: the separators in order, and the longest text
+# ("12/31/2025 23:59:59"). Fields are month, day, year, hour, minute, second.
+_TIMESTAMP_SEPARATORS = np.frombuffer(b"// ::", dtype=np.uint8)
+_TIMESTAMP_WIDTH = 19
+_TIMESTAMP_DIGITS = np.array([[1, 2], [1, 2], [4, 4], [1, 2], [1, 2], [1, 2]])
+_DAYS_IN_MONTH = np.array([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+_KINDS = {name: kind for name, _, kind in SCHEMA}
+_SHORT_BY_HEADER = {header: name for name, header, _ in SCHEMA}
+
+
+def column_dtype(name):
+    """
+    Return the pandas dtype used to read a schema column.
+
+    Parameters:
+      name (str): Short column name from SCHEMA.
+
+    Returns:
+      The dtype passed to pd.read_csv for that column.
+    """
+    kind = _KINDS[name]
+    if kind == "likert":
+        return "Int8"
+    if kind == "category":
+        return pd.CategoricalDtype(CATEGORY_LEVELS[name], ordered=True)
+    # Timestamps are parsed after reading with the known fixed format, and
+    # free text is always read as strings so that chunk-by-chunk type
+    # inference cannot turn e.g. study hours into floats in one chunk only.
+    return str
+
+
+def read_header(path):
+    """Return the raw header names of a survey CSV, in file order."""
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def header_end(path):
+    """Return the byte offset of the first data row (just past the header)."""
+    with open(path, "rb") as fh:
+        fh.readline()
+        return fh.tell()
+
+
+class _ByteWindow(io.RawIOBase):
+    """Read-only view of an open binary file that stops at a byte offset."""
+
+    def __init__(self, fh, stop=None):
+        self.fh = fh
+        self.stop = stop
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        if self.stop is not None:
+            size = min(size, self.stop - self.fh.tell())
+            if size <= 0:
+                return 0
+        data = self.fh.read(size)
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def resolve_columns(path):
+    """
+    Map the raw headers of a survey CSV to the short schema names.
+
+    Parameters:
+      path (str): Path to the survey CSV file.
+
+    Returns:
+      dict: Raw header (exactly as it appears in the file) -> short name.
+
+    Raises:
+      ValueError: If a schema column is missing from the file.
+    """
+    mapping = {}
+    for raw in read_header(path):
+        name = _SHORT_BY_HEADER.get(raw.strip())
+        if name is not None:
+            mapping[raw] = name
+    missing = set(COLUMN_NAMES) - set(mapping.values())
+    if missing:
+        raise ValueError(
+            "%s is missing survey columns: %s" % (path, ", ".join(sorted(missing)))
+        )
+    return mapping
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 of proleptic Gregorian dates (vectorized)."""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100
+    return era * 146097 + day_of_era + day_of_year - 719468
+
+
+def _parse_fixed(values):
+    """
+    Parse "m/d/yyyy h:mm:ss" strings as a byte matrix, without per-row code.
+
+    Returns:
+      (np.ndarray, np.ndarray): datetime64[s] values and a mask of the rows
+      that did not match the format (or have a year before 1).
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype="datetime64[s]"), np.zeros(0, dtype=bool)
+    raw = np.asarray(values, dtype="S%d" % (_TIMESTAMP_WIDTH + 1))
+    chars = raw.view(np.uint8).reshape(len(raw), -1)
+    separator = (chars == ord("/")) | (chars == ord(" ")) | (chars == ord(":"))
+    digit = (chars >= ord("0")) & (chars <= ord("9"))
+    used = chars != 0
+
+    # Only digits and separators, the text ending before the last byte.
+    ok = (digit | separator | ~used).all(axis=1) & ~used[:, -1]
+    ok &= (used[:, :-1] >= used[:, 1:]).all(axis=1)
+    ok &= separator.sum(axis=1) == len(_TIMESTAMP_SEPARATORS)
+    rows = np.flatnonzero(ok)
+    every_row = len(rows) == len(raw)
+    cut = np.nonzero(separator if every_row else separator[rows])[1].reshape(
+        -1, len(_TIMESTAMP_SEPARATORS)
+    )
+    found = chars.ravel()[(rows * chars.shape[1])[:, None] + cut]
+    ok[rows] = (found == _TIMESTAMP_SEPARATORS).all(axis=1)
+
+    # Field i spans bytes starts[i]..ends[i]-1 between the separators.
+    starts = np.column_stack([np.zeros(len(rows), np.intp), cut + 1])
+    length = (used if every_row else used[rows]).sum(axis=1)
+    ends = np.column_stack([cut, length])
+    width = ends - starts
+    ok[rows] &= (
+        (width >= _TIMESTAMP_DIGITS[:, 0]) & (width <= _TIMESTAMP_DIGITS[:, 1])
+    ).all(axis=1)
+
+    # Digit values, 0 for separators and for the zero column prepended so
+    # that byte j of row i is digits[i * stride + j + 1], and the tens digit
+    # of a one-digit field reads as 0 without a bounds check.
+    digits = np.zeros((len(raw), chars.shape[1] + 1), dtype=np.uint8)
+    digits[:, 1:] = (chars - ord("0")) * digit
+    flat, stride = digits.ravel(), digits.shape[1]
+    base = (rows * stride)[:, None] + 1
+
+    tens = flat[base + ends - 2].astype(np.int64)
+    fields = tens * 10 + flat[base + ends - 1]
+    year_start = base[:, 0] + starts[:, 2]
+    fields[:, 2] += flat[year_start].astype(np.int64) * 1000
+    fields[:, 2] += flat[year_start + 1].astype(np.int64) * 100
+
+    month, day, year, hour, minute, second = fields.T
+    month_ok = (month >= 1) & (month <= 12)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = _DAYS_IN_MONTH[np.where(month_ok, month, 0)]
+    days_in_month = days_in_month - ((month == 2) & ~leap)
+    ok[rows] &= month_ok & (day >= 1) & (day <= days_in_month)
+    ok[rows] &= (hour < 24) & (minute < 60) & (second < 60) & (year >= 1)
+
+    seconds = np.zeros(len(raw), dtype=np.int64)
+    seconds[rows] = _days_from_civil(year, month, day) * 86400
+    seconds[rows] += hour * 3600 + minute * 60 + second
+    seconds[~ok] = 0
+    return seconds.astype("datetime64[s]"), ~ok
+
+
+def parse_timestamps(values):
+    """
+    Parse Google Forms timestamps ("2/18/2025 0:09:44") with the fixed format.
+
+    The format is parsed with whole-array NumPy operations on the bytes of
+    the strings; the few values that do not match it exactly (e.g. with
+    non-ASCII characters) go through pd.to_datetime with the same format.
+    Unparseable values become NaT instead of falling back to per-row guessing.
+    Like pd.to_datetime, the result has microsecond resolution, so every
+    4-digit year fits.
+    """
+    values = pd.Series(values)
+    try:
+        stamps, bad = _parse_fixed(values.to_numpy(dtype=object, na_value=""))
+    except UnicodeEncodeError:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors="coerce")
+    parsed = pd.Series(stamps.astype("datetime64[us]"), index=values.index)
+    if bad.any():
+        parsed[bad] = pd.to_datetime(
+            values[bad], format=TIMESTAMP_FORMAT, errors="coerce"
+        )
+    return parsed
+
+
+def iter_survey(
+    path="data.csv", chunksize=DEFAULT_CHUNKSIZE, columns=None, start=None, stop=None
+):
+    """
+    Read a survey CSV in chunks and yield schema-typed DataFrames.
+
+    Every batch has the same short column names and dtypes: Likert answers
+    as Int8, the year/study method/attendance/workload answers as ordered
+    categoricals, the Timestamp as datetime64 and the rest as strings.
+    Only one chunk is held in memory at a time.
+
+    Parameters:
+      path (str): Path to the survey CSV file.
+      chunksize (int): Number of rows per yielded batch.
+      columns (list): Optional subset of short column names to read.
+      start (int): Optional byte offset of the first data row to read. It
+        must point at the beginning of a row, e.g. a previous `stop`.
+      stop (int): Optional byte offset at which to stop reading. It must
+        point just past the end of a row.
+
+    Yields:
+      pd.DataFrame: Typed batch of up to `chunksize` responses.
+    """
+    mapping = resolve_columns(path)
+    wanted = set(columns) if columns is not None else set(COLUMN_NAMES)
+    usecols = [raw for raw, name in mapping.items() if name in wanted]
+    dtypes = {raw: column_dtype(mapping[raw]) for raw in usecols}
+
+    if start is None and stop is None:
+        reader = pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize)
+        yield from _typed_chunks(reader, mapping)
+        return
+
+    # Byte range: the header is not part of the window, so pass it as names.
+    names = read_header(path)
+    with open(path, "rb") as fh:
+        fh.seek(header_end(path) if start is None else start)
+        window = io.BufferedReader(_ByteWindow(fh, stop))
+        if window.peek(1) == b"":
+            return
+        reader = pd.read_csv(
+            window,
+            header=None,
+            names=names,
+            usecols=usecols,
+            dtype=dtypes,
+            chunksize=chunksize,
+        )
+        yield from _typed_chunks(reader, mapping)
+
+
+def _typed_chunks(reader, mapping):
+    for chunk in reader:
+        chunk = chunk.rename(columns=mapping)
+        if "timestamp" in chunk:
+            chunk["timestamp"] = parse_timestamps(chunk["timestamp"])
+        order = [name for name in COLUMN_NAMES if name in chunk]
+        yield chunk[order]
+
+
+def load_survey(path="data.csv", columns=None):
+    """
+    Load a whole survey CSV as a single typed DataFrame.
+
+    Convenience wrapper around iter_survey for files that fit in memory.
+    """
+    chunks = list(iter_survey(path, columns=columns))
+    return pd.concat(chunks, ignore_index=True)
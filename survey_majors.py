@@ -0,0 +1,297 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Canonical Major/Course Names
+# ============================================================
+# "What is your major/course?" is free text: "CSE", "Cse", "Computer
+# science ", "B.Tech (Computer Science and Engineering)" all name the same
+# program. Each distinct spelling is mapped to one of CANONICAL_MAJORS in
+# three steps:
+#
+#   1. normalize: lowercase, "&" -> "and", drop dots, other punctuation to
+#      spaces, collapse whitespace ("B.Tech (CSE)" -> "btech cse");
+#   2. expand known abbreviations and drop degree words ("btech cse" ->
+#      "computer science and engineering");
+#   3. look the result up among the canonical names and their aliases, or
+#      else drop GENERIC_WORDS and fuzzy-match the rest through a
+#      character-trigram index, keeping the best match if its Jaccard
+#      similarity reaches MIN_SIMILARITY ("mechantronics" -> Mechatronics).
+#      Shared words such as "engineering" are left out of the score, so
+#      "chemical engineering" does not pass for mechanical engineering.
+#      Anything else, including names made only of GENERIC_WORDS, becomes
+#      OTHER.
+#
+# Columns are factorized first and only spellings not seen before are
+# matched; the results are memoized per raw string, optionally in a JSON
+# file that survives across runs, so each further row costs a lookup.
+CANONICAL_MAJORS = {
+    "Computer Science and Engineering": ["computer science", "computer engineering"],
+    "Electronics and Communication Engineering": [],
+    "Electrical and Electronics Engineering": [],
+    "Information Technology": [],
+    "Artificial Intelligence and Machine Learning": [],
+    "Artificial Intelligence and Data Science": [],
+    "Data Science": [],
+    "Mechanical Engineering": ["mechanical"],
+    "Civil Engineering": ["civil"],
+    "Mechatronics": ["mechatronics engineering"],
+    "Medicine": ["mbbs"],
+    "Commerce": [],
+    "English": ["english literature"],
+}
+
+OTHER = "Other"
+MAJOR_LABELS = list(CANONICAL_MAJORS) + [OTHER]
+
+# Whole-word abbreviations, matched after normalization (longest first).
+ABBREVIATIONS = {
+    "cse": "computer science and engineering",
+    "cs": "computer science",
+    "ece": "electronics and communication engineering",
+    "eee": "electrical and electronics engineering",
+    "it": "information technology",
+    "aiml": "artificial intelligence and machine learning",
+    "ai ml": "artificial intelligence and machine learning",
+    "aids": "artificial intelligence and data science",
+    "ai ds": "artificial intelligence and data science",
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "ds": "data science",
+    "mech": "mechanical",
+    "bcom": "commerce",
+    "comp": "computer",
+    "sci": "science",
+    "engg": "engineering",
+}
+
+# Degree and filler words that do not tell programs apart.
+IGNORED_WORDS = {
+    "b",
+    "ba",
+    "bachelor",
+    "bachelors",
+    "be",
+    "bsc",
+    "btech",
+    "core",
+    "course",
+    "degree",
+    "honors",
+    "honours",
+    "hons",
+    "in",
+    "of",
+    "tech",
+}
+
+# Words that name no program on their own: they are left out of fuzzy
+# matching, and a spelling made only of these ("Engineering", "Science") is
+# too vague to match and becomes OTHER.
+GENERIC_WORDS = {"and", "engineering", "science", "studies", "technology"}
+
+MIN_SIMILARITY = 0.5
+
+DEFAULT_CACHE_PATH = "majors.cache.json"
+
+_PUNCTUATION = re.compile(r"[^a-z0-9 ]+")
+_LONGEST_ABBREVIATION = max(len(key.split()) for key in ABBREVIATIONS)
+
+
+def normalize_major(raw):
+    """Lowercase, drop dots, turn other punctuation to spaces and collapse."""
+    text = raw.lower().replace("&", " and ").replace(".", "")
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def expand_major(text):
+    """
+    Expand the abbreviations of a normalized name and drop ignored words.
+    """
+    words = text.split()
+    expanded = []
+    i = 0
+    while i < len(words):
+        for width in range(min(_LONGEST_ABBREVIATION, len(words) - i), 0, -1):
+            phrase = " ".join(words[i : i + width])
+            if phrase in ABBREVIATIONS:
+                expanded.extend(ABBREVIATIONS[phrase].split())
+                i += width
+                break
+        else:
+            if words[i] not in IGNORED_WORDS:
+                expanded.append(words[i])
+            i += 1
+    return " ".join(expanded)
+
+
+def distinctive_words(text):
+    """Drop the GENERIC_WORDS of an expanded name."""
+    return " ".join(word for word in text.split() if word not in GENERIC_WORDS)
+
+
+def trigrams(text):
+    """Return the set of character trigrams of a string, padded at the ends."""
+    padded = "  " + text + " "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to a list of strings, for
+    best-match lookups by trigram Jaccard similarity.
+
+    Parameters:
+      strings (list): The strings to match against.
+    """
+
+    def __init__(self, strings):
+        self.strings = list(strings)
+        grams = [trigrams(text) for text in self.strings]
+        self.sizes = np.array([len(g) for g in grams], dtype=np.int64)
+        postings = {}
+        for i, gram_set in enumerate(grams):
+            for gram in gram_set:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids) for gram, ids in postings.items()}
+
+    def best(self, text):
+        """
+        Return the position and similarity of the closest string.
+
+        Returns:
+          (int, float): Index into `strings` and its Jaccard similarity
+          (-1 and 0.0 when no trigram is shared).
+        """
+        grams = trigrams(text)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return -1, 0.0
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.strings))
+        similarity = shared / (len(grams) + self.sizes - shared)
+        best = int(np.argmax(similarity))
+        return best, float(similarity[best])
+
+
+class MajorCanonicalizer:
+    """
+    Memoized raw major -> canonical major mapping.
+
+    Parameters:
+      cache_path (str): Optional JSON file of earlier results; it is read
+        now and written by save(). A cache made with other canonical names,
+        abbreviations or threshold is ignored.
+      min_similarity (float): Lowest trigram similarity of a fuzzy match.
+
+    Attributes:
+      mapping (dict): Raw spelling -> canonical name (or OTHER).
+      matched (int): Spellings matched by this instance (cache misses).
+    """
+
+    def __init__(self, cache_path=None, min_similarity=MIN_SIMILARITY):
+        self.cache_path = cache_path
+        self.min_similarity = min_similarity
+        self.mapping = {}
+        self.matched = 0
+        self._dirty = False
+        self._forms = {}
+        self._cores = {}
+        for name, aliases in CANONICAL_MAJORS.items():
+            for form in [name] + aliases:
+                text = expand_major(normalize_major(form))
+                self._forms[text] = name
+                self._cores[distinctive_words(text)] = name
+        self._index = TrigramIndex(self._cores)
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if saved.get("fingerprint") == self._fingerprint():
+                self.mapping = saved["mapping"]
+
+    def _fingerprint(self):
+        return [
+            CANONICAL_MAJORS,
+            ABBREVIATIONS,
+            sorted(IGNORED_WORDS),
+            sorted(GENERIC_WORDS),
+            self.min_similarity,
+        ]
+
+    def match(self, raw):
+        """Return the canonical name of one raw spelling, without the cache."""
+        text = expand_major(normalize_major(raw))
+        if text in self._forms:
+            return self._forms[text]
+        core = distinctive_words(text)
+        if not core:
+            return OTHER
+        best, similarity = self._index.best(core)
+        if best < 0 or similarity < self.min_similarity:
+            return OTHER
+        return self._cores[self._index.strings[best]]
+
+    def canonical(self, raw):
+        """Return the canonical name of one raw spelling (memoized)."""
+        if raw not in self.mapping:
+            self.mapping[raw] = self.match(raw)
+            self.matched += 1
+            self._dirty = True
+        return self.mapping[raw]
+
+    def canonicalize(self, series):
+        """
+        Map a raw major column to canonical names.
+
+        Parameters:
+          series (pd.Series): Raw answers (strings, NaN if missing).
+
+        Returns:
+          pd.Series: Categorical over MAJOR_LABELS, aligned with `series`,
+          NaN where the answer is missing.
+        """
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        table = np.array(
+            [MAJOR_LABELS.index(self.canonical(raw)) for raw in uniques] + [-1],
+            dtype=np.int64,
+        )
+        return pd.Series(
+            pd.Categorical.from_codes(table[codes], MAJOR_LABELS),
+            index=series.index,
+            name=series.name,
+        )
+
+    def save(self):
+        """Write the mapping to cache_path (atomically) if it has changed."""
+        if self.cache_path is None or not self._dirty:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"fingerprint": self._fingerprint(), "mapping": self.mapping},
+                fh,
+                ensure_ascii=False,
+                indent=1,
+            )
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+_SHARED = None
+
+
+def canonicalize_majors(series, canonicalizer=None):
+    """
+    Map a raw major column to canonical names (see
+    MajorCanonicalizer.canonicalize), with a process-wide in-memory cache
+    unless a canonicalizer is given.
+    """
+    global _SHARED
+    if canonicalizer is None:
+        if _SHARED is None:
+            _SHARED = MajorCanonicalizer()
+        canonicalizer = _SHARED
+    return canonicalizer.canonicalize(series)
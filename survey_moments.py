@@ -0,0 +1,388 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from survey_batch import combine_moments, expand_sources, map_merge
+from survey_loader import LIKERT_COLUMNS, QUESTION_LABELS, iter_survey
+from survey_tally import CODED_COLUMNS, LEVELS, encode_column, parse_study_hours
+
+# ============================================================
+# Mergeable One-Pass Moments and Quantile Sketches
+# ============================================================
+# Each question keeps a fixed-size summary of the answers seen so far:
+# count, min, max, mean and the sum of squared deviations (M2), plus a
+# t-digest style quantile sketch. A batch is summarized with whole-column
+# NumPy reductions and folded in with Chan et al.'s pairwise update
+#
+#   delta = mean_b - mean_a,  n = n_a + n_b
+#   mean  = mean_a + delta * n_b / n
+#   M2    = M2_a + M2_b + delta**2 * n_a * n_b / n
+#
+# which is exact for any split of the data, so summaries of batches,
+# files or worker processes merge into the same result as a single pass.
+#
+# The sketch holds at most about `compression` weighted centroids. Batches
+# are pre-aggregated with np.unique (survey answers repeat a lot), merged
+# in sorted order and grouped by the arcsine scale function of the
+# t-digest, which keeps centroids small near the tails; while there are
+# fewer distinct values than that, the sketch is exact.
+#
+# Normalized and z-scored indices are derived from these summaries alone:
+# a segment's mean on a question is scaled by the overall min/max or
+# mean/std, and a composite index averages those over questions.
+NUMERIC_COLUMNS = CODED_COLUMNS + ["study_hours"]
+
+DEFAULT_COMPRESSION = 200
+
+SUMMARY_QUANTILES = [0.25, 0.5, 0.75]
+
+
+class QuantileDigest:
+    """
+    Mergeable quantile sketch (a merging t-digest).
+
+    Attributes:
+      means (np.ndarray): Centroid means, ascending.
+      weights (np.ndarray): Centroid weights.
+      single (np.ndarray): Whether each centroid holds one distinct value.
+      compression (int): Scale-function range; bounds the centroid count.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.single = np.zeros(0, dtype=bool)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def add(self, values):
+        """Add an array of finite values."""
+        values, counts = np.unique(values, return_counts=True)
+        return self._merge(values, counts.astype(float), np.ones(len(values), bool))
+
+    def merge(self, other):
+        """Add the centroids of another digest."""
+        return self._merge(other.means, other.weights, other.single)
+
+    def _merge(self, means, weights, single):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        single = np.concatenate([self.single, single])
+        if len(means) == 0:
+            return self
+        order = np.argsort(means, kind="stable")
+        means, weights, single = means[order], weights[order], single[order]
+        # Equal values become one centroid.
+        starts = np.flatnonzero(np.r_[True, means[1:] != means[:-1]])
+        if len(starts) > self.compression:
+            # Group by the unit of the arcsine scale at each centroid's
+            # middle weight: narrow groups at the tails, wide in the middle.
+            cumulative = np.cumsum(weights)
+            middle = (cumulative - weights / 2) / cumulative[-1]
+            scale = self.compression * (np.arcsin(2 * middle - 1) / np.pi + 0.5)
+            group = np.floor(scale)
+            starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        total = np.add.reduceat(weights, starts)
+        self.single = np.logical_and.reduceat(single, starts) & (
+            np.minimum.reduceat(means, starts) == np.maximum.reduceat(means, starts)
+        )
+        self.means = np.add.reduceat(means * weights, starts) / total
+        self.weights = total
+        return self
+
+    def quantile(self, q, minimum=None, maximum=None):
+        """
+        Estimate quantile(s) q in [0, 1].
+
+        A centroid of one distinct value stands for w equal values, so
+        quantiles that fall inside it return that value (exact for discrete
+        answers); other centroids are points at their middle weight, and
+        between those the estimate is interpolated. `minimum` and
+        `maximum` (the exact extremes) anchor the ends.
+        """
+        if len(self.means) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        ends = np.cumsum(self.weights)
+        starts = ends - self.weights
+        low = self.means[0] if minimum is None else minimum
+        high = self.means[-1] if maximum is None else maximum
+        # A single-value centroid is flat from half a value after its start
+        # to half a value before its end; a mixed one is pinned at its middle.
+        middle = (starts + ends) / 2
+        first = np.where(self.single, starts + 0.5, middle)
+        last = np.where(self.single, ends - 0.5, middle)
+        xp = np.concatenate([[0], np.column_stack([first, last]).ravel()])
+        fp = np.concatenate([[low], np.repeat(self.means, 2)])
+        xp = np.append(xp, ends[-1])
+        fp = np.append(fp, high)
+        # Match the (n - 1) * q positions of np.quantile's linear method.
+        position = 0.5 + (ends[-1] - 1) * np.asarray(q, dtype=float)
+        return np.interp(position, xp, fp)
+
+
+class QuestionMoments:
+    """
+    Per-question count, min, max, mean, variance and quantile sketch.
+
+    Parameters:
+      questions (list): Names of the value columns.
+      compression (int): QuantileDigest compression.
+
+    Attributes:
+      count, minimum, maximum, mean, m2 (np.ndarray): One entry per
+        question; m2 is the sum of squared deviations from the mean.
+      digests (list): One QuantileDigest per question.
+    """
+
+    def __init__(self, questions=None, compression=DEFAULT_COMPRESSION):
+        self.questions = list(questions or NUMERIC_COLUMNS)
+        k = len(self.questions)
+        self.count = np.zeros(k, dtype=np.int64)
+        self.minimum = np.full(k, np.inf)
+        self.maximum = np.full(k, -np.inf)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.digests = [QuantileDigest(compression) for _ in range(k)]
+
+    def _combine(self, count, minimum, maximum, mean, m2):
+        """Chan et al.'s pairwise update with another set of moments."""
+        self.count, self.mean, self.m2 = combine_moments(
+            self.count, self.mean, self.m2, count, mean, m2
+        )
+        self.minimum = np.fmin(self.minimum, minimum)
+        self.maximum = np.fmax(self.maximum, maximum)
+
+    def update(self, values):
+        """
+        Fold a (n_rows, n_questions) float array into the moments; NaN
+        marks a missing answer.
+        """
+        values = np.asarray(values, dtype=float)
+        present = ~np.isnan(values)
+        count = present.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(values, axis=0) / count
+            m2 = np.nansum((values - mean) ** 2, axis=0)
+        # Rows without an answer leave min/max at their identities (+-inf).
+        minimum = np.where(present, values, np.inf).min(axis=0)
+        maximum = np.where(present, values, -np.inf).max(axis=0)
+        has = count > 0
+        self._combine(count, minimum, maximum, np.where(has, mean, 0.0), m2)
+        for j, digest in enumerate(self.digests):
+            if count[j]:
+                digest.add(values[present[:, j], j])
+        return self
+
+    def merge(self, other):
+        """Add the moments of another QuestionMoments (same questions)."""
+        self._combine(other.count, other.minimum, other.maximum, other.mean, other.m2)
+        for digest, other_digest in zip(self.digests, other.digests):
+            digest.merge(other_digest)
+        return self
+
+    def variance(self, ddof=0):
+        """Variance per question (population for ddof=0, like np.var)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+
+    def std(self, ddof=0):
+        return np.sqrt(self.variance(ddof))
+
+    def quantile(self, q):
+        """Return the (n_questions, len(q)) sketched quantiles."""
+        return np.array(
+            [
+                digest.quantile(q, low, high)
+                for digest, low, high in zip(self.digests, self.minimum, self.maximum)
+            ]
+        )
+
+    def normalized_mean(self, reference=None):
+        """
+        Mean per question min-max scaled to [0, 1] by the reference's
+        (default: own) observed range.
+        """
+        reference = reference or self
+        span = reference.maximum - reference.minimum
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(span > 0, (self.mean - reference.minimum) / span, np.nan)
+
+    def z_mean(self, reference=None):
+        """Mean per question in standard deviations from the reference mean."""
+        reference = reference or self
+        std = reference.std()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(std > 0, (self.mean - reference.mean) / std, np.nan)
+
+    def summary(self):
+        """
+        Return the moments as a DataFrame indexed by question label.
+
+        Columns: n, min, max, mean, std, variance, p25, median, p75 and
+        normalized_mean.
+        """
+        has = self.count > 0
+        quantiles = self.quantile(SUMMARY_QUANTILES)
+        data = {
+            "n": self.count,
+            "min": np.where(has, self.minimum, np.nan),
+            "max": np.where(has, self.maximum, np.nan),
+            "mean": np.where(has, self.mean, np.nan),
+            "std": self.std(),
+            "variance": self.variance(),
+            "p25": quantiles[:, 0],
+            "median": quantiles[:, 1],
+            "p75": quantiles[:, 2],
+            "normalized_mean": self.normalized_mean(),
+        }
+        labels = [QUESTION_LABELS.get(name, name) for name in self.questions]
+        return pd.DataFrame(data, index=pd.Index(labels, name="Question"))
+
+
+def chunk_values(chunk, questions=None):
+    """
+    Return the numeric answers of a typed batch as a float array.
+
+    Coded questions use their level codes (1..k, NaN if missing); study
+    hours are whole hours as counted by SurveyTally (NaN if rejected), so
+    both give the same mean.
+    """
+    questions = questions or NUMERIC_COLUMNS
+    values = np.full((len(chunk), len(questions)), np.nan)
+    for i, name in enumerate(questions):
+        if name in LEVELS:
+            codes = encode_column(chunk[name], name)
+            values[:, i] = np.where(codes > 0, codes, np.nan)
+    if "study_hours" in questions:
+        hours, _ = parse_study_hours(chunk["study_hours"])
+        values[:, questions.index("study_hours")] = np.where(hours >= 0, hours, np.nan)
+    return values
+
+
+class SurveyMoments:
+    """
+    QuestionMoments of all respondents and, optionally, of each level of a
+    segment question.
+
+    Attributes:
+      overall (QuestionMoments): Moments of every respondent.
+      segment (str): Segment question, or None.
+      segments (dict): Segment label -> QuestionMoments.
+    """
+
+    def __init__(self, segment=None, questions=None, compression=DEFAULT_COMPRESSION):
+        self.questions = list(questions or NUMERIC_COLUMNS)
+        self.compression = compression
+        self.overall = QuestionMoments(self.questions, compression)
+        self.segment = segment
+        self.segments = {}
+        if segment is not None:
+            for label in LEVELS[segment]:
+                self.segments[label] = QuestionMoments(self.questions, compression)
+
+    def update(self, chunk):
+        """Fold one typed batch (from survey_loader.iter_survey) in."""
+        values = chunk_values(chunk, self.questions)
+        self.overall.update(values)
+        if self.segment is not None:
+            codes = encode_column(chunk[self.segment], self.segment)
+            for code, label in enumerate(LEVELS[self.segment], 1):
+                rows = codes == code
+                if rows.any():
+                    self.segments[label].update(values[rows])
+        return self
+
+    def merge(self, other):
+        """Add the moments of another SurveyMoments."""
+        self.overall.merge(other.overall)
+        for label, moments in other.segments.items():
+            self.segments[label].merge(moments)
+        return self
+
+    def composite(self, questions=None):
+        """
+        Return normalized and z-scored indices of each segment.
+
+        Each segment's mean on a question is min-max scaled and z-scored
+        against all respondents; the composite columns average them over
+        `questions` (default: the Likert questions).
+
+        Returns:
+          pd.DataFrame: One row per segment (and "All"), one "<question> z"
+          column per question plus composite_normalized and composite_z.
+        """
+        questions = questions or [n for n in LIKERT_COLUMNS if n in self.questions]
+        columns = [self.questions.index(name) for name in questions]
+        groups = dict(self.segments)
+        groups["All"] = self.overall
+        records = {}
+        for label, moments in groups.items():
+            normalized = moments.normalized_mean(self.overall)[columns]
+            z = moments.z_mean(self.overall)[columns]
+            row = {
+                QUESTION_LABELS[name] + " z": value for name, value in zip(questions, z)
+            }
+            row["composite_normalized"] = (
+                np.nanmean(normalized) if moments.count.any() else np.nan
+            )
+            row["composite_z"] = np.nanmean(z) if moments.count.any() else np.nan
+            row["n"] = int(moments.count.max())
+            records[label] = row
+        return pd.DataFrame.from_dict(records, orient="index").rename_axis(
+            self.segment or "segment"
+        )
+
+
+def _moments_chunk(chunk, segment, questions, compression):
+    return SurveyMoments(segment, questions, compression).update(chunk)
+
+
+def moments_survey(
+    sources="data.csv",
+    segment=None,
+    questions=None,
+    workers=None,
+    chunksize=None,
+    compression=DEFAULT_COMPRESSION,
+):
+    """
+    Compute mergeable per-question moments of one or more files in one pass.
+
+    Batches are read in this process and summarized in a process pool, with
+    a bounded number of batches in flight; partial moments are merged as
+    they complete.
+
+    Parameters:
+      sources (str or list): Files, directories or glob patterns.
+      segment (str): Optional coded question to split by, e.g. "year".
+      questions (list): Value columns (default: NUMERIC_COLUMNS).
+      workers (int): Worker processes (default: os.cpu_count()); 1 runs in
+        the calling process.
+      chunksize (int): Optional rows per batch.
+      compression (int): Quantile sketch compression.
+
+    Returns:
+      SurveyMoments: Merged moments.
+    """
+    questions = list(questions or NUMERIC_COLUMNS)
+    columns = sorted(set(questions + ([segment] if segment else [])))
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    chunks = (
+        chunk
+        for path in expand_sources(sources)
+        for chunk in iter_survey(path, columns=columns, **kwargs)
+    )
+    total = SurveyMoments(segment, questions, compression)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            total.update(chunk)
+        return total
+
+    args = (segment, questions, compression)
+    map_merge(chunks, _moments_chunk, total.merge, workers, args)
+    return total
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from survey_trace import stage
+
+# ============================================================
+# Headless, Parallel, Cached Figure Rendering
+# ============================================================
+# A figure is described by a plain-data "spec" (kind, name, plotted data
+# and options). Specs are rendered to PNG/SVG with the non-interactive Agg
+# backend in a process pool, and a figure is skipped when the hash of its
+# spec matches the one recorded the last time it was written. matplotlib
+# and seaborn are only imported inside the rendering functions.
+MANIFEST = "figures.json"
+
+# Bump when the drawing code changes, to force every figure to re-render.
+RENDER_VERSION = 1
+
+
+def spec_hash(spec, fmt):
+    """Return the cache key of a figure spec rendered to `fmt`."""
+    payload = json.dumps(
+        {"spec": spec, "format": fmt, "version": RENDER_VERSION},
+        sort_keys=True,
+        default=float,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# --------------------------------------------------------
+# Spec builders
+# --------------------------------------------------------
+def overview_specs(df):
+    """
+    Return the four overview figures of Activity_1_Pandas.py for a
+    [Question, Response, Count] DataFrame: the histogram of Count, the
+    boxplot of Response, the Response vs Count scatterplot and the
+    correlation heatmap.
+    """
+    columns = {
+        "Question": df["Question"].astype(str).tolist(),
+        "Response": df["Response"].astype(float).tolist(),
+        "Count": df["Count"].astype(float).tolist(),
+    }
+    corr = df[["Response", "Count"]].corr()
+    return [
+        {
+            "kind": "hist",
+            "name": "count_histogram",
+            "title": "Histogram of 'Count'",
+            "data": {"values": columns["Count"]},
+            "options": {"bins": 10, "xlabel": "Count", "ylabel": "Frequency"},
+        },
+        {
+            "kind": "box",
+            "name": "response_boxplot",
+            "title": "Boxplot of 'Response'",
+            "data": {"values": columns["Response"]},
+            "options": {},
+        },
+        {
+            "kind": "scatter",
+            "name": "response_vs_count",
+            "title": "Scatterplot of Response vs Count",
+            "data": columns,
+            "options": {"x": "Response", "y": "Count", "hue": "Question"},
+        },
+        {
+            "kind": "heatmap",
+            "name": "correlation_matrix",
+            "title": "Correlation Matrix",
+            "data": {
+                "matrix": corr.to_numpy().tolist(),
+                "labels": [str(label) for label in corr.columns],
+            },
+            "options": {},
+        },
+    ]
+
+
+def question_specs(tensor):
+    """
+    Return one bar chart spec per question (and per segment) of a
+    survey_tensor.CountTensor.
+    """
+    from survey_loader import QUESTION_LABELS
+
+    counts = tensor.counts
+    segments = [None]
+    if counts.ndim == 3:
+        segments = tensor.segment_labels or list(range(counts.shape[0]))
+    specs = []
+    for s, segment in enumerate(segments):
+        block = counts if segment is None else counts[s]
+        for q, name in enumerate(tensor.questions):
+            levels = [str(label) for label in tensor.level_labels[q]]
+            title = QUESTION_LABELS[name]
+            file_name = "question_%s" % name
+            if segment is not None:
+                title = "%s (%s)" % (title, segment)
+                file_name += "__%s" % _slug(segment)
+            specs.append(
+                {
+                    "kind": "bar",
+                    "name": file_name,
+                    "title": title,
+                    "data": {
+                        "labels": levels,
+                        "counts": block[q, : len(levels)].tolist(),
+                    },
+                    "options": {"ylabel": "Count"},
+                }
+            )
+    return specs
+
+
+def _slug(value):
+    """
+    Return a file-name-safe form of a segment label.
+
+    Labels that differ only in punctuation or case map to the same text
+    ("A/B" and "a b" both give "a_b"), so a short hash of the label itself
+    is appended to keep every segment's file name distinct.
+    """
+    text = "".join(ch if ch.isalnum() else "_" for ch in str(value).lower())
+    digest = hashlib.sha1(str(value).encode("utf-8")).hexdigest()[:8]
+    return "%s_%s" % (text.strip("_") or "segment", digest)
+
+
+# --------------------------------------------------------
+# Drawing (runs in the worker processes)
+# --------------------------------------------------------
+def _draw(spec, path):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    kind, data, options = spec["kind"], spec["data"], spec["options"]
+    if kind == "hist":
+        fig = plt.figure(figsize=(10, 6))
+        plt.hist(
+            data["values"], bins=options["bins"], color="skyblue", edgecolor="black"
+        )
+        plt.xlabel(options["xlabel"])
+        plt.ylabel(options["ylabel"])
+    elif kind == "box":
+        import seaborn as sns
+
+        fig = plt.figure(figsize=(8, 6))
+        sns.boxplot(x=data["values"])
+    elif kind == "scatter":
+        import pandas as pd
+        import seaborn as sns
+
+        fig = plt.figure(figsize=(10, 6))
+        sns.scatterplot(
+            data=pd.DataFrame(data),
+            x=options["x"],
+            y=options["y"],
+            hue=options["hue"],
+        )
+    elif kind == "heatmap":
+        import pandas as pd
+        import seaborn as sns
+
+        fig = plt.figure(figsize=(6, 4))
+        matrix = pd.DataFrame(
+            data["matrix"], index=data["labels"], columns=data["labels"]
+        )
+        sns.heatmap(matrix, annot=True, cmap="coolwarm")
+    elif kind == "bar":
+        fig = plt.figure(figsize=(8, 5))
+        plt.bar(data["labels"], data["counts"], color="skyblue", edgecolor="black")
+        plt.ylabel(options["ylabel"])
+        plt.xticks(rotation=20, ha="right")
+        plt.tight_layout()
+    else:
+        raise ValueError("Unknown figure kind: %s" % kind)
+    plt.title(spec["title"])
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+def _draw_job(job):
+    spec, path = job
+    return _draw(spec, path)
+
+
+def render_report(specs, out_dir="figures", fmt="png", workers=None, force=False):
+    """
+    Render figure specs to files, re-rendering only what changed.
+
+    Parameters:
+      specs (list): Figure specs (see overview_specs/question_specs).
+      out_dir (str): Output directory; figures.json there records the hash
+        each figure was last rendered from.
+      fmt (str): "png" or "svg".
+      workers (int): Worker processes (default: os.cpu_count()); 1 renders
+        in the calling process.
+      force (bool): Re-render every figure.
+
+    Returns:
+      dict: {"rendered": [paths], "skipped": [paths]}.
+
+    Raises:
+      ValueError: If two specs share a name (they would overwrite each other).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = {}
+
+    jobs, skipped, hashes = [], [], {}
+    for spec in specs:
+        path = os.path.join(out_dir, "%s.%s" % (spec["name"], fmt))
+        if path in hashes:
+            raise ValueError("Duplicate figure name: %s" % spec["name"])
+        key = spec_hash(spec, fmt)
+        hashes[path] = key
+        unchanged = manifest.get(os.path.basename(path)) == key
+        if unchanged and not force and os.path.exists(path):
+            skipped.append(path)
+        else:
+            jobs.append((spec, path))
+
+    workers = workers or os.cpu_count() or 1
+    with stage("render", rows_in=len(jobs), skipped=len(skipped)) as st:
+        if workers == 1 or len(jobs) <= 1:
+            rendered = [_draw_job(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                chunk = max(1, len(jobs) // (workers * 4))
+                rendered = list(pool.map(_draw_job, jobs, chunksize=chunk))
+        st.rows_out = len(rendered)
+
+    for path in rendered:
+        manifest[os.path.basename(path)] = hashes[path]
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return {"rendered": rendered, "skipped": skipped}
@@ -0,0 +1,214 @@
+import html
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Streaming Report Output
+# ============================================================
+# Scripts hand each result to ReportWriter.section() instead of printing
+# it. A section is streamed to up to three files as soon as it is added:
+#   report.jsonl  one JSON object per row, tagged with the section name
+#   <section>.csv the full table
+#   report.html   a self-contained page with a bounded preview per section
+# and the console only shows the first few rows. Tables are written in
+# row blocks with pandas' C writers, never formatted as one big string, so
+# the cost is proportional to the rows written. Files contain no run
+# timestamps, so two runs can be compared with a plain diff. A table
+# column that clashes with the "section" tag of report.jsonl is written
+# there with underscores appended ("section_").
+OUTPUT_ENV = "SURVEY_OUTPUT_DIR"
+
+DEFAULT_PREVIEW_ROWS = 10
+DEFAULT_HTML_ROWS = 50
+
+_BLOCK_ROWS = 100_000
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%s</title>
+<style>
+body{font-family:sans-serif;margin:2em;color:#222}
+table{border-collapse:collapse;margin:.5em 0 1.5em}
+th,td{border:1px solid #ccc;padding:2px 8px;text-align:right}
+th{background:#eee}
+.note{color:#777;font-size:90%%}
+</style></head><body>
+<h1>%s</h1>
+"""
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    return str(value)
+
+
+def _slug(name):
+    text = "".join(ch if ch.isalnum() else "_" for ch in str(name).lower())
+    return "_".join(part for part in text.split("_") if part) or "section"
+
+
+def as_table(value):
+    """
+    Return a DataFrame for tabular values (frames, series, arrays), or None
+    for scalars and mappings. A non-default index becomes leading columns.
+    The caller's object is never modified.
+    """
+    if isinstance(value, pd.Series):
+        value = value.to_frame(name=value.name if value.name is not None else "value")
+    elif isinstance(value, np.ndarray) and value.ndim:
+        width = int(np.prod(value.shape[1:]))
+        value = pd.DataFrame(value.reshape(len(value), width))
+    if not isinstance(value, pd.DataFrame):
+        return None
+    if not isinstance(value.index, pd.RangeIndex) or value.index.name is not None:
+        value = value.reset_index()
+    return value.rename(columns=str)
+
+
+class ReportWriter:
+    """
+    Writes report sections to JSON Lines, CSV and HTML, with console previews.
+
+    Parameters:
+      out_dir (str): Output directory, or None for console previews only.
+      title (str): Report title (HTML page heading).
+      preview_rows (int): Rows shown per section on the console.
+      html_rows (int): Rows shown per section in the HTML summary.
+      console (bool): Print previews to stdout.
+    """
+
+    def __init__(
+        self,
+        out_dir=None,
+        title="Survey report",
+        preview_rows=DEFAULT_PREVIEW_ROWS,
+        html_rows=DEFAULT_HTML_ROWS,
+        console=True,
+    ):
+        self.out_dir = out_dir
+        self.preview_rows = preview_rows
+        self.html_rows = html_rows
+        self.console = console
+        self.sections = []
+        self._jsonl = self._html = None
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+            self._jsonl = open(os.path.join(out_dir, "report.jsonl"), "w")
+            self._html = open(
+                os.path.join(out_dir, "report.html"), "w", encoding="utf-8"
+            )
+            escaped = html.escape(title)
+            self._html.write(_HTML_HEAD % (escaped, escaped))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def section(self, name, value, title=None):
+        """
+        Add one result to the report.
+
+        Parameters:
+          name (str): Section name; also the CSV file name (slugified).
+          value: DataFrame, Series, ndarray, mapping or scalar.
+          title (str): Heading shown on the console and in HTML.
+        """
+        key = _slug(name)
+        if key in self.sections:
+            raise ValueError("Duplicate report section: %s" % name)
+        self.sections.append(key)
+        title = title or str(name)
+        table = as_table(value)
+        if table is None:
+            self._write_value(key, title, value)
+        else:
+            self._write_table(key, title, table)
+
+    def _write_value(self, key, title, value):
+        if self.console:
+            print("\n%s:" % title)
+            print(value)
+        if self._jsonl:
+            record = {"section": key, "value": value}
+            text = json.dumps(record, default=_json_default, separators=(",", ":"))
+            self._jsonl.write(text + "\n")
+        if self._html:
+            text = json.dumps(value, default=_json_default, indent=1)
+            self._html.write(
+                "<h2>%s</h2>\n<pre>%s</pre>\n" % (html.escape(title), html.escape(text))
+            )
+            self._html.flush()
+
+    def _write_table(self, key, title, table):
+        n_rows = len(table)
+        if self.console:
+            print("\n%s:" % title)
+            print(table.head(self.preview_rows).to_string(index=False))
+            if n_rows > self.preview_rows:
+                print(
+                    "... %d more rows (%d rows x %d columns)"
+                    % (n_rows - self.preview_rows, n_rows, table.shape[1])
+                )
+        if not self.out_dir:
+            return
+        csv_name = key + ".csv"
+        with open(os.path.join(self.out_dir, csv_name), "w", newline="") as fh:
+            table.to_csv(fh, index=False, chunksize=_BLOCK_ROWS)
+        renamed = {}
+        for column in table.columns:
+            if column.rstrip("_") == "section":
+                renamed[column] = column + "_"
+        for start in range(0, n_rows, _BLOCK_ROWS):
+            block = table.iloc[start : start + _BLOCK_ROWS].rename(columns=renamed)
+            block.insert(0, "section", key)
+            text = block.to_json(orient="records", lines=True, date_format="iso")
+            self._jsonl.write(text if text.endswith("\n") else text + "\n")
+        self._write_html_table(title, table, csv_name)
+
+    def _write_html_table(self, title, table, csv_name):
+        shown = table.head(self.html_rows)
+        out = ["<h2>%s</h2>\n<table>\n<tr>" % html.escape(title)]
+        out.extend("<th>%s</th>" % html.escape(column) for column in shown.columns)
+        out.append("</tr>\n")
+        for row in shown.itertuples(index=False, name=None):
+            out.append("<tr>")
+            out.extend("<td>%s</td>" % html.escape(str(cell)) for cell in row)
+            out.append("</tr>\n")
+        out.append("</table>\n")
+        if len(table) > len(shown):
+            out.append(
+                '<p class="note">First %d of %d rows; full table in %s.</p>\n'
+                % (len(shown), len(table), html.escape(csv_name))
+            )
+        self._html.write("".join(out))
+        self._html.flush()
+
+    def close(self):
+        """Finish the HTML page and close the files."""
+        if self._html:
+            self._html.write("</body></html>\n")
+            self._html.close()
+            self._html = None
+        if self._jsonl:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+def open_report(title="Survey report", out_dir=None, **kwargs):
+    """
+    Return a ReportWriter writing to `out_dir` or $SURVEY_OUTPUT_DIR; with
+    neither set, only the console previews are shown.
+    """
+    return ReportWriter(out_dir or os.environ.get(OUTPUT_ENV), title, **kwargs)
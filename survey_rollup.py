@@ -0,0 +1,266 @@
+import numpy as np
+import pandas as pd
+
+from survey_batch import expand_sources
+from survey_loader import QUESTION_LABELS, iter_survey
+from survey_tally import CODED_COLUMNS, encode_chunk
+from survey_tensor import MAX_LEVELS, CountTensor
+from survey_trace import stage
+
+# ============================================================
+# Time-Windowed Rollups Keyed on the Timestamp
+# ============================================================
+# Responses are counted per time bucket at three resolutions (hour, day,
+# week) as the raw rows are read, so trend queries only ever touch the
+# bucket aggregates: a year of data is 8,760 hourly, 365 daily or 53
+# weekly (question x level) count slices, whatever the number of rows.
+#
+# Each resolution is stored sparsely - the sorted ids of the occupied
+# buckets and a (n_buckets, n_questions, MAX_LEVELS) count array - so a
+# stray timestamp years away does not allocate the years in between.
+# Queries lay out a dense range of buckets, and rolling windows are
+# differences of a running (cumulative) sum along time, so each window is
+# one subtraction whatever its width. Bucket ids count whole periods since
+# 1970-01-01 (UTC-naive, like the export); weeks start on Monday.
+FREQUENCIES = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+# 1970-01-01 was a Thursday: shift by three days so weeks start on Monday.
+_OFFSETS = {"hour": 0, "day": 0, "week": 3 * 86400}
+
+STATISTICS = ["n", "mean", "top2box"]
+
+
+def bucket_ids(seconds, freq):
+    """Return the bucket id of each timestamp (seconds since 1970-01-01)."""
+    return (seconds + _OFFSETS[freq]) // FREQUENCIES[freq]
+
+
+def bucket_starts(ids, freq):
+    """Return the start time of each bucket id as a DatetimeIndex."""
+    seconds = np.asarray(ids, dtype=np.int64) * FREQUENCIES[freq] - _OFFSETS[freq]
+    return pd.DatetimeIndex(seconds.astype("datetime64[s]"), name=freq)
+
+
+def _check_freq(freq):
+    if freq not in FREQUENCIES:
+        raise ValueError(
+            "Unknown frequency %r (expected one of %s)" % (freq, ", ".join(FREQUENCIES))
+        )
+
+
+class TimeRollup:
+    """
+    Per-question response counts by hour, day and week.
+
+    Attributes:
+      ids (dict): Frequency -> sorted int64 ids of the occupied buckets.
+      counts (dict): Frequency -> (n_buckets, n_questions, MAX_LEVELS)
+        int64 counts of those buckets.
+      unstamped (np.ndarray): (n_questions, MAX_LEVELS) counts of rows
+        without a valid Timestamp.
+      questions (list): Short question names (CODED_COLUMNS).
+      n_rows (int): Rows folded in.
+    """
+
+    def __init__(self):
+        self.questions = list(CODED_COLUMNS)
+        shape = (0, len(self.questions), MAX_LEVELS)
+        self.ids = {freq: np.zeros(0, dtype=np.int64) for freq in FREQUENCIES}
+        self.counts = {freq: np.zeros(shape, dtype=np.int64) for freq in FREQUENCIES}
+        self.unstamped = np.zeros(shape[1:], dtype=np.int64)
+        self.n_rows = 0
+
+    def _add(self, freq, ids, counts):
+        """Add the counts of sorted, distinct bucket ids."""
+        merged = np.union1d(self.ids[freq], ids)
+        total = np.zeros((len(merged),) + counts.shape[1:], dtype=np.int64)
+        total[np.searchsorted(merged, self.ids[freq])] += self.counts[freq]
+        total[np.searchsorted(merged, ids)] += counts
+        self.ids[freq], self.counts[freq] = merged, total
+
+    def update(self, chunk):
+        """Fold one typed batch (with the timestamp column) into the rollup."""
+        codes = encode_chunk(chunk)
+        stamps = chunk["timestamp"]
+        valid = stamps.notna().to_numpy()
+        seconds = stamps.to_numpy("datetime64[s]").astype(np.int64)
+        hours = bucket_ids(seconds[valid], "hour")
+
+        # Count the batch by hour, then roll the hours up to days and weeks.
+        ids, inverse = np.unique(hours, return_inverse=True)
+        part = CountTensor.from_codes(codes[valid], inverse.ravel(), len(ids)).counts
+        self._add("hour", ids, part)
+        for freq in ("day", "week"):
+            coarse = bucket_ids(ids * FREQUENCIES["hour"], freq)
+            coarse_ids, starts = np.unique(coarse, return_index=True)
+            if len(ids):
+                self._add(freq, coarse_ids, np.add.reduceat(part, starts, axis=0))
+        self.unstamped += CountTensor.from_codes(codes[~valid]).counts
+        self.n_rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another TimeRollup."""
+        for freq in FREQUENCIES:
+            self._add(freq, other.ids[freq], other.counts[freq])
+        self.unstamped += other.unstamped
+        self.n_rows += other.n_rows
+        return self
+
+    def span(self, freq="day"):
+        """Return the first and last occupied bucket start, or (None, None)."""
+        _check_freq(freq)
+        ids = self.ids[freq]
+        if len(ids) == 0:
+            return None, None
+        starts = bucket_starts(ids[[0, -1]], freq)
+        return starts[0], starts[1]
+
+    def _dense(self, freq, start, end):
+        """Dense bucket ids and counts from start to end (inclusive)."""
+        _check_freq(freq)
+        ids, counts = self.ids[freq], self.counts[freq]
+        if start is not None:
+            first = bucket_ids(pd.Timestamp(start).value // 10**9, freq)
+        else:
+            first = ids[0] if len(ids) else 0
+        if end is not None:
+            last = bucket_ids(pd.Timestamp(end).value // 10**9, freq)
+        else:
+            last = ids[-1] if len(ids) else -1
+        dense_ids = np.arange(first, last + 1, dtype=np.int64)
+        dense = np.zeros((len(dense_ids),) + counts.shape[1:], dtype=np.int64)
+        lo, hi = np.searchsorted(ids, [first, last + 1])
+        dense[ids[lo:hi] - first] = counts[lo:hi]
+        return dense_ids, dense
+
+    def _tensor(self, freq, ids, counts, questions):
+        if questions is not None:
+            counts = counts[:, [self.questions.index(name) for name in questions]]
+        return CountTensor(
+            counts,
+            questions or self.questions,
+            segment=freq,
+            segment_labels=list(bucket_starts(ids, freq)),
+        )
+
+    def tensor(self, freq="day", start=None, end=None, questions=None):
+        """
+        Return the counts of every bucket in a time range.
+
+        Parameters:
+          freq (str): "hour", "day" or "week".
+          start, end: Optional first and last time (inclusive) of the range;
+            default: the first and last occupied bucket.
+          questions (list): Optional subset of CODED_COLUMNS.
+
+        Returns:
+          CountTensor: Segmented by bucket, empty buckets included.
+        """
+        ids, counts = self._dense(freq, start, end)
+        return self._tensor(freq, ids, counts, questions)
+
+    def rolling(self, freq="day", window=7, start=None, end=None, questions=None):
+        """
+        Return trailing-window counts: segment i holds buckets i - window + 1
+        through i.
+
+        Windows are differences of a running sum over the buckets, so the
+        cost does not depend on the window width. Windows at the start of
+        the range also include the buckets before it.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1: %d" % window)
+        ids, counts = self._dense(freq, start, end)
+        if len(ids):
+            # Extend the range back so the first windows are complete.
+            _, before = self._dense(
+                freq, *bucket_starts([ids[0] - window, ids[0] - 1], freq)
+            )
+            running = np.cumsum(np.concatenate([before, counts]), axis=0)
+            counts = running[window:] - running[:-window]
+        return self._tensor(freq, ids, counts, questions)
+
+    def trend(
+        self, freq="day", window=1, stat="mean", start=None, end=None, questions=None
+    ):
+        """
+        Return one statistic per bucket (rolling over `window` buckets).
+
+        Parameters:
+          stat (str): "n" (respondents), "mean" (mean level) or "top2box"
+            (share of the two highest levels).
+
+        Returns:
+          pd.DataFrame: One row per bucket start, one column per question
+          label. Empty windows have NaN means and shares.
+        """
+        if stat not in STATISTICS:
+            raise ValueError(
+                "Unknown statistic %r (expected one of %s)"
+                % (stat, ", ".join(STATISTICS))
+            )
+        tensor = self.rolling(freq, window, start, end, questions)
+        values = tensor.totals() if stat == "n" else getattr(tensor, stat)()
+        return pd.DataFrame(
+            values,
+            index=pd.DatetimeIndex(tensor.segment_labels, name=freq),
+            columns=[QUESTION_LABELS[name] for name in tensor.questions],
+        )
+
+    def share_trend(self, question, freq="day", window=1, start=None, end=None):
+        """
+        Return the share of each level of one question per bucket.
+
+        Returns:
+          pd.DataFrame: One row per bucket start, one column per level.
+        """
+        tensor = self.rolling(freq, window, start, end, [question])
+        shares = tensor.shares()[:, 0, : len(tensor.level_labels[0])]
+        return pd.DataFrame(
+            shares,
+            index=pd.DatetimeIndex(tensor.segment_labels, name=freq),
+            columns=[str(level) for level in tensor.level_labels[0]],
+        )
+
+    def save(self, path):
+        """Write the rollup to a .npz file."""
+        arrays = {"unstamped": self.unstamped, "n_rows": np.int64(self.n_rows)}
+        for freq in FREQUENCIES:
+            arrays[freq + "_ids"] = self.ids[freq]
+            arrays[freq + "_counts"] = self.counts[freq]
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a rollup written by save()."""
+        rollup = cls()
+        with np.load(path) as data:
+            for freq in FREQUENCIES:
+                rollup.ids[freq] = data[freq + "_ids"]
+                rollup.counts[freq] = data[freq + "_counts"]
+            rollup.unstamped = data["unstamped"]
+            rollup.n_rows = int(data["n_rows"])
+        return rollup
+
+
+def rollup_survey(sources="data.csv", chunksize=None):
+    """
+    Count one or more survey files by hour, day and week in one scan.
+
+    Parameters:
+      sources (str or list): Files, directories or glob patterns.
+      chunksize (int): Optional rows per batch.
+
+    Returns:
+      TimeRollup: Bucketed counts of every coded question.
+    """
+    rollup = TimeRollup()
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    columns = CODED_COLUMNS + ["timestamp"]
+    with stage("rollup") as st:
+        for path in expand_sources(sources):
+            for chunk in iter_survey(path, columns=columns, **kwargs):
+                rollup.update(chunk)
+        st.rows_out = rollup.n_rows
+    return rollup
@@ -0,0 +1,367 @@
+import collections
+import re
+
+import numpy as np
+
+from survey_batch import expand_sources
+from survey_challenges import OPTIONS, encode_challenges
+from survey_loader import iter_survey
+from survey_tally import CODED_COLUMNS, LEVELS, encode_chunk
+from survey_trace import stage
+
+# ============================================================
+# Bitmap Segment Index over Respondents
+# ============================================================
+# For every (question, level) the index keeps one bitmap with bit r set
+# when respondent r gave that answer, packed 64 respondents per uint64
+# word (bit r % 64 of word r // 64). A segment filter such as
+#
+#   where(year="3rd year", attend_lectures="Always", overall_quality=">=4")
+#
+# is then a few bitwise ORs (levels of one question) and ANDs (different
+# questions) over n / 64 words, and its size is a popcount - no rescan of
+# the rows and no expression string to parse. The multi-select "biggest
+# challenge" question has one bitmap per option.
+#
+# Filters are kept in a canonical form (an OR of ANDs of per-question level
+# sets), so the same segment written in any order has the same key; the
+# masks of recently used filters, conjunctions and level unions are kept in
+# an LRU cache. Bitmaps cost about one bit per respondent per level (~11
+# bytes per respondent), and are built batch by batch while reading.
+CHALLENGES = "biggest_challenges"
+QUESTIONS = CODED_COLUMNS + [CHALLENGES]
+
+DEFAULT_CACHE_ENTRIES = 512
+
+_WORD_BITS = 64
+_COMPARISON = re.compile(r"^\s*(<=|>=|==|!=|<|>)\s*(.+?)\s*$")
+_COMPARE = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+def question_levels(question):
+    """Return the level labels of a question, in code order (code = i + 1)."""
+    if question == CHALLENGES:
+        return list(OPTIONS)
+    if question not in LEVELS:
+        raise KeyError(question)
+    return list(LEVELS[question])
+
+
+def _level_code(question, value):
+    """Return the code (1..k) of one level given as a label or a number."""
+    labels = question_levels(question)
+    if isinstance(value, str) and value not in labels and value.strip().isdigit():
+        value = int(value)
+    if value in labels:
+        return labels.index(value) + 1
+    # Questions with text levels also accept the code itself.
+    if isinstance(value, (int, np.integer)) and 1 <= value <= len(labels):
+        return int(value)
+    raise ValueError("%r is not a level of %s" % (value, question))
+
+
+def level_codes(question, spec):
+    """
+    Resolve a condition on one question to a frozenset of level codes.
+
+    Parameters:
+      question (str): Short question name.
+      spec: A level label or number, a list of them (any of), or a
+        comparison string such as ">=4", "< 3" or ">= 3rd year" (levels
+        compare in their listed order).
+
+    Returns:
+      frozenset: Codes 1..k of the selected levels.
+    """
+    if isinstance(spec, (list, tuple, set, frozenset)):
+        return frozenset().union(*(level_codes(question, item) for item in spec))
+    if isinstance(spec, str):
+        match = _COMPARISON.match(spec)
+        if match:
+            operator, operand = match.groups()
+            code = _level_code(question, operand)
+            codes = np.arange(1, len(question_levels(question)) + 1)
+            return frozenset(codes[_COMPARE[operator](codes, code)].tolist())
+    return frozenset([_level_code(question, spec)])
+
+
+class Filter:
+    """
+    A segment of respondents: an OR of ANDs of per-question level sets.
+
+    Build filters with where() and combine them with & and |. Filters are
+    hashable and equal when they select the same terms, whatever the order
+    the conditions were written in.
+    """
+
+    def __init__(self, terms):
+        self.terms = frozenset(terms)
+
+    @staticmethod
+    def _conjoin(a, b):
+        """AND two conjunctions; None if they cannot both hold."""
+        merged = dict(a)
+        for question, codes in b:
+            merged[question] = merged.get(question, codes) & codes
+            if not merged[question]:
+                return None
+        return frozenset(merged.items())
+
+    def __and__(self, other):
+        terms = (self._conjoin(a, b) for a in self.terms for b in other.terms)
+        return Filter(term for term in terms if term is not None)
+
+    def __or__(self, other):
+        return Filter(self.terms | other.terms)
+
+    def __eq__(self, other):
+        return isinstance(other, Filter) and self.terms == other.terms
+
+    def __hash__(self):
+        return hash(self.terms)
+
+    def __repr__(self):
+        parts = []
+        for term in sorted(self.terms, key=sorted):
+            conditions = [
+                "%s in %s" % (question, sorted(codes))
+                for question, codes in sorted(term)
+            ]
+            parts.append(" & ".join(conditions) or "all")
+        return "Filter(%s)" % (" | ".join(parts) or "none")
+
+
+def where(**conditions):
+    """
+    Return the filter requiring every condition (see level_codes).
+
+    Example:
+      where(year="3rd year", attend_lectures="Always", overall_quality=">=4")
+    """
+    term = {}
+    for question, spec in conditions.items():
+        term[question] = level_codes(question, spec)
+        if not term[question]:
+            return Filter([])
+    return Filter([frozenset(term.items())])
+
+
+def any_of(*filters):
+    """Return the filter selecting respondents in any of `filters`."""
+    return Filter(frozenset().union(*(f.terms for f in filters)))
+
+
+def popcount(words):
+    """Return the number of set bits in an array of uint64 words."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(np.unpackbits(words.view(np.uint8)).sum(dtype=np.int64))
+
+
+def _pack_rows(rows):
+    """
+    Pack coded rows into bitmaps.
+
+    Parameters:
+      rows (np.ndarray): (n, len(QUESTIONS)) uint8 codes, the last column
+        holding challenge bitmasks; n must be a multiple of 64.
+
+    Returns:
+      dict: Question -> (levels + 1, n // 64) uint64 words.
+    """
+    blocks = {}
+    for j, question in enumerate(QUESTIONS):
+        if question == CHALLENGES:
+            bits = np.arange(len(OPTIONS), dtype=np.uint8)
+            onehot = np.column_stack([rows[:, j] == 0, (rows[:, j, None] >> bits) & 1])
+        else:
+            levels = np.arange(len(question_levels(question)) + 1, dtype=np.uint8)
+            onehot = rows[:, j, None] == levels
+        packed = np.packbits(onehot.astype(bool), axis=0, bitorder="little")
+        blocks[question] = np.ascontiguousarray(packed.T).view("<u8")
+    return blocks
+
+
+class SegmentIndex:
+    """
+    Packed per-(question, level) bitmaps of respondents, with cached filters.
+
+    Rows are numbered in the order they are added, from 0.
+
+    Parameters:
+      cache_entries (int): Combined masks kept in the LRU cache.
+
+    Attributes:
+      n_rows (int): Respondents indexed.
+      hits, misses (int): Cache statistics.
+    """
+
+    def __init__(self, cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.n_rows = 0
+        self.cache_entries = cache_entries
+        self.hits = 0
+        self.misses = 0
+        self._widths = {q: len(question_levels(q)) + 1 for q in QUESTIONS}
+        self._blocks = {q: [] for q in QUESTIONS}
+        self._bitmaps = None
+        self._pending = np.zeros((0, len(QUESTIONS)), dtype=np.uint8)
+        self._cache = collections.OrderedDict()
+
+    # --------------------------------------------------------
+    # Building
+    # --------------------------------------------------------
+    def add_codes(self, codes, masks):
+        """
+        Index already coded respondents.
+
+        Parameters:
+          codes (np.ndarray): (n, len(CODED_COLUMNS)) survey_tally codes.
+          masks (np.ndarray): survey_challenges bitmask per row.
+        """
+        rows = np.column_stack([codes, masks]).astype(np.uint8)
+        rows = np.concatenate([self._pending, rows])
+        # Rows past the last whole word wait for the next batch.
+        full = len(rows) - len(rows) % _WORD_BITS
+        for question, words in _pack_rows(rows[:full]).items():
+            self._blocks[question].append(words)
+        self._pending = rows[full:]
+        self.n_rows += len(codes)
+        self._bitmaps = None
+        self._cache.clear()
+        return self
+
+    def update(self, chunk):
+        """Index one typed batch (from survey_loader.iter_survey)."""
+        return self.add_codes(encode_chunk(chunk), encode_challenges(chunk[CHALLENGES]))
+
+    @classmethod
+    def from_survey(cls, sources="data.csv", chunksize=None, **kwargs):
+        """Index one or more survey files in a single chunked scan."""
+        index = cls(**kwargs)
+        read = {} if chunksize is None else {"chunksize": chunksize}
+        with stage("segment_index") as st:
+            for path in expand_sources(sources):
+                for chunk in iter_survey(path, columns=QUESTIONS, **read):
+                    index.update(chunk)
+            st.rows_out = index.n_rows
+        return index
+
+    def bitmaps(self, question):
+        """
+        Return the (levels + 1, n_words) bitmaps of one question; row 0
+        marks missing answers (no option, for the challenges).
+        """
+        if self._bitmaps is None:
+            pending = len(self._pending)
+            padded = np.zeros((_WORD_BITS, len(QUESTIONS)), dtype=np.uint8)
+            padded[:pending] = self._pending
+            tail = _pack_rows(padded)
+            # Only the bits of the pending rows are set in the last word.
+            keep = np.uint64((1 << pending) - 1)
+            self._bitmaps = {}
+            for name in QUESTIONS:
+                blocks = self._blocks[name] + ([tail[name] & keep] if pending else [])
+                self._bitmaps[name] = (
+                    np.concatenate(blocks, axis=1)
+                    if blocks
+                    else np.zeros((self._widths[name], 0), dtype=np.uint64)
+                )
+        return self._bitmaps[question]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the bitmaps."""
+        return sum(self.bitmaps(question).nbytes for question in QUESTIONS)
+
+    # --------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------
+    def _cached(self, key, compute):
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+        value = compute()
+        if self.cache_entries:
+            self._cache[key] = value
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return value
+
+    def _levels_mask(self, question, codes):
+        def compute():
+            bitmaps = self.bitmaps(question)
+            return np.bitwise_or.reduce(bitmaps[sorted(codes)], axis=0)
+
+        return self._cached(("levels", question, codes), compute)
+
+    def _term_mask(self, term):
+        def compute():
+            if not term:
+                return self._all()
+            # AND the most selective condition first.
+            masks = sorted(
+                (self._levels_mask(question, codes) for question, codes in term),
+                key=popcount,
+            )
+            result = masks[0].copy()
+            for mask in masks[1:]:
+                result &= mask
+            return result
+
+        return self._cached(("and", term), compute)
+
+    def _all(self):
+        # Every respondent has exactly one code for the first question.
+        return np.bitwise_or.reduce(self.bitmaps(QUESTIONS[0]), axis=0)
+
+    def mask(self, segment=None):
+        """
+        Return the packed uint64 bitmap of a filter (all rows if None).
+
+        The result is shared with the cache and must not be modified.
+        """
+        if segment is None:
+            return self._all()
+
+        def compute():
+            result = np.zeros(self.bitmaps(QUESTIONS[0]).shape[1], dtype=np.uint64)
+            for term in segment.terms:
+                result |= self._term_mask(term)
+            return result
+
+        return self._cached(("or", segment), compute)
+
+    def count(self, segment=None):
+        """Return the number of respondents in a segment."""
+        return popcount(self.mask(segment))
+
+    def rows(self, segment=None):
+        """Return the row numbers of a segment's respondents, ascending."""
+        bits = np.unpackbits(self.mask(segment).view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits[: self.n_rows])
+
+    def counts(self, question, segment=None):
+        """
+        Return how many respondents of a segment gave each level.
+
+        Returns:
+          np.ndarray: int64 counts of codes 1..k (missing answers excluded).
+        """
+        mask = self.mask(segment)
+        bitmaps = self.bitmaps(question)[1:]
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(bitmaps & mask).sum(axis=1, dtype=np.int64)
+        return np.array([popcount(level & mask) for level in bitmaps])
+
+    def cache_info(self):
+        """Return the cache hits, misses and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
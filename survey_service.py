@@ -0,0 +1,714 @@
+import asyncio
+import datetime
+import http
+import http.client
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from survey_challenges import encode_challenges
+from survey_loader import (
+    CATEGORY_LEVELS,
+    COLUMN_NAMES,
+    LIKERT_LEVELS,
+    QUESTION_LABELS,
+    SCHEMA,
+    TIMESTAMP_FORMAT,
+    iter_survey,
+)
+from survey_store import STORE_SUFFIX, AggregateStore
+from survey_tally import CODED_COLUMNS, LEVELS, QUESTION_ORDER, parse_study_hours
+from survey_trace import stage
+
+# ============================================================
+# Local Ingestion Service with Live Counters
+# ============================================================
+# An asyncio HTTP server accepts responses as JSON, checks them against
+# the data.csv schema and folds them into an AggregateStore (per-question
+# counts and the segment crosstabs), so results are current without
+# re-exporting the form.
+#
+# Submissions are committed in groups: each request validates its
+# responses and queues them, and one commit task takes everything queued
+# since its last round, appends it to a write-ahead log (one JSON line per
+# response) with a single write, folds it in as one typed batch and only
+# then answers the waiting requests. Under load the groups grow, so the
+# per-batch cost is spread over many submissions. Validated records are
+# coded with dictionary lookups straight to the tally's integer codes, so a
+# group is folded without building a DataFrame.
+#
+# The /stats payload (the groupby("Question") summary of 18Feb2025.py) is
+# rebuilt once per commit and served as ready-made bytes. The store is
+# checkpointed next to the log every CHECKPOINT_RECORDS responses and on
+# shutdown with the log offset it covers, so a restart loads the
+# checkpoint and replays only the log lines written after it. Log lines
+# that cannot be decoded are skipped, counted and reported in /stats. A
+# commit that fails after writing to the log cuts the log back, so its
+# responses are not counted on the next restart either.
+#
+#   GET  /stats                 n_responses and sum/mean/count per question
+#   GET  /questions/<name>      {response: count} of one question
+#   GET  /crosstab/<a>/<b>      crosstab of two coded questions
+#   POST /responses             one response object or a list of them
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WAL = "responses.wal"
+
+CHECKPOINT_RECORDS = 100_000
+REPLAY_BATCH = 50_000
+MAX_BODY_BYTES = 16 << 20
+
+# Field names accepted in submissions: the short names and the headers.
+_FIELDS = {name: name for name in COLUMN_NAMES}
+_FIELDS.update({header: name for name, header, _ in SCHEMA})
+_KINDS = {name: kind for name, _, kind in SCHEMA}
+
+# Answer -> survey_tally code of every coded question (missing: 0).
+_CODES = {
+    name: {level: code for code, level in enumerate(LEVELS[name], start=1)}
+    for name in CODED_COLUMNS
+}
+
+
+# ============================================================
+# Validation
+# ============================================================
+def _check_value(name, value):
+    """Return the value to store for one answer, or raise ValueError."""
+    kind = _KINDS[name]
+    if kind == "likert":
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if type(value) is not int or value not in LIKERT_LEVELS:
+            raise ValueError(
+                "expected a rating 1-%d, got %r" % (LIKERT_LEVELS[-1], value)
+            )
+        return value
+    if kind == "category":
+        if not isinstance(value, str) or value.strip() not in CATEGORY_LEVELS[name]:
+            raise ValueError(
+                "expected one of %s, got %r" % (", ".join(CATEGORY_LEVELS[name]), value)
+            )
+        return value.strip()
+    if kind == "timestamp":
+        try:
+            datetime.datetime.strptime(value.strip(), TIMESTAMP_FORMAT)
+        except (AttributeError, ValueError):
+            raise ValueError(
+                "expected a %s timestamp, got %r" % (TIMESTAMP_FORMAT, value)
+            )
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise ValueError("expected text, got %r" % (value,))
+    return value
+
+
+def validate_response(response):
+    """
+    Check one submitted response against the survey schema.
+
+    Fields may be named by their short name or by their data.csv header;
+    missing fields, null and "" are unanswered questions. A response
+    without a Timestamp is stamped with the current local time.
+
+    Parameters:
+      response (dict): Decoded JSON object.
+
+    Returns:
+      dict: Short name -> answer, for the answered fields only.
+
+    Raises:
+      ValueError: Listing every field that does not fit the schema.
+    """
+    if not isinstance(response, dict):
+        raise ValueError("a response must be a JSON object")
+    record, problems = {}, []
+    for key, value in response.items():
+        name = _FIELDS.get(key.strip()) if isinstance(key, str) else None
+        if name is None:
+            problems.append("unknown field %r" % (key,))
+        elif value is not None and value != "":
+            try:
+                record[name] = _check_value(name, value)
+            except ValueError as exc:
+                problems.append("%s: %s" % (name, exc))
+    if problems:
+        raise ValueError("; ".join(problems))
+    if not set(record) - {"timestamp"}:
+        raise ValueError("the response answers no question")
+    if "timestamp" not in record:
+        record["timestamp"] = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+    return record
+
+
+def encode_records(records):
+    """
+    Code validated records for AggregateStore.add_codes.
+
+    Returns:
+      tuple: (codes, hours, hours_status, masks, last_timestamp), as
+      AggregateStore.fold derives them from a typed batch.
+    """
+    codes = np.array(
+        [
+            [_CODES[name].get(record.get(name), 0) for name in CODED_COLUMNS]
+            for record in records
+        ],
+        dtype=np.uint8,
+    ).reshape(len(records), len(CODED_COLUMNS))
+    hours, parsed = parse_study_hours(
+        pd.Series([record.get("study_hours") for record in records], dtype=str)
+    )
+    masks = encode_challenges(
+        pd.Series([record.get("biggest_challenges") for record in records], dtype=str)
+    )
+    last = records[-1]["timestamp"] if records else None
+    if last is not None:
+        last = datetime.datetime.strptime(last, TIMESTAMP_FORMAT)
+    return codes, hours, parsed.status, masks, last
+
+
+def grouped_stats(tally):
+    """
+    Return the groupby("Question")["Count"].agg(["sum", "mean", "count"])
+    summary of a SurveyTally as {label: {"sum", "mean", "count"}}, in the
+    same (sorted) question order.
+    """
+    stats = {}
+    for name in QUESTION_ORDER:
+        _, counts = tally.counts(name)
+        if len(counts):
+            stats[QUESTION_LABELS[name]] = {
+                "sum": int(counts.sum()),
+                "mean": float(counts.mean()),
+                "count": len(counts),
+            }
+    return dict(sorted(stats.items()))
+
+
+# ============================================================
+# Service
+# ============================================================
+class SurveyService:
+    """
+    Live counters of submitted responses, backed by a write-ahead log.
+
+    Parameters:
+      wal_path (str): Log of accepted responses, one JSON line each; the
+        checkpoint is kept at wal_path + STORE_SUFFIX.
+      fsync (bool): Force each commit to disk before answering (slower,
+        survives power loss rather than only a crash of the process).
+      checkpoint_records (int): Responses between checkpoints.
+
+    Usage:
+      service = SurveyService("responses.wal")
+      server = await service.start("127.0.0.1", 8765)
+      ...
+      await service.stop()
+    """
+
+    def __init__(
+        self, wal_path=DEFAULT_WAL, fsync=False, checkpoint_records=CHECKPOINT_RECORDS
+    ):
+        self.wal_path = wal_path
+        self.fsync = fsync
+        self.checkpoint_records = checkpoint_records
+        self.store = None
+        self.version = 0
+        self.skipped_lines = 0
+        self._wal = None
+        self._since_checkpoint = 0
+        self._pending = []
+        self._wakeup = None
+        self._committer = None
+        self._server = None
+        self._connections = {}
+        self._stats = b""
+        self._views = {}
+
+    # --------------------------------------------------------
+    # Log and checkpoint
+    # --------------------------------------------------------
+    def open(self):
+        """
+        Restore the counters from the checkpoint and the log.
+
+        Lines that are not a JSON response object (a corrupted log) are
+        skipped and counted in `skipped_lines`.
+
+        Returns:
+          int: Responses replayed from the log (after the checkpoint).
+        """
+        if not os.path.exists(self.wal_path):
+            open(self.wal_path, "wb").close()
+        size = _drop_partial_line(self.wal_path)
+        store_path = self.wal_path + STORE_SUFFIX
+        self.store = AggregateStore.open(self.wal_path, store_path)
+        if self.store.offset is not None and not self.store.is_append_of_source(size):
+            self.store = AggregateStore(self.wal_path, store_path)
+        start = self.store.offset or 0
+        self.skipped_lines = 0
+        with stage("wal_replay", path=self.wal_path) as st:
+            replayed = 0
+            with open(self.wal_path, "rb") as fh:
+                fh.seek(start)
+                while True:
+                    lines = fh.readlines(REPLAY_BATCH * 512)
+                    if not lines:
+                        break
+                    records = [_decode_line(line) for line in lines]
+                    records = [record for record in records if record is not None]
+                    self.skipped_lines += len(lines) - len(records)
+                    self.store.add_codes(*encode_records(records))
+                    replayed += len(records)
+            st.rows_out = replayed
+            st.skipped_lines = self.skipped_lines
+        self.store.mark(size)
+        self._wal = open(self.wal_path, "ab")
+        self._since_checkpoint = replayed
+        self._refresh_views()
+        return replayed
+
+    def checkpoint(self):
+        """Save the counters with the log offset they cover."""
+        self._wal.flush()
+        self.store.mark(self._wal.tell())
+        self.store.save()
+        self._since_checkpoint = 0
+
+    def commit(self, records):
+        """
+        Append validated records to the log and fold them in.
+
+        If writing or folding fails, the log is cut back to where it was,
+        so the records are neither counted nor replayed after a restart.
+        """
+        coded = encode_records(records)
+        start = self._wal.tell()
+        try:
+            self._wal.write(
+                b"".join(
+                    json.dumps(record, separators=(",", ":")).encode() + b"\n"
+                    for record in records
+                )
+            )
+            self._wal.flush()
+            if self.fsync:
+                os.fsync(self._wal.fileno())
+            self.store.add_codes(*coded)
+        except BaseException:
+            self._rollback(start)
+            raise
+        self.store.offset = self._wal.tell()
+        self._since_checkpoint += len(records)
+        if self._since_checkpoint >= self.checkpoint_records:
+            self.checkpoint()
+        self._refresh_views()
+
+    def _rollback(self, offset):
+        """Cut the log back to `offset`, dropping anything still buffered."""
+        try:
+            self._wal.close()
+        except OSError:
+            pass
+        os.truncate(self.wal_path, offset)
+        self._wal = open(self.wal_path, "ab")
+
+    def _refresh_views(self):
+        self.version += 1
+        self._views = {}
+        self._stats = _json(
+            {
+                "n_responses": self.store.tally.n_responses,
+                "last_timestamp": self.store.last_timestamp,
+                "version": self.version,
+                "skipped_log_lines": self.skipped_lines,
+                "questions": grouped_stats(self.store.tally),
+            }
+        )
+
+    # --------------------------------------------------------
+    # Views
+    # --------------------------------------------------------
+    def stats(self):
+        """Return the current /stats payload (JSON bytes)."""
+        return self._stats
+
+    def question(self, name):
+        """Return one question's {response: count} payload (JSON bytes)."""
+        key = ("question", name)
+        if key not in self._views:
+            counts = self.store.tally.as_dict(name)
+            self._views[key] = _json({"question": name, "counts": counts})
+        return self._views[key]
+
+    def crosstab(self, a, b):
+        """Return the crosstab of two coded questions (JSON bytes)."""
+        key = ("crosstab", a, b)
+        if key not in self._views:
+            table = self.store.crosstab(a, b)
+            self._views[key] = _json(
+                {
+                    "index": list(table.index),
+                    "columns": list(table.columns),
+                    "counts": table.to_numpy().tolist(),
+                }
+            )
+        return self._views[key]
+
+    # --------------------------------------------------------
+    # Group commit
+    # --------------------------------------------------------
+    async def submit(self, records):
+        """Queue validated records; return once they are logged and counted."""
+        done = asyncio.get_running_loop().create_future()
+        self._pending.append((records, done))
+        self._wakeup.set()
+        await done
+        return len(records)
+
+    async def _commit_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            try:
+                self.commit([record for records, _ in batch for record in records])
+            except Exception as exc:
+                for _, done in batch:
+                    done.set_exception(exc)
+            else:
+                for _, done in batch:
+                    done.set_result(None)
+            # Let the requests queued meanwhile join the next group.
+            await asyncio.sleep(0)
+
+    # --------------------------------------------------------
+    # HTTP
+    # --------------------------------------------------------
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Open the log and start serving; returns the asyncio server."""
+        if self.store is None:
+            self.open()
+        self._wakeup = asyncio.Event()
+        self._committer = asyncio.create_task(self._commit_loop())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def stop(self):
+        """Stop serving, commit what is queued and write a checkpoint."""
+        self._server.close()
+        # Closing a connection ends its handler at the next request; those
+        # waiting on a commit still get their answer.
+        for writer in list(self._connections.values()):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._committer.cancel()
+        batch, self._pending = self._pending, []
+        if batch:
+            self.commit([record for records, _ in batch for record in records])
+        self.checkpoint()
+        self._wal.close()
+
+    async def _handle(self, reader, writer):
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError as exc:
+                    writer.write(_response(400, _json({"error": str(exc)}), False))
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                status, payload = await self._route(method, path, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def _route(self, method, path, body):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        try:
+            if method == "GET" and parts in (["stats"], []):
+                return 200, self.stats()
+            if method == "GET" and len(parts) == 2 and parts[0] == "questions":
+                return 200, self.question(parts[1])
+            if method == "GET" and len(parts) == 3 and parts[0] == "crosstab":
+                return 200, self.crosstab(parts[1], parts[2])
+            if method == "POST" and parts == ["responses"]:
+                responses = json.loads(body or b"null")
+                if not isinstance(responses, list):
+                    responses = [responses]
+                records = []
+                for i, response in enumerate(responses):
+                    try:
+                        records.append(validate_response(response))
+                    except ValueError as exc:
+                        raise ValueError("response %d: %s" % (i, exc))
+                accepted = await self.submit(records) if records else 0
+                return 200, _json({"accepted": accepted, "version": self.version})
+        except KeyError as exc:
+            return 404, _json({"error": "unknown question %s" % exc})
+        except ValueError as exc:
+            return 400, _json({"error": str(exc)})
+        return 404, _json({"error": "no route %s %s" % (method, path)})
+
+
+def _json(payload):
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _response(status, body, keep_alive):
+    head = "HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n" % (
+        status,
+        http.HTTPStatus(status).phrase,
+    )
+    head += "Content-Length: %d\r\nConnection: %s\r\n\r\n" % (
+        len(body),
+        "keep-alive" if keep_alive else "close",
+    )
+    return head.encode("latin-1") + body
+
+
+async def _read_request(reader):
+    """
+    Read one HTTP/1.1 request.
+
+    Returns:
+      (method, path, keep_alive, body), or None at the end of the connection.
+    """
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError("malformed request line")
+    method, path, version = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("request body over %d bytes" % MAX_BODY_BYTES)
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" and (
+        version == "HTTP/1.1" or connection == "keep-alive"
+    )
+    return method, path, keep_alive, body
+
+
+def _decode_line(line):
+    """Return the response object of one log line, or None if corrupt."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or not isinstance(record.get("timestamp"), str):
+        return None
+    return record
+
+
+def _drop_partial_line(path):
+    """
+    Cut an unterminated last line (a write cut short by a crash) off the
+    log; return the resulting size.
+    """
+    with open(path, "rb+") as fh:
+        size = fh.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            step = min(pos, 65536)
+            fh.seek(pos - step)
+            block = fh.read(step)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                end = pos - step + newline + 1
+                break
+            pos -= step
+        else:
+            end = 0
+        if end < size:
+            fh.truncate(end)
+    return end
+
+
+def run_service(host=DEFAULT_HOST, port=DEFAULT_PORT, wal_path=DEFAULT_WAL, **kwargs):
+    """Serve until interrupted (Ctrl+C), then checkpoint."""
+
+    async def main():
+        service = SurveyService(wal_path, **kwargs)
+        server = await service.start(host, port)
+        print(
+            "Serving %d responses on http://%s:%d"
+            % (service.store.tally.n_responses, host, port)
+        )
+        if service.skipped_lines:
+            print("Skipped %d corrupt lines of %s" % (service.skipped_lines, wal_path))
+        try:
+            await server.serve_forever()
+        finally:
+            await service.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+class ServiceThread(threading.Thread):
+    """
+    Run a SurveyService on its own event loop in a background thread, for
+    scripts and local testing. Port 0 picks a free port.
+
+    Usage:
+      with ServiceThread("responses.wal", port=0) as running:
+          client = SurveyClient(port=running.port)
+    """
+
+    def __init__(self, wal_path=DEFAULT_WAL, host=DEFAULT_HOST, port=0, **kwargs):
+        super().__init__(daemon=True)
+        self.service = SurveyService(wal_path, **kwargs)
+        self.host = host
+        self.port = port
+        self.error = None
+        self._ready = threading.Event()
+        self._loop = None
+        self._stopping = None
+
+    def run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        try:
+            server = await self.service.start(self.host, self.port)
+        except Exception as exc:
+            self.error = exc
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._stopping.wait()
+        await self.service.stop()
+
+    def __enter__(self):
+        self.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self.join()
+        return False
+
+
+# ============================================================
+# Client
+# ============================================================
+class SurveyClient:
+    """
+    Minimal blocking client of a running service, over one keep-alive
+    connection.
+
+    Parameters:
+      host (str), port (int): Address of the service.
+      timeout (float): Socket timeout in seconds.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=30.0):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method, path, payload=None):
+        body = None if payload is None else _json(payload)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        result = json.loads(response.read())
+        if response.status == 404:
+            raise KeyError(result["error"])
+        if response.status != 200:
+            raise ValueError(result["error"])
+        return result
+
+    def submit(self, responses):
+        """
+        Submit one response (dict) or a list of them.
+
+        Returns:
+          int: Responses accepted. Nothing is accepted if any is invalid.
+
+        Raises:
+          ValueError: With the service's validation message.
+        """
+        return self._request("POST", "/responses", responses)["accepted"]
+
+    def stats(self):
+        """Return n_responses and the per-question sum/mean/count summary."""
+        return self._request("GET", "/stats")
+
+    def question(self, name):
+        """Return {response: count} of one question."""
+        counts = self._request("GET", "/questions/%s" % name)["counts"]
+        return {int(response): count for response, count in counts.items()}
+
+    def crosstab(self, a, b):
+        """Return the crosstab of two coded questions as a DataFrame."""
+        table = self._request("GET", "/crosstab/%s/%s" % (a, b))
+        return pd.DataFrame(
+            table["counts"],
+            index=pd.Index(table["index"], name=a),
+            columns=pd.Index(table["columns"], name=b),
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def survey_responses(path="data.csv", chunksize=None):
+    """
+    Yield the rows of a survey CSV as lists of submission dicts (one list
+    per batch), keyed by short name with unanswered questions left out.
+    """
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    for chunk in iter_survey(path, **kwargs):
+        chunk = chunk.astype(object)
+        stamps = chunk["timestamp"]
+        chunk["timestamp"] = [
+            None if pd.isna(stamp) else stamp.strftime(TIMESTAMP_FORMAT)
+            for stamp in stamps
+        ]
+        chunk = chunk.where(chunk.notna(), None)
+        yield [
+            {name: value for name, value in row.items() if value is not None}
+            for row in chunk.to_dict("records")
+        ]
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from survey_loader import LIKERT_COLUMNS, LIKERT_LEVELS, QUESTION_LABELS
+from survey_tally import QUESTION_ORDER
+
+# ============================================================
+# Weighted Statistics on (value, count) Histograms
+# ============================================================
+# Every statistic is computed from a question's response levels and their
+# counts, exactly as if np.mean/np.median/... were run on the expanded
+# per-respondent answers, but at O(number of levels) cost.
+
+
+def _as_histogram(values, counts):
+    values = np.asarray(values, dtype=float)
+    counts = np.asarray(counts, dtype=np.int64)
+    keep = counts > 0
+    return values[keep], counts[keep]
+
+
+def weighted_quantile(values, counts, q):
+    """
+    Return the q-th quantile of a histogram.
+
+    Matches np.quantile(np.repeat(values, counts), q) with the default
+    linear interpolation. `values` must be sorted ascending.
+
+    Parameters:
+      values (array): Response levels, ascending.
+      counts (array): Number of respondents per level.
+      q (float or array): Quantile(s) in [0, 1].
+
+    Returns:
+      float or np.ndarray: The quantile(s), NaN for an empty histogram.
+    """
+    values, counts = _as_histogram(values, counts)
+    total = counts.sum()
+    if total == 0:
+        return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+    ends = np.cumsum(counts)
+    position = (total - 1) * np.asarray(q, dtype=float)
+    lower = np.floor(position)
+    upper = np.minimum(lower + 1, total - 1)
+    at_lower = values[np.searchsorted(ends, lower, side="right")]
+    at_upper = values[np.searchsorted(ends, upper, side="right")]
+    return at_lower + (position - lower) * (at_upper - at_lower)
+
+
+def histogram_stats(values, counts, ddof=0, box_levels=None):
+    """
+    Compute summary statistics of one question from its histogram.
+
+    Parameters:
+      values (array): Response levels, ascending.
+      counts (array): Number of respondents per level.
+      ddof (int): Delta degrees of freedom for the variance (0 like np.var).
+      box_levels (array): Optional full scale (e.g. [1, 2, 3, 4, 5]); when
+        given, top2box/bottom2box are the shares of its top and bottom two
+        levels, otherwise they are NaN.
+
+    Returns:
+      dict: n, mean, median, q1, q3, variance, std, mode, top2box, bottom2box.
+    """
+    values, counts = _as_histogram(values, counts)
+    n = int(counts.sum())
+    stats = {"n": n}
+    if n == 0:
+        for key in ["mean", "median", "q1", "q3", "variance", "std", "mode"]:
+            stats[key] = np.nan
+        stats["top2box"] = stats["bottom2box"] = np.nan
+        return stats
+
+    mean = np.dot(values, counts) / n
+    variance = np.dot((values - mean) ** 2, counts) / max(n - ddof, 1)
+    q1, median, q3 = weighted_quantile(values, counts, [0.25, 0.5, 0.75])
+    stats.update(
+        mean=mean,
+        median=median,
+        q1=q1,
+        q3=q3,
+        variance=variance,
+        std=np.sqrt(variance),
+        mode=values[np.argmax(counts)],
+    )
+    if box_levels is None:
+        stats["top2box"] = stats["bottom2box"] = np.nan
+    else:
+        scale = np.sort(np.asarray(box_levels, dtype=float))
+        stats["top2box"] = counts[values >= scale[-2]].sum() / n
+        stats["bottom2box"] = counts[values <= scale[1]].sum() / n
+    return stats
+
+
+def question_stats(tally, questions=None, ddof=0):
+    """
+    Return weighted statistics for every question of a SurveyTally.
+
+    Parameters:
+      tally (SurveyTally): Per-question counts.
+      questions (list): Optional short question names (default: every
+        single-answer question).
+      ddof (int): Delta degrees of freedom for the variance.
+
+    Returns:
+      pd.DataFrame: One row per question, indexed by its display label.
+    """
+    if questions is None:
+        # The multi-select challenges have option counts, not a distribution.
+        questions = [name for name in QUESTION_ORDER if name != "biggest_challenges"]
+    rows = {}
+    for name in questions:
+        values, counts = tally.counts(name)
+        box_levels = LIKERT_LEVELS if name in LIKERT_COLUMNS else None
+        rows[QUESTION_LABELS[name]] = histogram_stats(
+            values, counts, ddof=ddof, box_levels=box_levels
+        )
+    frame = pd.DataFrame.from_dict(rows, orient="index")
+    frame.index.name = "Question"
+    return frame
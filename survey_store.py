@@ -0,0 +1,320 @@
+import csv
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from survey_challenges import encode_challenges
+from survey_loader import CATEGORY_COLUMNS, header_end, iter_survey, read_header
+from survey_tally import (
+    CODED_COLUMNS,
+    LEVELS,
+    SurveyTally,
+    encode_chunk,
+    parse_study_hours,
+)
+
+# ============================================================
+# Persistent, Incrementally Updated Aggregates
+# ============================================================
+# data.csv only ever grows by appending rows in Timestamp order, so the
+# store remembers how far it has read (a byte offset just past the last
+# complete row, plus the last Timestamp) and on each refresh folds in only
+# the rows appended since.
+
+# Crosstabs kept up to date: every categorical segment column against every
+# other coded question.
+CROSSTAB_PAIRS = [
+    (segment, other)
+    for segment in CATEGORY_COLUMNS
+    for other in CODED_COLUMNS
+    if other != segment
+]
+
+# Number of bytes before the high-water mark remembered to detect a source
+# file that was rewritten rather than appended to.
+ANCHOR_BYTES = 256
+
+STORE_SUFFIX = ".agg.npz"
+
+# Block size of the scan for the end of the last complete row.
+_SCAN_BYTES = 1 << 20
+
+_TALLY_FIELDS = ["coded", "study_hours", "hours_status", "challenges"]
+
+
+def crosstab_counts(codes, a, b):
+    """
+    Count the joint codes of two coded questions in one bincount.
+
+    Parameters:
+      codes (np.ndarray): Code matrix from survey_tally.encode_chunk.
+      a (str), b (str): Short names of two CODED_COLUMNS.
+
+    Returns:
+      np.ndarray: (len(LEVELS[a]) + 1, len(LEVELS[b]) + 1) int64 counts,
+      row/column 0 holding missing answers.
+    """
+    width = len(LEVELS[b]) + 1
+    joint = codes[:, CODED_COLUMNS.index(a)].astype(np.intp) * width
+    joint += codes[:, CODED_COLUMNS.index(b)]
+    size = (len(LEVELS[a]) + 1) * width
+    return np.bincount(joint, minlength=size).reshape(-1, width)
+
+
+class AggregateStore:
+    """
+    Per-question counts and crosstabs of one survey CSV, saved next to it.
+
+    Usage:
+      store = AggregateStore.open("data.csv")
+      store.refresh()   # folds in rows appended since the last save
+      store.save()
+    """
+
+    def __init__(self, source, store_path=None):
+        self.source = source
+        self.store_path = store_path or source + STORE_SUFFIX
+        self._reset()
+
+    def _reset(self):
+        self.tally = SurveyTally()
+        self.crosstabs = {
+            pair: np.zeros(
+                (len(LEVELS[pair[0]]) + 1, len(LEVELS[pair[1]]) + 1), np.int64
+            )
+            for pair in CROSSTAB_PAIRS
+        }
+        self.offset = None
+        self.last_timestamp = None
+        self.anchor = ""
+
+    @classmethod
+    def open(cls, source="data.csv", store_path=None):
+        """Load the saved store of `source`, or start an empty one."""
+        store = cls(source, store_path)
+        if os.path.exists(store.store_path):
+            store._load()
+        return store
+
+    def _load(self):
+        with np.load(self.store_path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            for field in _TALLY_FIELDS:
+                setattr(self.tally, field, saved[field])
+            for a, b in CROSSTAB_PAIRS:
+                self.crosstabs[(a, b)] = saved["xt:%s:%s" % (a, b)]
+        self.tally.n_responses = meta["n_responses"]
+        self.offset = meta["offset"]
+        self.last_timestamp = meta["last_timestamp"]
+        self.anchor = meta["anchor"]
+
+    def save(self):
+        """Write the store atomically next to the source file."""
+        meta = {
+            "source": os.path.basename(self.source),
+            "n_responses": self.tally.n_responses,
+            "offset": self.offset,
+            "last_timestamp": self.last_timestamp,
+            "anchor": self.anchor,
+        }
+        arrays = {field: getattr(self.tally, field) for field in _TALLY_FIELDS}
+        for (a, b), counts in self.crosstabs.items():
+            arrays["xt:%s:%s" % (a, b)] = counts
+        tmp_path = self.store_path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez(fh, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, self.store_path)
+
+    # --------------------------------------------------------
+    # Incremental refresh
+    # --------------------------------------------------------
+    def refresh(self):
+        """
+        Fold in the rows appended to the source since the last refresh.
+
+        If the source no longer matches what was read before (it shrank,
+        the bytes before the high-water mark changed, or the new rows start
+        before the last seen Timestamp), the store is rebuilt from scratch.
+
+        Returns:
+          int: Number of responses added.
+        """
+        size = os.path.getsize(self.source)
+        if self.offset is not None and not self.is_append_of_source(size):
+            self._reset()
+        start = self.offset if self.offset is not None else header_end(self.source)
+        stop = _complete_rows_end(self.source, start)
+        if stop <= start:
+            return 0
+
+        delta = AggregateStore(self.source, self.store_path)
+        first_timestamp = delta._scan(start, stop)
+        if (
+            self.last_timestamp is not None
+            and first_timestamp is not None
+            and first_timestamp < self.last_timestamp
+        ):
+            self._reset()
+            self.refresh()
+            return self.tally.n_responses
+
+        self.tally.merge(delta.tally)
+        for pair, counts in delta.crosstabs.items():
+            self.crosstabs[pair] += counts
+        if delta.last_timestamp is not None:
+            self.last_timestamp = delta.last_timestamp
+        self.mark(stop)
+        return delta.tally.n_responses
+
+    def _scan(self, start, stop):
+        """Aggregate the rows in the byte range [start, stop)."""
+        first_timestamp = None
+        columns = CODED_COLUMNS + ["timestamp", "study_hours", "biggest_challenges"]
+        for chunk in iter_survey(self.source, columns=columns, start=start, stop=stop):
+            stamps = chunk["timestamp"].dropna()
+            if first_timestamp is None and len(stamps):
+                first_timestamp = stamps.iloc[0].isoformat()
+            self.fold(chunk)
+        return first_timestamp
+
+    def fold(self, chunk):
+        """Add one typed batch (with the timestamp column) to the counts."""
+        hours, parsed = parse_study_hours(chunk["study_hours"])
+        stamps = chunk["timestamp"].dropna()
+        return self.add_codes(
+            encode_chunk(chunk),
+            hours,
+            parsed.status,
+            encode_challenges(chunk["biggest_challenges"]),
+            stamps.iloc[-1] if len(stamps) else None,
+        )
+
+    def add_codes(self, codes, hours, hours_status, masks, last_timestamp=None):
+        """
+        Add already coded responses (see SurveyTally.add_codes) to the
+        counts; `last_timestamp` is the Timestamp of the last one, if any.
+        """
+        self.tally.add_codes(codes, hours, hours_status, masks)
+        for a, b in CROSSTAB_PAIRS:
+            self.crosstabs[(a, b)] += crosstab_counts(codes, a, b)
+        if last_timestamp is not None:
+            self.last_timestamp = last_timestamp.isoformat()
+        return self
+
+    def mark(self, offset):
+        """Record that the source has been read up to byte `offset`."""
+        self.offset = offset
+        self.anchor = _read_anchor(self.source, offset)
+
+    def is_append_of_source(self, stop):
+        """
+        Return whether the source, now `stop` bytes long, still starts with
+        the bytes read so far.
+        """
+        return stop >= self.offset and _read_anchor(self.source, self.offset) == (
+            self.anchor
+        )
+
+    # --------------------------------------------------------
+    # Views
+    # --------------------------------------------------------
+    def grouped(self):
+        """
+        Return the groupby("Question")["Count"].agg(["sum", "mean", "count"])
+        summary of Activity_1_Pandas.py, computed from the stored counts.
+        """
+        df = self.tally.to_frame()
+        return df.groupby("Question")["Count"].agg(["sum", "mean", "count"])
+
+    def crosstab(self, a, b):
+        """
+        Return the stored crosstab of two questions as a labelled DataFrame.
+
+        Missing answers are left out, like pd.crosstab does.
+        """
+        if (a, b) in self.crosstabs:
+            counts = self.crosstabs[(a, b)][1:, 1:]
+        elif (b, a) in self.crosstabs:
+            counts = self.crosstabs[(b, a)][1:, 1:].T
+        else:
+            raise KeyError((a, b))
+        return pd.DataFrame(
+            counts,
+            index=pd.Index(LEVELS[a], name=a),
+            columns=pd.Index(LEVELS[b], name=b),
+        )
+
+
+def _complete_rows_end(path, start):
+    """
+    Return the byte offset just past the last complete row of the file.
+
+    The bytes from `start` (the beginning of a row) on are scanned for
+    newlines outside quoted fields: a quoted comment may span lines, and
+    quotes inside fields are doubled, so a newline ends a row exactly when
+    an even number of quote characters precede it. A final row without a
+    trailing newline (as in the Google Forms export) counts as complete
+    when it has every column of the header; anything else after the last
+    row end is taken to be a row still being written.
+    """
+    end = start
+    quoted = False
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        pos = start
+        while True:
+            block = fh.read(_SCAN_BYTES)
+            if not block:
+                break
+            if not quoted and b'"' not in block:
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    end = pos + newline + 1
+            else:
+                data = np.frombuffer(block, np.uint8)
+                quotes = np.flatnonzero(data == ord('"'))
+                newlines = np.flatnonzero(data == ord("\n"))
+                # A newline is outside quotes when an even number of quote
+                # characters (counting an unclosed one carried in) precede it.
+                before = np.searchsorted(quotes, newlines) + quoted
+                ends = newlines[before % 2 == 0]
+                if len(ends):
+                    end = pos + int(ends[-1]) + 1
+                quoted = (len(quotes) + quoted) % 2 == 1
+            pos += len(block)
+        fh.seek(end)
+        tail = fh.read().decode("utf-8", errors="replace")
+    if tail and _is_complete_row(tail, len(read_header(path))):
+        return pos
+    return end
+
+
+def _is_complete_row(text, n_fields):
+    try:
+        rows = list(csv.reader(io.StringIO(text), strict=True))
+    except csv.Error:
+        return False
+    return len(rows) == 1 and len(rows[0]) == n_fields
+
+
+def _read_anchor(path, offset):
+    with open(path, "rb") as fh:
+        start = max(0, offset - ANCHOR_BYTES)
+        fh.seek(start)
+        return fh.read(offset - start).hex()
+
+
+def refresh_store(source="data.csv", store_path=None):
+    """
+    Open the aggregate store of `source`, fold in new rows and save it.
+
+    Returns:
+      AggregateStore: The up-to-date store.
+    """
+    store = AggregateStore.open(source, store_path)
+    if store.refresh() or not os.path.exists(store.store_path):
+        store.save()
+    return store
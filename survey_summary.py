@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Grouped Summary with Within-Group Rank and Top-k
+# ============================================================
+# The long [Question, Response, Count] table (or any question x segment
+# table of counts) is summarized with flat per-row arrays: per-group
+# sum/mean/count are weighted bincounts of the group codes, and one stable
+# np.lexsort by (group, value) orders the rows for both the within-group
+# rank and the top-k rows of each group. Memory stays linear in the number
+# of rows however unevenly they are spread over the groups.
+
+
+def _group_codes(df, keys):
+    """
+    Factorize one or more key columns into group codes 0..n_groups-1, in
+    sorted key order like DataFrame.groupby.
+    """
+    codes, uniques = pd.factorize(df[keys[0]], sort=True)
+    if len(keys) == 1:
+        return codes, pd.Index(uniques, name=keys[0])
+    levels = [uniques]
+    for key in keys[1:]:
+        key_codes, key_uniques = pd.factorize(df[key], sort=True)
+        codes = codes * len(key_uniques) + key_codes
+        levels.append(key_uniques)
+    # Keep only the key combinations that occur.
+    present = np.flatnonzero(np.bincount(codes))
+    remap = np.zeros(present[-1] + 1, dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    index = pd.MultiIndex.from_product(levels, names=keys)[present]
+    return remap[codes], index
+
+
+def sort_within(group_codes, values, descending=True):
+    """
+    Order rows by group, then by value, in one stable lexsort.
+
+    NaN values come last in their group; tied values keep their input order.
+
+    Parameters:
+      group_codes (np.ndarray): Integer group of every row.
+      values (np.ndarray): Float value of every row.
+      descending (bool): Largest value first within each group.
+
+    Returns:
+      (np.ndarray, np.ndarray): The row order, and the position of each
+      sorted row within its group (0 for the first).
+    """
+    key = -values if descending else values
+    order = np.lexsort((key, np.isnan(values), group_codes))
+    n = len(order)
+    if n == 0:
+        return order, np.zeros(0, dtype=np.int64)
+    sorted_groups = group_codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    position = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+    return order, position
+
+
+def _sorted_ranks(sorted_groups, sorted_values, position):
+    """
+    Average ranks of rows already ordered by sort_within().
+
+    A run of tied values ends where the value or the group changes, so ties
+    never span two groups; every row of a run gets the mean of the run's
+    first and last rank.
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return np.zeros(0)
+    new_run = np.r_[
+        True,
+        (sorted_groups[1:] != sorted_groups[:-1])
+        | (sorted_values[1:] != sorted_values[:-1]),
+    ]
+    first = np.flatnonzero(new_run)
+    last = np.r_[first[1:], n] - 1
+    run = np.cumsum(new_run) - 1
+    ranks = 1 + (position[first] + position[last])[run] / 2
+    ranks[np.isnan(sorted_values)] = np.nan
+    return ranks
+
+
+def rank_within(group_codes, values, descending=True):
+    """
+    Rank every row's value among the values of its group.
+
+    Ties get the average rank, like pandas' rank(); NaN values get NaN.
+
+    Returns:
+      np.ndarray: Float ranks in the input row order.
+    """
+    values = np.asarray(values, dtype=float)
+    order, position = sort_within(group_codes, values, descending)
+    ranks = np.empty(len(values))
+    ranks[order] = _sorted_ranks(group_codes[order], values[order], position)
+    return ranks
+
+
+def _sorted_top_k(order, position, values, k):
+    keep = (position < k) & ~np.isnan(values[order])
+    return order[keep], position[keep]
+
+
+def top_k_within(group_codes, values, k):
+    """
+    Return the rows holding the k largest values of each group.
+
+    Returns:
+      (np.ndarray, np.ndarray): Row indices ordered by group and then by
+      descending value (ties in input order), and each row's position in
+      its group (0 for the largest). NaN values are never picked.
+    """
+    values = np.asarray(values, dtype=float)
+    order, position = sort_within(group_codes, values)
+    return _sorted_top_k(order, position, values, k)
+
+
+class GroupedSummary:
+    """
+    Per-group aggregates and per-row share/rank of a long table.
+
+    Attributes:
+      groups (pd.DataFrame): sum, mean and count of the value per group.
+      rows (pd.DataFrame): The input rows with Share and Rank columns; Rank
+        is 1 for the largest value within the row's group.
+      group_codes (np.ndarray): Position of each row's group in `groups`.
+      order (np.ndarray): Rows ordered by group and descending value.
+      position (np.ndarray): Position of each row of `order` in its group.
+      label, value (str): Names of the label and value columns.
+    """
+
+    def __init__(self, groups, rows, group_codes, order, position, label, value):
+        self.groups = groups
+        self.rows = rows
+        self.group_codes = group_codes
+        self.order = order
+        self.position = position
+        self.label = label
+        self.value = value
+
+    def top_k(self, k=3):
+        """
+        Return the k rows with the largest values of every group.
+
+        Returns:
+          pd.DataFrame: [<group keys>, Position, <label>, <value>, Share],
+          Position 1 being the largest value of the group.
+        """
+        values = self.rows[self.value].to_numpy(dtype=float)
+        picked, position = _sorted_top_k(self.order, self.position, values, k)
+        top = self.groups.index[self.group_codes[picked]].to_frame(index=False)
+        top["Position"] = position + 1
+        top[self.label] = self.rows[self.label].to_numpy()[picked]
+        top[self.value] = self.rows[self.value].to_numpy()[picked]
+        top["Share"] = self.rows["Share"].to_numpy()[picked]
+        return top
+
+
+def grouped_summary(df, by="Question", value="Count", label="Response"):
+    """
+    Summarize a long table group by group.
+
+    Equivalent to df.groupby(by)[value].agg(["sum", "mean", "count"]) plus a
+    within-group share and rank() of each row, with a single sort of the
+    rows by (group, value).
+
+    Parameters:
+      df (pd.DataFrame): Long table with one row per (group, label).
+      by (str or list): Group column(s), e.g. "Question" or
+        ["Segment", "Question"].
+      value (str): Numeric column to aggregate and rank.
+      label (str): Column identifying rows within a group.
+
+    Returns:
+      GroupedSummary: Group aggregates, annotated rows and top-k access.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    group_codes, index = _group_codes(df, keys)
+    n_groups = len(index)
+    values = df[value].to_numpy(dtype=float)
+
+    valid = ~np.isnan(values)
+    totals = np.bincount(
+        group_codes, weights=np.where(valid, values, 0.0), minlength=n_groups
+    )
+    counts = np.bincount(group_codes[valid], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        groups = pd.DataFrame(
+            {"sum": totals, "mean": totals / counts, "count": counts}, index=index
+        )
+        shares = values / totals[group_codes]
+    if pd.api.types.is_integer_dtype(df[value]):
+        groups["sum"] = groups["sum"].astype(df[value].dtype)
+
+    order, position = sort_within(group_codes, values)
+    ranks = np.empty(len(values))
+    ranks[order] = _sorted_ranks(group_codes[order], values[order], position)
+
+    rows = df[keys + [label, value]].copy()
+    rows["Share"] = shares
+    rows["Rank"] = ranks
+    return GroupedSummary(groups, rows, group_codes, order, position, label, value)
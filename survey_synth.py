@@ -0,0 +1,227 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from survey_loader import (
+    CATEGORY_LEVELS,
+    CHALLENGE_OPTIONS,
+    LIKERT_COLUMNS,
+    SCHEMA,
+)
+
+# ============================================================
+# Synthetic Survey Generator
+# ============================================================
+# Writes CSVs with the same 20 columns (and the same raw headers) as the
+# Google Forms export in data.csv, including the messy free-text answers:
+# study hours with units and ranges, comma-joined multi-select challenges,
+# misspelled majors and placeholder feedback. Rows are generated in chunks
+# so any size from 10^3 to 10^8 rows can be written with flat memory.
+DEFAULT_CHUNK_ROWS = 200_000
+
+# The first four headers of the export have no trailing spaces, the rest
+# end in two.
+HEADER = [raw if i < 4 else raw + "  " for i, (_, raw, _) in enumerate(SCHEMA)]
+
+# Answer frequencies loosely follow data.csv.
+YEAR_P = [0.08, 0.21, 0.6, 0.11]
+STUDY_METHOD_P = [0.31, 0.42, 0.14, 0.13]
+ATTEND_P = [0.27, 0.41, 0.24, 0.08]
+WORKLOAD_P = [0.48, 0.38, 0.14]
+CHALLENGE_P = [0.29, 0.34, 0.47, 0.42, 0.34]
+
+MAJORS = [
+    "CSE",
+    "CSE ",
+    "Cse",
+    "cse",
+    "Computer Science and Engineering",
+    "Computer science ",
+    "B.Tech (Computer Science and Engineering)",
+    "ECE",
+    "Ece",
+    "EEE",
+    "IT",
+    "AIML",
+    "AI-DS",
+    "Data science ",
+    "Mechanical",
+    "Civil",
+    "Mechatronics",
+    "MBBS ",
+    "Bachelors in commerce ",
+    "English Honors ",
+]
+MAJOR_P = np.array(
+    [30, 18, 6, 2, 2, 1, 1, 8, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1], float
+)
+
+IMPROVEMENTS = [
+    "NA",
+    "No",
+    "Nothing",
+    "nil",
+    "More interactive classes",
+    "More practice exercises and clearer assignment instructions would be helpful.",
+    "They should introduce more hands on projects and a more practical approach",
+    "Better teaching methods",
+    "More focus on practical courses",
+    "Experienced faculty and Advanced learning resources",
+    "Provide recorded lectures and better lab equipment",
+    "Smaller class sizes and more feedback on assignments",
+]
+FEEDBACK = [
+    "NA",
+    "No",
+    "No Thanks",
+    "Nothing",
+    "The course was good overall.",
+    "The course was not good overall.",
+    "Labs need better computers",
+    "Library should stay open longer during exams",
+    "Teachers are helpful but the syllabus is too long",
+]
+OTHER_CHALLENGES = ["Lack of Good Teachers", "Too many exams", "Long commute"]
+
+
+def _hours_text(rng, n):
+    """Free-text study hours: mostly plain numbers, some with units/ranges."""
+    hours = np.clip(rng.gamma(3.0, 2.5, n).round(), 0, 40).astype(int)
+    text = hours.astype(str).astype(object)
+    style = rng.random(n)
+    with_unit = style < 0.04
+    text[with_unit] = [h + " hours" for h in text[with_unit]]
+    per_week = (style >= 0.04) & (style < 0.05)
+    text[per_week] = [h + " hours per week " for h in text[per_week]]
+    ranged = (style >= 0.05) & (style < 0.07)
+    text[ranged] = ["%d-%d hrs" % (h, h + 1) for h in hours[ranged]]
+    junk = style >= 0.985
+    text[junk] = rng.choice(["Vo ke h ", "Itna lamba form ", "CSE ", ""], junk.sum())
+    return text
+
+
+def _challenges_text(rng, n):
+    """Comma-joined multi-select answers in option order."""
+    chosen = rng.random((n, len(CHALLENGE_OPTIONS))) < CHALLENGE_P
+    empty = ~chosen.any(axis=1)
+    chosen[empty, rng.integers(0, len(CHALLENGE_OPTIONS), empty.sum())] = True
+    # Factorize the selection patterns so each distinct one is joined once.
+    patterns = chosen @ (1 << np.arange(len(CHALLENGE_OPTIONS)))
+    joined = {
+        mask: ", ".join(
+            option for j, option in enumerate(CHALLENGE_OPTIONS) if mask >> j & 1
+        )
+        for mask in np.unique(patterns)
+    }
+    text = np.array([joined[mask] for mask in patterns], dtype=object)
+    other = rng.random(n) < 0.01
+    text[other] = [
+        t + ", " + o
+        for t, o in zip(text[other], rng.choice(OTHER_CHALLENGES, other.sum()))
+    ]
+    return text
+
+
+def _timestamps(start, seconds):
+    """Format datetimes like the export: "2/18/2025 0:09:44" (no padding)."""
+    stamps = pd.Series(start + pd.to_timedelta(seconds, unit="s"))
+    return (
+        stamps.dt.month.astype(str)
+        + "/"
+        + stamps.dt.day.astype(str)
+        + "/"
+        + stamps.dt.year.astype(str)
+        + " "
+        + stamps.dt.hour.astype(str)
+        + stamps.dt.strftime(":%M:%S")
+    )
+
+
+def generate_chunk(rng, n, start, first_second=0, mean_gap=30.0):
+    """
+    Generate `n` synthetic responses as a DataFrame with the raw headers.
+
+    Returns:
+      (pd.DataFrame, int): The rows and the Timestamp offset (in seconds
+      from `start`) of the last row, to continue the next chunk from.
+    """
+    gaps = rng.exponential(mean_gap, n).round().astype(np.int64) + 1
+    seconds = first_second + np.cumsum(gaps)
+    columns = {"timestamp": _timestamps(start, seconds).to_numpy()}
+
+    columns["year"] = rng.choice(CATEGORY_LEVELS["year"], n, p=YEAR_P)
+    columns["major"] = rng.choice(MAJORS, n, p=MAJOR_P / MAJOR_P.sum())
+    columns["study_method"] = rng.choice(
+        CATEGORY_LEVELS["study_method"], n, p=STUDY_METHOD_P
+    )
+    # A per-respondent satisfaction level makes the Likert answers correlate.
+    satisfaction = rng.normal(0, 0.8, n)
+    for name in LIKERT_COLUMNS:
+        answer = 3.7 + satisfaction + rng.normal(0, 0.8, n)
+        columns[name] = np.clip(np.rint(answer), 1, 5).astype(np.int8)
+    columns["study_hours"] = _hours_text(rng, n)
+    columns["attend_lectures"] = rng.choice(
+        CATEGORY_LEVELS["attend_lectures"], n, p=ATTEND_P
+    )
+    columns["workload"] = rng.choice(CATEGORY_LEVELS["workload"], n, p=WORKLOAD_P)
+    columns["biggest_challenges"] = _challenges_text(rng, n)
+    improvements = rng.choice(IMPROVEMENTS, n).astype(object)
+    improvements[rng.random(n) < 0.3] = None
+    columns["improvements"] = improvements
+    feedback = rng.choice(FEEDBACK, n).astype(object)
+    feedback[rng.random(n) < 0.5] = None
+    columns["feedback"] = feedback
+
+    frame = pd.DataFrame(
+        {raw: columns[name] for raw, (name, _, _) in zip(HEADER, SCHEMA)}
+    )
+    return frame, int(seconds[-1])
+
+
+def generate_survey(
+    path,
+    n_rows,
+    seed=0,
+    start="2025-02-18 00:00:00",
+    chunk_rows=DEFAULT_CHUNK_ROWS,
+):
+    """
+    Write a synthetic survey CSV with `n_rows` responses.
+
+    Parameters:
+      path (str): Output CSV path (overwritten).
+      n_rows (int): Number of responses.
+      seed (int): Random seed; the same seed gives the same file.
+      start (str): Timestamp of the collection start.
+      chunk_rows (int): Rows generated and written at a time.
+
+    Returns:
+      str: The output path.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    second = 0
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        if n_rows == 0:
+            pd.DataFrame(columns=HEADER).to_csv(fh, index=False)
+        while written < n_rows:
+            n = min(chunk_rows, n_rows - written)
+            frame, second = generate_chunk(rng, n, start, second)
+            frame.to_csv(fh, index=False, header=written == 0)
+            written += n
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic survey CSV.")
+    parser.add_argument("path")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate_survey(args.path, args.rows, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import numpy as np
+import pandas as pd
+
+from survey_challenges import MASK_DTYPE, OPTIONS, encode_challenges
+from survey_loader import LIKERT_COLUMNS, iter_survey
+from survey_tally import (
+    CODED_COLUMNS,
+    LEVELS,
+    SurveyTally,
+    encode_chunk,
+    parse_study_hours,
+)
+
+# ============================================================
+# Compact In-Memory Respondent Table
+# ============================================================
+# One respondent costs 16 bytes outside the free text:
+#   - the 14 fixed-answer codes (0..5) packed two per byte        7 bytes
+#   - major as a code into a shared label dictionary (uint16)     2 bytes
+#   - the "biggest challenge" bitmask                             1 byte
+#   - whole study hours (255 = unusable) and their parse status   2 bytes
+#   - timestamp as seconds since TIME_BASE (uint32)               4 bytes
+# Improvements and feedback are kept as one UTF-8 byte buffer per column
+# plus row offsets. Labels are stored once per column, never per row.
+# The uint32 timestamp covers 2000-01-01 to early 2136; times outside that
+# range are rejected rather than wrapped.
+TIME_BASE = np.datetime64("2000-01-01T00:00:00", "s")
+
+NO_HOURS = 255
+NO_TIME = np.iinfo(np.uint32).max
+
+# Free-text columns kept in TextBuffers.
+TEXT_COLUMNS = ["improvements", "feedback"]
+
+MAJOR_DTYPE = np.uint16
+
+_TABLE_COLUMNS = (
+    ["timestamp", "major"]
+    + CODED_COLUMNS
+    + ["study_hours", "biggest_challenges"]
+    + TEXT_COLUMNS
+)
+# Pack an odd number of coded columns with a zero high nibble at the end.
+_PACKED_WIDTH = (len(CODED_COLUMNS) + 1) // 2
+
+
+def pack_codes(codes):
+    """Pack a (n, len(CODED_COLUMNS)) code matrix two codes per byte."""
+    padded = np.zeros((len(codes), 2 * _PACKED_WIDTH), dtype=np.uint8)
+    padded[:, : codes.shape[1]] = codes
+    return padded[:, 0::2] | (padded[:, 1::2] << 4)
+
+
+def unpack_codes(packed):
+    """Inverse of pack_codes()."""
+    codes = np.empty((len(packed), 2 * _PACKED_WIDTH), dtype=np.uint8)
+    codes[:, 0::2] = packed & 0x0F
+    codes[:, 1::2] = packed >> 4
+    return codes[:, : len(CODED_COLUMNS)]
+
+
+class TextBuffer:
+    """
+    A text column as one UTF-8 byte buffer plus row offsets.
+
+    Row i is data[offsets[i]:offsets[i + 1]]; missing answers are empty.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = np.asarray(data, dtype=np.uint8)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_series(cls, series):
+        encoded = [text.encode("utf-8") for text in series.fillna("")]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    @classmethod
+    def concat(cls, buffers):
+        """Join buffers end to end, shifting each one's offsets."""
+        data = np.concatenate([buffer.data for buffer in buffers])
+        starts = np.cumsum([0] + [len(buffer.data) for buffer in buffers[:-1]])
+        offsets = np.concatenate(
+            [[0]]
+            + [buffer.offsets[1:] + start for buffer, start in zip(buffers, starts)]
+        )
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return (
+            self.data[self.offsets[i] : self.offsets[i + 1]].tobytes().decode("utf-8")
+        )
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+    def to_series(self):
+        """Decode every row into a Series of str (empty = missing)."""
+        raw = self.data.tobytes()
+        return pd.Series(
+            [
+                raw[start:stop].decode("utf-8")
+                for start, stop in zip(self.offsets[:-1], self.offsets[1:])
+            ],
+            dtype=object,
+        )
+
+
+class RespondentTable:
+    """
+    Every respondent of a survey in a compact columnar layout.
+
+    Attributes:
+      packed (np.ndarray): (n, 7) uint8, two fixed-answer codes per byte
+        (see pack_codes); codes as in survey_tally.encode_chunk.
+      major (np.ndarray): uint16 index into major_labels, 0 = missing.
+      challenges (np.ndarray): survey_challenges bitmask per respondent.
+      hours (np.ndarray): uint8 whole study hours, NO_HOURS if unusable.
+      hours_status (np.ndarray): uint8 survey_hours parse status.
+      timestamp (np.ndarray): uint32 seconds since TIME_BASE, NO_TIME if
+        missing.
+      text (dict): TextBuffer per column of TEXT_COLUMNS.
+      major_labels (list): Distinct majors in order of first appearance,
+        with None at index 0 for missing answers.
+    """
+
+    def __init__(
+        self, packed, major, challenges, hours, hours_status, timestamp, text, labels
+    ):
+        self.packed = packed
+        self.major = major
+        self.challenges = challenges
+        self.hours = hours
+        self.hours_status = hours_status
+        self.timestamp = timestamp
+        self.text = text
+        self.major_labels = labels
+
+    # --------------------------------------------------------
+    # Construction
+    # --------------------------------------------------------
+    @classmethod
+    def from_chunks(cls, chunks):
+        """
+        Build a table from typed batches (survey_loader.iter_survey).
+
+        Majors are factorized per batch and merged into one dictionary, so
+        each distinct spelling is stored once for the whole survey.
+
+        Raises:
+          ValueError: If a timestamp falls outside the uint32 range of
+            seconds since TIME_BASE, or there are too many distinct majors.
+        """
+        index = {}
+        labels = [None]
+        parts = {name: [] for name in ["packed", "major", "challenges", "hours"]}
+        parts.update({name: [] for name in ["hours_status", "timestamp"]})
+        text = {name: [] for name in TEXT_COLUMNS}
+        for chunk in chunks:
+            parts["packed"].append(pack_codes(encode_chunk(chunk)))
+
+            codes, uniques = pd.factorize(chunk["major"], use_na_sentinel=True)
+            table = np.zeros(len(uniques) + 1, dtype=np.int64)
+            for j, label in enumerate(uniques):
+                if label not in index:
+                    index[label] = len(labels)
+                    labels.append(label)
+                table[j] = index[label]
+            if len(labels) > np.iinfo(MAJOR_DTYPE).max + 1:
+                raise ValueError("Too many distinct majors for %s" % MAJOR_DTYPE)
+            parts["major"].append(table[codes].astype(MAJOR_DTYPE))
+
+            parts["challenges"].append(encode_challenges(chunk["biggest_challenges"]))
+            hours, parsed = parse_study_hours(chunk["study_hours"])
+            parts["hours"].append(np.where(hours < 0, NO_HOURS, hours).astype(np.uint8))
+            parts["hours_status"].append(parsed.status.astype(np.uint8))
+
+            stamps = chunk["timestamp"].to_numpy("datetime64[s]")
+            seconds = (stamps - TIME_BASE).astype(np.int64)
+            missing = np.isnat(stamps)
+            outside = ~missing & ((seconds < 0) | (seconds >= NO_TIME))
+            if outside.any():
+                raise ValueError(
+                    "Timestamp %s outside the storable range %s to %s"
+                    % (stamps[outside][0], TIME_BASE, TIME_BASE + (NO_TIME - 1))
+                )
+            seconds[missing] = NO_TIME
+            parts["timestamp"].append(seconds.astype(np.uint32))
+
+            for name in TEXT_COLUMNS:
+                text[name].append(TextBuffer.from_series(chunk[name]))
+
+        if not parts["packed"]:
+            return cls.empty()
+        arrays = {name: np.concatenate(values) for name, values in parts.items()}
+        text = {name: TextBuffer.concat(buffers) for name, buffers in text.items()}
+        return cls(labels=labels, text=text, **arrays)
+
+    @classmethod
+    def from_survey(cls, path="data.csv", chunksize=None):
+        """Read a survey CSV in batches straight into a compact table."""
+        kwargs = {} if chunksize is None else {"chunksize": chunksize}
+        return cls.from_chunks(iter_survey(path, columns=_TABLE_COLUMNS, **kwargs))
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            packed=np.zeros((0, _PACKED_WIDTH), dtype=np.uint8),
+            major=np.zeros(0, dtype=MAJOR_DTYPE),
+            challenges=np.zeros(0, dtype=MASK_DTYPE),
+            hours=np.zeros(0, dtype=np.uint8),
+            hours_status=np.zeros(0, dtype=np.uint8),
+            timestamp=np.zeros(0, dtype=np.uint32),
+            text={name: TextBuffer(np.zeros(0), [0]) for name in TEXT_COLUMNS},
+            labels=[None],
+        )
+
+    # --------------------------------------------------------
+    # Access
+    # --------------------------------------------------------
+    def __len__(self):
+        return len(self.packed)
+
+    @property
+    def dictionaries(self):
+        """The shared label dictionary of every dictionary-coded column."""
+        return {**LEVELS, "major": self.major_labels[1:], "biggest_challenges": OPTIONS}
+
+    def codes(self):
+        """Return the unpacked (n, len(CODED_COLUMNS)) code matrix."""
+        return unpack_codes(self.packed)
+
+    def column(self, name):
+        """Return the uint8 codes of one fixed-answer question."""
+        i = CODED_COLUMNS.index(name)
+        byte = self.packed[:, i // 2]
+        return byte & 0x0F if i % 2 == 0 else byte >> 4
+
+    def labels(self, name):
+        """Decode a fixed-answer question or major into a pd.Categorical."""
+        if name == "major":
+            return pd.Categorical.from_codes(
+                self.major.astype(np.int64) - 1, self.major_labels[1:]
+            )
+        return pd.Categorical.from_codes(
+            self.column(name).astype(np.int64) - 1, LEVELS[name], ordered=True
+        )
+
+    def timestamps(self):
+        """Return the response times as datetime64[s] (NaT if missing)."""
+        stamps = TIME_BASE + self.timestamp.astype("timedelta64[s]")
+        return np.where(self.timestamp == NO_TIME, np.datetime64("NaT"), stamps)
+
+    def study_hours(self):
+        """Return whole study hours as int16, -1 if unusable."""
+        hours = self.hours.astype(np.int16)
+        hours[self.hours == NO_HOURS] = -1
+        return hours
+
+    def tally(self):
+        """Tally every question straight from the compact columns."""
+        return SurveyTally().add_codes(
+            self.codes(), self.study_hours(), self.hours_status, self.challenges
+        )
+
+    def nbytes(self, include_text=False):
+        """Total size of the per-respondent arrays (and text buffers)."""
+        total = sum(
+            array.nbytes
+            for array in [
+                self.packed,
+                self.major,
+                self.challenges,
+                self.hours,
+                self.hours_status,
+                self.timestamp,
+            ]
+        )
+        if include_text:
+            total += sum(buffer.nbytes for buffer in self.text.values())
+        return total
+
+    def bytes_per_respondent(self):
+        """Bytes per respondent excluding free text."""
+        return self.nbytes() / max(len(self), 1)
+
+    def to_frame(self):
+        """
+        Decode the table into a DataFrame with the short column names and
+        the loader's dtypes (Int8 Likert answers, ordered categoricals).
+        Study hours are the parsed whole hours and challenges the bitmasks.
+        """
+        frame = pd.DataFrame({"timestamp": self.timestamps()})
+        frame["major"] = self.labels("major")
+        for name in CODED_COLUMNS:
+            if name in LIKERT_COLUMNS:
+                codes = self.column(name)
+                frame[name] = pd.arrays.IntegerArray(codes.astype(np.int8), codes == 0)
+            else:
+                frame[name] = self.labels(name)
+        hours = self.study_hours()
+        frame["study_hours"] = pd.arrays.IntegerArray(hours, hours < 0)
+        frame["biggest_challenges"] = self.challenges
+        for name in TEXT_COLUMNS:
+            frame[name] = self.text[name].to_series().replace("", None)
+        return frame
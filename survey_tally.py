@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+from survey_challenges import encode_challenges, option_counts
+from survey_hours import MAX_HOURS, STATUS_NAMES, parse_hours
+from survey_loader import (
+    CATEGORY_LEVELS,
+    CHALLENGE_OPTIONS,
+    LIKERT_LEVELS,
+    QUESTION_LABELS,
+    SCHEMA,
+    iter_survey,
+)
+from survey_trace import stage
+
+# ============================================================
+# Integer Coding of Responses
+# ============================================================
+# Questions with a fixed set of answers are coded as 0 = missing/invalid,
+# 1..k = the k-th level. For Likert questions the code equals the rating,
+# for categoricals it is the 1-based position in CATEGORY_LEVELS.
+CODED_COLUMNS = [name for name, _, kind in SCHEMA if kind in ("likert", "category")]
+LEVELS = {name: CATEGORY_LEVELS.get(name, LIKERT_LEVELS) for name in CODED_COLUMNS}
+
+# Study hours above this are treated as invalid answers.
+MAX_STUDY_HOURS = MAX_HOURS
+
+# Order of the questions in the [Question, Response, Count] table.
+QUESTION_ORDER = [name for name, _, _ in SCHEMA if name in QUESTION_LABELS]
+
+# Bin layout of the single bincount over all coded columns: column i owns
+# bins [_OFFSETS[i], _OFFSETS[i + 1]), with bin 0 of each column for
+# missing answers.
+_WIDTHS = np.array([len(LEVELS[name]) + 1 for name in CODED_COLUMNS])
+_OFFSETS = np.concatenate([[0], np.cumsum(_WIDTHS)])
+
+
+def encode_column(series, name):
+    """
+    Convert one typed survey column to uint8 response codes.
+
+    Parameters:
+      series (pd.Series): Column as produced by survey_loader.iter_survey.
+      name (str): Short column name (one of CODED_COLUMNS).
+
+    Returns:
+      np.ndarray: uint8 codes, 0 for missing or out-of-range answers.
+    """
+    if name in CATEGORY_LEVELS:
+        return (series.cat.codes.to_numpy() + 1).astype(np.uint8)
+    values = series.to_numpy(dtype=np.int16, na_value=0)
+    values[(values < 1) | (values > len(LIKERT_LEVELS))] = 0
+    return values.astype(np.uint8)
+
+
+def encode_chunk(chunk):
+    """
+    Code every fixed-answer question of a typed batch.
+
+    Returns:
+      np.ndarray: (n_rows, len(CODED_COLUMNS)) uint8 code matrix.
+    """
+    codes = np.empty((len(chunk), len(CODED_COLUMNS)), dtype=np.uint8)
+    for i, name in enumerate(CODED_COLUMNS):
+        codes[:, i] = encode_column(chunk[name], name)
+    return codes
+
+
+def parse_study_hours(series):
+    """
+    Return whole study hours per respondent and the survey_hours parse result.
+
+    Ranges count at their midpoint rounded half up ("4-5 hrs" -> 5); rejected
+    or missing answers are -1.
+    """
+    parsed = parse_hours(series)
+    return whole_hours(parsed.midpoint), parsed
+
+
+def whole_hours(midpoint):
+    """Round parsed study hours half up to int16, NaN becoming -1."""
+    hours = np.floor(midpoint + 0.5)
+    return np.where(np.isnan(hours), -1, hours).astype(np.int16)
+
+
+# ============================================================
+# Tally Engine
+# ============================================================
+class SurveyTally:
+    """
+    Per-question response histograms built incrementally from typed batches.
+
+    All fixed-answer questions are counted with one np.bincount per batch
+    over the combined code matrix, so the cost is linear in the number of
+    responses and independent of the number of questions. Tallies from
+    different batches or files can be combined with merge().
+    """
+
+    def __init__(self):
+        self.n_responses = 0
+        self.coded = np.zeros(_OFFSETS[-1], dtype=np.int64)
+        self.study_hours = np.zeros(MAX_STUDY_HOURS + 1, dtype=np.int64)
+        self.hours_status = np.zeros(len(STATUS_NAMES), dtype=np.int64)
+        self.challenges = np.zeros(len(CHALLENGE_OPTIONS), dtype=np.int64)
+
+    def update(self, chunk):
+        """Fold one typed batch (from survey_loader.iter_survey) into the tally."""
+        hours, parsed = parse_study_hours(chunk["study_hours"])
+        return self.add_codes(
+            encode_chunk(chunk),
+            hours,
+            parsed.status,
+            encode_challenges(chunk["biggest_challenges"]),
+        )
+
+    def add_codes(self, codes, hours, hours_status, masks):
+        """
+        Fold already coded responses into the tally.
+
+        Parameters:
+          codes (np.ndarray): (n, len(CODED_COLUMNS)) code matrix.
+          hours (np.ndarray): Whole study hours per row, -1 if unusable.
+          hours_status (np.ndarray): survey_hours parse status per row.
+          masks (np.ndarray): survey_challenges bitmask per row.
+        """
+        flat = (codes.astype(np.int64) + _OFFSETS[:-1]).ravel()
+        self.coded += np.bincount(flat, minlength=_OFFSETS[-1])
+        self.study_hours += np.bincount(
+            hours[hours >= 0], minlength=MAX_STUDY_HOURS + 1
+        )
+        self.hours_status += np.bincount(hours_status, minlength=len(STATUS_NAMES))
+        self.challenges += option_counts(masks)[: len(CHALLENGE_OPTIONS)]
+        self.n_responses += len(codes)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another SurveyTally into this one."""
+        self.n_responses += other.n_responses
+        self.coded += other.coded
+        self.study_hours += other.study_hours
+        self.hours_status += other.hours_status
+        self.challenges += other.challenges
+        return self
+
+    def counts(self, name):
+        """
+        Return the histogram of one question.
+
+        Parameters:
+          name (str): Short question name.
+
+        Returns:
+          (np.ndarray, np.ndarray): Response values and their counts. Missing
+          answers are not included.
+        """
+        if name in LEVELS:
+            i = CODED_COLUMNS.index(name)
+            counts = self.coded[_OFFSETS[i] + 1 : _OFFSETS[i + 1]]
+            return np.arange(1, len(counts) + 1), counts.copy()
+        if name == "study_hours":
+            observed = np.flatnonzero(self.study_hours)
+            return observed, self.study_hours[observed]
+        if name == "biggest_challenges":
+            return np.arange(1, len(CHALLENGE_OPTIONS) + 1), self.challenges.copy()
+        raise KeyError(name)
+
+    def hours_report(self):
+        """Return how many study-hours answers were parsed/coerced/rejected."""
+        return dict(zip(STATUS_NAMES, (int(c) for c in self.hours_status)))
+
+    def missing(self, name):
+        """Return the number of missing/invalid answers of a coded question."""
+        return int(self.coded[_OFFSETS[CODED_COLUMNS.index(name)]])
+
+    def as_dict(self, name):
+        """Return one question's histogram as a {response: count} dict."""
+        responses, counts = self.counts(name)
+        return {int(r): int(c) for r, c in zip(responses, counts)}
+
+    def to_frame(self):
+        """
+        Return all histograms as the [Question, Response, Count] DataFrame
+        used by Activity_1_Pandas.py.
+        """
+        questions, responses, counts = [], [], []
+        for name in QUESTION_ORDER:
+            values, value_counts = self.counts(name)
+            questions.append(np.full(len(values), QUESTION_LABELS[name], dtype=object))
+            responses.append(values)
+            counts.append(value_counts)
+        return pd.DataFrame(
+            {
+                "Question": np.concatenate(questions),
+                "Response": np.concatenate(responses).astype(np.int64),
+                "Count": np.concatenate(counts).astype(np.int64),
+            }
+        )
+
+
+def tally_survey(path="data.csv", chunksize=None):
+    """
+    Tally every question of a survey CSV in a single chunked scan.
+
+    Parameters:
+      path (str): Path to the survey CSV file.
+      chunksize (int): Optional rows per batch (defaults to the loader's).
+
+    Returns:
+      SurveyTally: Counts for every question.
+    """
+    tally = SurveyTally()
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    columns = CODED_COLUMNS + ["study_hours", "biggest_challenges"]
+    with stage("tally_survey", path=str(path)) as st:
+        for chunk in iter_survey(path, columns=columns, **kwargs):
+            tally.update(chunk)
+        st.rows_out = tally.n_responses
+    return tally
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+from survey_loader import LIKERT_COLUMNS, QUESTION_LABELS, iter_survey
+from survey_tally import CODED_COLUMNS, LEVELS, encode_chunk
+
+# ============================================================
+# Dense Question x Level Count Tensor
+# ============================================================
+# counts[..., q, l] is the number of respondents giving level l + 1 (code
+# l + 1) to question q. Questions with fewer levels than MAX_LEVELS are
+# padded with zero counts, and `mask` marks the valid cells, so every
+# per-question computation is a single broadcasted NumPy operation. An
+# optional leading axis holds segments (e.g. year of study or survey wave).
+MAX_LEVELS = max(len(levels) for levels in LEVELS.values())
+
+
+class CountTensor:
+    """
+    Response counts as a dense (n_questions, max_levels) array, or
+    (n_segments, n_questions, max_levels) when split by segment.
+
+    Attributes:
+      counts (np.ndarray): int64 counts, zero in padded cells.
+      questions (list): Short question names, one per row.
+      level_labels (list): Level labels of each question.
+      values (np.ndarray): (n_questions, max_levels) numeric level values
+        (1..k), NaN in padded cells.
+      mask (np.ndarray): (n_questions, max_levels) bool, True for real levels.
+      segment (str): Name of the segment axis, or None.
+      segment_labels (list): Labels along the segment axis, or None.
+    """
+
+    def __init__(self, counts, questions, segment=None, segment_labels=None):
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.questions = list(questions)
+        self.level_labels = [LEVELS[name] for name in self.questions]
+        n_levels = np.array([len(levels) for levels in self.level_labels])
+        width = self.counts.shape[-1]
+        self.mask = np.arange(width) < n_levels[:, None]
+        self.values = np.where(self.mask, np.arange(1, width + 1, dtype=float), np.nan)
+        self.segment = segment
+        self.segment_labels = segment_labels
+
+    # --------------------------------------------------------
+    # Construction
+    # --------------------------------------------------------
+    @classmethod
+    def from_tally(cls, tally, questions=None):
+        """Build an unsegmented tensor from a SurveyTally."""
+        questions = questions or CODED_COLUMNS
+        counts = np.zeros((len(questions), MAX_LEVELS), dtype=np.int64)
+        for q, name in enumerate(questions):
+            _, level_counts = tally.counts(name)
+            counts[q, : len(level_counts)] = level_counts
+        return cls(counts, questions)
+
+    @classmethod
+    def from_codes(cls, codes, segment_codes=None, n_segments=None, questions=None):
+        """
+        Count a code matrix in one bincount.
+
+        Parameters:
+          codes (np.ndarray): (n, len(CODED_COLUMNS)) matrix from
+            survey_tally.encode_chunk.
+          segment_codes (np.ndarray): Optional per-row segment index
+            (0..n_segments-1, negative to leave the row out).
+          n_segments (int): Size of the segment axis.
+          questions (list): Optional subset of CODED_COLUMNS.
+
+        Returns:
+          CountTensor: Counts with a segment axis if segment_codes is given.
+        """
+        questions = questions or CODED_COLUMNS
+        columns = [CODED_COLUMNS.index(name) for name in questions]
+        sub = codes[:, columns].astype(np.int64)
+        cells = np.arange(len(questions)) * MAX_LEVELS + sub - 1
+        valid = sub > 0
+        size = len(questions) * MAX_LEVELS
+        if segment_codes is not None:
+            segment_codes = np.asarray(segment_codes, dtype=np.int64)
+            cells = cells + (segment_codes * size)[:, None]
+            valid &= (segment_codes >= 0)[:, None]
+            size *= n_segments
+        counts = np.bincount(cells[valid], minlength=size)
+        shape = (len(questions), MAX_LEVELS)
+        if segment_codes is not None:
+            shape = (n_segments,) + shape
+        return cls(counts.reshape(shape), questions)
+
+    @classmethod
+    def from_survey(cls, path="data.csv", segment=None, questions=None):
+        """
+        Count a survey CSV chunk by chunk, optionally split by a coded
+        question such as "year".
+        """
+        total = None
+        n_segments = len(LEVELS[segment]) if segment else None
+        for chunk in iter_survey(path, columns=CODED_COLUMNS):
+            codes = encode_chunk(chunk)
+            segment_codes = None
+            if segment:
+                segment_codes = codes[:, CODED_COLUMNS.index(segment)].astype(int) - 1
+            part = cls.from_codes(codes, segment_codes, n_segments, questions)
+            total = part if total is None else total + part
+        if total is None:
+            total = cls.from_codes(
+                np.zeros((0, len(CODED_COLUMNS)), np.uint8),
+                np.zeros(0, int) if segment else None,
+                n_segments,
+                questions,
+            )
+        if segment:
+            total.segment = segment
+            total.segment_labels = LEVELS[segment]
+        return total
+
+    @classmethod
+    def stack(cls, tensors, segment="wave", segment_labels=None):
+        """Stack unsegmented tensors (e.g. one per survey wave) along a new axis."""
+        first = tensors[0]
+        counts = np.stack([tensor.counts for tensor in tensors])
+        return cls(counts, first.questions, segment, segment_labels)
+
+    def __add__(self, other):
+        return CountTensor(
+            self.counts + other.counts,
+            self.questions,
+            self.segment,
+            self.segment_labels,
+        )
+
+    # --------------------------------------------------------
+    # Broadcasted statistics
+    # --------------------------------------------------------
+    def totals(self):
+        """Respondents per question (and segment)."""
+        return self.counts.sum(axis=-1)
+
+    def shares(self):
+        """Share of each level within its question; NaN in padded cells."""
+        totals = self.totals()[..., None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = self.counts / totals
+        return np.where(self.mask, shares, np.nan)
+
+    def _where_answered(self, values):
+        return np.where(self.totals() > 0, values, np.nan)
+
+    def mean(self):
+        """Weighted mean level per question (and segment); NaN if unanswered."""
+        return self._where_answered(np.nansum(self.shares() * self.values, axis=-1))
+
+    def variance(self):
+        """
+        Weighted population variance per question (and segment); NaN if
+        unanswered.
+        """
+        deviation = self.values - self.mean()[..., None]
+        return self._where_answered(np.nansum(self.shares() * deviation**2, axis=-1))
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+    def top2box(self):
+        """Share of the two highest levels of each question; NaN if unanswered."""
+        n_levels = self.mask.sum(axis=1)
+        top = (np.arange(self.mask.shape[1]) >= (n_levels - 2)[:, None]) & self.mask
+        return self._where_answered(np.nansum(np.where(top, self.shares(), 0), axis=-1))
+
+    def share_difference(self, baseline=None):
+        """
+        Difference in level shares from a baseline (default: the total over
+        the segment axis), for comparing segments or questions.
+
+        Raises:
+          ValueError: If the tensor has no segment axis and no baseline is
+            given.
+        """
+        if baseline is None:
+            if self.counts.ndim != 3:
+                raise ValueError(
+                    "share_difference needs a baseline for an unsegmented tensor"
+                )
+            baseline = CountTensor(self.counts.sum(axis=0), self.questions)
+        return self.shares() - baseline.shares()
+
+    def summary(self):
+        """Return mean/std/top-2-box per question as a DataFrame."""
+        labels = [QUESTION_LABELS[name] for name in self.questions]
+        data = {"n": self.totals(), "mean": self.mean(), "std": self.std()}
+        is_likert = np.array([name in LIKERT_COLUMNS for name in self.questions])
+        data["top2box"] = np.where(is_likert, self.top2box(), np.nan)
+        if self.counts.ndim == 2:
+            return pd.DataFrame(data, index=pd.Index(labels, name="Question"))
+        segments = self.segment_labels or range(self.counts.shape[0])
+        index = pd.MultiIndex.from_product(
+            [segments, labels], names=[self.segment or "segment", "Question"]
+        )
+        return pd.DataFrame({key: value.ravel() for key, value in data.items()}, index)
@@ -0,0 +1,362 @@
+import functools
+import itertools
+import os
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from survey_batch import expand_sources, map_merge
+from survey_loader import iter_survey
+from survey_majors import canonicalize_majors
+
+# ============================================================
+# Term and Bigram Mining over the Free-Text Answers
+# ============================================================
+# Comments are lower-cased, tokenized and reduced to terms (non-stopword
+# tokens) and bigrams of adjacent terms. Every feature is hashed into one
+# of N_FEATURES buckets, so the counts are a sparse (segment x bucket)
+# matrix whose width never grows with the vocabulary; the alphabetically
+# first spelling hashed to a bucket labels it, so the labels do not depend
+# on the order in which batches are merged. Placeholder answers
+# ("NA", "No", "Nothing", ...) are skipped. Like the challenge bitmasks,
+# text is factorized first and only distinct comments are tokenized.
+# Chunks are mined in worker processes and their sparse counts merged;
+# added cells are buffered and folded into the sorted cells in batches.
+# Majors are split by their canonical name (see survey_majors.py).
+MINED_COLUMNS = ["improvements", "feedback"]
+SEGMENT_COLUMNS = ["year", "major"]
+
+N_FEATURES = 1 << 20
+
+# Whole answers that carry no content.
+PLACEHOLDERS = {
+    "",
+    "-",
+    ".",
+    "na",
+    "n/a",
+    "nil",
+    "no",
+    "none",
+    "nope",
+    "nopes",
+    "nothing",
+    "no thanks",
+    "no comments",
+    "nothing much",
+    "ok",
+    "okay",
+    "yes",
+}
+
+STOPWORDS = set("""
+    a an and are as at be been but by can could do for from had has have i
+    if in is it it's its me my of on or our so than that the their them
+    then there they this to too us was we were what when which will with
+    would you your
+    """.split())
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_CLAUSE = re.compile(r"[.,;:!?()\n]+")
+
+
+def normalize(text):
+    """Fold Unicode compatibility forms, lower-case and trim a comment."""
+    return unicodedata.normalize("NFKC", text).lower().strip()
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def analyze(text):
+    """
+    Return the features of one comment: its terms followed by the bigrams
+    of adjacent terms. Placeholder answers have no features.
+    """
+    text = normalize(text)
+    if text.strip(" .!") in PLACEHOLDERS:
+        return ()
+    terms, bigrams = [], []
+    # Bigrams do not span punctuation, e.g. the "." between two sentences.
+    for clause in _CLAUSE.split(text):
+        clause_terms = [
+            token
+            for token in _TOKEN.findall(clause)
+            if token not in STOPWORDS and len(token) > 1
+        ]
+        terms.extend(clause_terms)
+        bigrams.extend(" ".join(pair) for pair in zip(clause_terms, clause_terms[1:]))
+    return tuple(terms + bigrams)
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def feature_bucket(feature):
+    """Hash a feature to a bucket (CRC-32, stable across processes)."""
+    return zlib.crc32(feature.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def _segment_values(chunk, segment):
+    if segment == "major":
+        return canonicalize_majors(chunk[segment]).astype(object)
+    return chunk[segment].astype(object)
+
+
+class TermCounts:
+    """
+    Sparse feature counts, one row per (column, segment, label).
+
+    Attributes:
+      rows (list): (column, segment, label) of each row. The segment "all"
+        (label "all") holds the totals of a column.
+      keys (np.ndarray): Sorted row * N_FEATURES + bucket of non-zero cells.
+      counts (np.ndarray): Counts of those cells.
+      documents (np.ndarray): Non-placeholder comments per row.
+      placeholders (dict): Skipped placeholder answers per column.
+      terms (dict): Bucket -> smallest feature spelling hashed to it.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._row_index = {}
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._pending = []
+        self._pending_cells = 0
+        self.documents = np.zeros(0, dtype=np.int64)
+        self.placeholders = {}
+        self.terms = {}
+
+    @property
+    def keys(self):
+        self._flush()
+        return self._keys
+
+    @property
+    def counts(self):
+        self._flush()
+        return self._counts
+
+    def _row(self, row):
+        if row not in self._row_index:
+            self._row_index[row] = len(self.rows)
+            self.rows.append(row)
+        return self._row_index[row]
+
+    def _label(self, bucket, feature):
+        known = self.terms.get(bucket)
+        if known is None or feature < known:
+            self.terms[bucket] = feature
+
+    def _flush(self):
+        """Fold the buffered cells into the sorted keys and counts."""
+        if not self._pending:
+            return
+        keys = np.concatenate([self._keys] + [keys for keys, _ in self._pending])
+        counts = np.concatenate(
+            [self._counts] + [counts for _, counts in self._pending]
+        )
+        self._pending, self._pending_cells = [], 0
+        self._keys, inverse = np.unique(keys, return_inverse=True)
+        self._counts = np.bincount(
+            inverse, weights=counts, minlength=len(self._keys)
+        ).astype(np.int64)
+
+    def _add(self, keys, counts, documents):
+        """
+        Add sparse cells and per-row document counts.
+
+        Cells are buffered until they outnumber the cells already folded,
+        so each cell is re-sorted O(log n) times over a long run of merges
+        instead of on every one.
+        """
+        self._pending.append((keys, counts))
+        self._pending_cells += len(keys)
+        if self._pending_cells > len(self._keys):
+            self._flush()
+        grown = np.zeros(len(self.rows), dtype=np.int64)
+        grown[: len(self.documents)] = self.documents
+        grown[: len(documents)] += documents
+        self.documents = grown
+
+    def update(self, chunk, columns=None, segments=None):
+        """Count the features of one typed batch (survey_loader.iter_survey)."""
+        columns = columns or MINED_COLUMNS
+        segments = SEGMENT_COLUMNS if segments is None else segments
+        factorized = [
+            (segment,) + pd.factorize(_segment_values(chunk, segment))
+            for segment in segments
+        ]
+        keys, counts, documents = [], [], []
+        for column in columns:
+            codes, uniques = pd.factorize(chunk[column])
+            features = [analyze(text) for text in uniques]
+            flat = list(itertools.chain.from_iterable(features))
+            # Hash each distinct feature of the batch once.
+            vocabulary = dict.fromkeys(flat)
+            for feature in vocabulary:
+                bucket = vocabulary[feature] = feature_bucket(feature)
+                self._label(bucket, feature)
+            lengths = np.array([len(f) for f in features] + [0], dtype=np.int64)
+            buckets = np.fromiter(
+                map(vocabulary.__getitem__, flat), dtype=np.int64, count=len(flat)
+            )
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+            empty = lengths[codes] == 0
+            self.placeholders[column] = self.placeholders.get(column, 0) + int(
+                np.count_nonzero((codes >= 0) & empty)
+            )
+            useful = ~empty  # missing answers (code -1) have no features
+
+            row_sets = [np.full(len(codes), self._row((column, "all", "all")))]
+            for segment, segment_codes, labels in factorized:
+                table = [self._row((column, segment, str(label))) for label in labels]
+                row_sets.append(np.array(table + [-1], dtype=np.int64)[segment_codes])
+
+            n_uniques = max(len(uniques), 1)
+            for rows in row_sets:
+                keep = useful & (rows >= 0)
+                documents.append(rows[keep])
+                # Count each distinct (row, comment) pair once, then expand
+                # it into the comment's buckets with that weight.
+                pairs, weights = np.unique(
+                    rows[keep] * n_uniques + codes[keep], return_counts=True
+                )
+                pair_rows, pair_comments = np.divmod(pairs, n_uniques)
+                per_pair = lengths[pair_comments]
+                first = np.repeat(np.cumsum(per_pair) - per_pair, per_pair)
+                within = np.arange(int(per_pair.sum())) - first
+                cells = buckets[np.repeat(starts[pair_comments], per_pair) + within]
+                keys.append(np.repeat(pair_rows, per_pair) * N_FEATURES + cells)
+                counts.append(np.repeat(weights, per_pair))
+
+        self._add(
+            np.concatenate(keys),
+            np.concatenate(counts),
+            np.bincount(np.concatenate(documents), minlength=len(self.rows)),
+        )
+        return self
+
+    def merge(self, other):
+        """Add the counts of another TermCounts (rows are matched by name)."""
+        remap = np.array([self._row(row) for row in other.rows] + [0], np.int64)
+        rows, buckets = np.divmod(other.keys, N_FEATURES)
+        documents = np.zeros(len(self.rows), dtype=np.int64)
+        np.add.at(documents, remap[:-1], other.documents)
+        self._add(remap[rows] * N_FEATURES + buckets, other.counts, documents)
+        for column, n in other.placeholders.items():
+            self.placeholders[column] = self.placeholders.get(column, 0) + n
+        for bucket, feature in other.terms.items():
+            self._label(bucket, feature)
+        return self
+
+    def row_counts(self, row):
+        """Return the (buckets, counts) of one row as sparse arrays."""
+        lo, hi = np.searchsorted(self.keys, [row * N_FEATURES, (row + 1) * N_FEATURES])
+        return self.keys[lo:hi] - row * N_FEATURES, self.counts[lo:hi]
+
+    def top_terms(self, k=10, segment=None, kind=None):
+        """
+        Return the k most frequent features of every row.
+
+        Rows are listed in (column, segment, label) order and tied counts
+        in alphabetical order, so the table does not depend on how the
+        counts were split into batches or merged.
+
+        Parameters:
+          k (int): Features per row.
+          segment (str): Only rows of this segment ("all", "year", ...).
+          kind (str): "term" or "bigram" to keep only one kind of feature.
+
+        Returns:
+          pd.DataFrame: [Column, Segment, Label, Documents, Rank, Term,
+          Count], Rank 1 being the most frequent.
+        """
+        records = []
+        for row in sorted(range(len(self.rows)), key=self.rows.__getitem__):
+            column, row_segment, label = self.rows[row]
+            if segment is not None and row_segment != segment:
+                continue
+            buckets, counts = self.row_counts(row)
+            if kind is not None:
+                is_bigram = np.array([" " in self.terms[b] for b in buckets], bool)
+                keep = is_bigram if kind == "bigram" else ~is_bigram
+                buckets, counts = buckets[keep], counts[keep]
+            if len(counts) > k:
+                # Keep every feature tied with the k-th count, then break
+                # the ties by name.
+                kth = -np.partition(-counts, k - 1)[k - 1]
+                top = np.flatnonzero(counts >= kth)
+            else:
+                top = np.arange(len(counts))
+            names = np.array([self.terms[b] for b in buckets[top]], dtype=object)
+            top = top[np.lexsort((names, -counts[top]))][:k]
+            for rank, i in enumerate(top, 1):
+                records.append(
+                    (
+                        column,
+                        row_segment,
+                        label,
+                        int(self.documents[row]),
+                        rank,
+                        self.terms[buckets[i]],
+                        int(counts[i]),
+                    )
+                )
+        return pd.DataFrame(
+            records,
+            columns=[
+                "Column",
+                "Segment",
+                "Label",
+                "Documents",
+                "Rank",
+                "Term",
+                "Count",
+            ],
+        )
+
+
+def _mine_chunk(chunk, columns, segments):
+    return TermCounts().update(chunk, columns, segments)
+
+
+def mine_text(
+    sources="data.csv", columns=None, segments=None, workers=None, chunksize=None
+):
+    """
+    Count terms and bigrams of the free-text answers of one or more files.
+
+    Batches are read in this process and mined in a process pool, with a
+    bounded number of batches in flight; partial counts are merged as they
+    complete.
+
+    Parameters:
+      sources (str or list): Files, directories or glob patterns.
+      columns (list): Text columns to mine (default: MINED_COLUMNS).
+      segments (list): Columns to split by (default: SEGMENT_COLUMNS).
+      workers (int): Worker processes (default: os.cpu_count()); 1 runs in
+        the calling process.
+      chunksize (int): Optional rows per batch.
+
+    Returns:
+      TermCounts: Merged counts.
+    """
+    columns = columns or MINED_COLUMNS
+    segments = SEGMENT_COLUMNS if segments is None else segments
+    kwargs = {} if chunksize is None else {"chunksize": chunksize}
+    chunks = (
+        chunk
+        for path in expand_sources(sources)
+        for chunk in iter_survey(path, columns=columns + segments, **kwargs)
+    )
+    total = TermCounts()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            total.update(chunk, columns, segments)
+        return total
+
+    map_merge(chunks, _mine_chunk, total.merge, workers, (columns, segments))
+    return total
@@ -0,0 +1,259 @@
+import atexit
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ============================================================
+# Stage-Level Instrumentation
+# ============================================================
+# Wrap each pipeline stage in `with stage("name", rows_in=n) as st:` and set
+# st.rows_out when it is done. While tracing is off (the default) stage()
+# returns one shared no-op object, so the wrapper costs a function call.
+# Tracing is switched on with the environment variables below or with
+# enable() (the CLI's --trace flag); the trace is written at exit.
+#
+#   SURVEY_TRACE=trace.json          JSON list of stage records
+#   SURVEY_TRACE_CHROME=chrome.json  also a Chrome trace (chrome://tracing,
+#                                    https://ui.perfetto.dev)
+#   SURVEY_TRACE_MEMORY=1            also trace Python allocations (slower)
+#
+# peak_traced_mb is the stage's own peak of traced allocations; a nested
+# stage folds its peak into the enclosing one. process_max_rss_mb is the
+# process-lifetime high-water mark (ru_maxrss) when the stage ended, not
+# a per-stage figure.
+TRACE_ENV = "SURVEY_TRACE"
+CHROME_ENV = "SURVEY_TRACE_CHROME"
+MEMORY_ENV = "SURVEY_TRACE_MEMORY"
+
+
+def _max_rss_mb():
+    """Peak resident set size of the process so far, in MB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak / (1 << 20) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+class _NoStage:
+    """Stand-in returned by stage() while tracing is off."""
+
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    def __init__(self, tracer, name, rows_in, details):
+        self.tracer = tracer
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.details = details
+
+    def __enter__(self):
+        self.depth = self.tracer._enter()
+        if self.tracer.memory:
+            self.traced_before = self.tracer._push_peak()
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.start
+        record = {
+            "stage": self.name,
+            "depth": self.depth,
+            "start_s": self.start - self.tracer.origin,
+            "wall_s": wall,
+            "cpu_s": time.process_time() - self.cpu_start,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "process_max_rss_mb": _max_rss_mb(),
+        }
+        if self.tracer.memory:
+            peak = self.tracer._pop_peak() - self.traced_before
+            record["peak_traced_mb"] = peak / 1e6
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.details:
+            record["details"] = self.details
+        self.tracer._exit(record)
+        return False
+
+
+class Tracer:
+    """
+    Collects stage records and writes them as JSON and Chrome traces.
+
+    Attributes:
+      records (list): One dict per finished stage, in finishing order.
+      path (str): JSON trace output path, or None.
+      chrome_path (str): Chrome trace output path, or None.
+      memory (bool): Whether Python allocations are traced.
+    """
+
+    def __init__(self, path=None, chrome_path=None, memory=False):
+        self.records = []
+        self.path = path
+        self.chrome_path = chrome_path
+        self.memory = memory
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _enter(self):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        return depth
+
+    def _push_peak(self):
+        """
+        Start a stage's peak: fold the allocations peak so far into the
+        enclosing stage, then reset it. Returns the memory traced now.
+        """
+        peaks = self._local.__dict__.setdefault("peaks", [])
+        current, peak = tracemalloc.get_traced_memory()
+        if peaks:
+            peaks[-1] = max(peaks[-1], peak)
+        tracemalloc.reset_peak()
+        peaks.append(current)
+        return current
+
+    def _pop_peak(self):
+        """End a stage's peak and fold it into the enclosing stage."""
+        peaks = self._local.peaks
+        peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if peaks:
+            peaks[-1] = max(peaks[-1], peak)
+        return peak
+
+    def _exit(self, record):
+        self._local.depth -= 1
+        record["thread"] = threading.get_ident()
+        with self._lock:
+            self.records.append(record)
+
+    def stage(self, name, rows_in=None, **details):
+        return _Stage(self, name, rows_in, details)
+
+    def chrome_events(self):
+        """Return the records as Chrome trace "complete" events."""
+        pid = os.getpid()
+        return [
+            {
+                "name": record["stage"],
+                "ph": "X",
+                "ts": record["start_s"] * 1e6,
+                "dur": record["wall_s"] * 1e6,
+                "pid": pid,
+                "tid": record["thread"],
+                "args": {
+                    key: value
+                    for key, value in record.items()
+                    if key not in ("stage", "start_s", "wall_s", "thread")
+                },
+            }
+            for record in self.records
+        ]
+
+    def write(self):
+        """Write the configured trace files."""
+        if self.path:
+            with open(self.path, "w") as fh:
+                json.dump({"pid": os.getpid(), "stages": self.records}, fh, indent=2)
+        if self.chrome_path:
+            with open(self.chrome_path, "w") as fh:
+                json.dump({"traceEvents": self.chrome_events()}, fh)
+
+    def report(self):
+        """Return a fixed-width text table of the stages."""
+        lines = [
+            "%-24s %9s %9s %10s %10s %10s"
+            % ("stage", "wall s", "cpu s", "rows in", "rows out", "maxrss MB")
+        ]
+        for record in sorted(self.records, key=lambda r: r["start_s"]):
+            lines.append(
+                "%-24s %9.4f %9.4f %10s %10s %10s"
+                % (
+                    "  " * record["depth"] + record["stage"],
+                    record["wall_s"],
+                    record["cpu_s"],
+                    "" if record["rows_in"] is None else record["rows_in"],
+                    "" if record["rows_out"] is None else record["rows_out"],
+                    (
+                        ""
+                        if record["process_max_rss_mb"] is None
+                        else "%.1f" % record["process_max_rss_mb"]
+                    ),
+                )
+            )
+        return "\n".join(lines)
+
+
+_tracer = None
+
+
+def enable(path=None, chrome_path=None, memory=False):
+    """
+    Turn tracing on for the rest of the process.
+
+    The trace files are written when the process exits.
+
+    Returns:
+      Tracer: The active tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        atexit.register(lambda: _tracer.write())
+    _tracer = Tracer(path, chrome_path, memory)
+    return _tracer
+
+
+def active():
+    """Return the active Tracer, or None while tracing is off."""
+    return _tracer
+
+
+def stage(name, rows_in=None, **details):
+    """
+    Time one pipeline stage.
+
+    Parameters:
+      name (str): Stage name, e.g. "load" or "clean".
+      rows_in (int): Optional number of input rows.
+      **details: Extra JSON-serializable fields stored with the record.
+
+    Returns:
+      A context manager whose rows_out attribute can be set inside the block.
+    """
+    if _tracer is None:
+        return _NO_STAGE
+    return _tracer.stage(name, rows_in, **details)
+
+
+if os.environ.get(TRACE_ENV) or os.environ.get(CHROME_ENV):
+    enable(
+        os.environ.get(TRACE_ENV),
+        os.environ.get(CHROME_ENV),
+        os.environ.get(MEMORY_ENV, "") not in ("", "0"),
+    )
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+import survey_batch
+from survey_batch import BatchAggregate, combine_moments, map_merge, run_batch
+from survey_loader import load_survey
+from survey_moments import moments_survey
+from survey_stats import question_stats
+from survey_tally import tally_survey
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def test_study_hours_agree_across_engines():
+    stats = question_stats(tally_survey(DATA)).loc["Study Hours"]
+    moments = moments_survey(DATA, questions=["study_hours"], workers=1).overall
+    mean, std = run_batch(DATA, workers=1).hours_mean_std()
+    assert moments.mean[0] == pytest.approx(stats["mean"])
+    assert moments.std()[0] == pytest.approx(stats["std"])
+    assert (mean, std) == pytest.approx((stats["mean"], stats["std"]))
+
+
+def test_batches_merge_like_one_pass(monkeypatch):
+    calls = []
+    encode_chunk = survey_batch.encode_chunk
+    monkeypatch.setattr(
+        survey_batch,
+        "encode_chunk",
+        lambda chunk: calls.append(1) or encode_chunk(chunk),
+    )
+    df = load_survey(DATA)
+    whole = BatchAggregate().update(df)
+    assert len(calls) == 1
+    parts = BatchAggregate()
+    for start in range(0, len(df), 10):
+        parts.merge(BatchAggregate().update(df.iloc[start : start + 10]))
+    assert parts.tally.n_responses == whole.tally.n_responses
+    np.testing.assert_array_equal(parts.tally.coded, whole.tally.coded)
+    np.testing.assert_allclose(parts.hours_moments, whole.hours_moments)
+
+
+def test_combine_moments_is_stable_far_from_zero():
+    values = 1e9 + np.arange(10.0)
+    halves = [
+        (len(part), part.mean(), np.sum((part - part.mean()) ** 2))
+        for part in np.split(values, 2)
+    ]
+    n, mean, m2 = combine_moments(*halves[0], *halves[1])
+    assert n == 10 and mean == values.mean()
+    assert m2 / n == pytest.approx(np.var(values))
+
+
+def test_map_merge_sees_every_result_once():
+    for workers in (1, 2):
+        results = []
+        map_merge(range(20), divmod, results.append, workers, (3,))
+        assert sorted(results) == [divmod(i, 3) for i in range(20)]
+
+
+def test_pooled_batch_matches_a_serial_run(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / ("wave%d.csv" % i)
+        path.write_bytes(open(DATA, "rb").read())
+        paths.append(str(path))
+    serial = run_batch(paths, workers=1)
+    pooled = run_batch(paths, workers=2)
+    np.testing.assert_array_equal(pooled.tally.coded, serial.tally.coded)
+    np.testing.assert_array_equal(pooled.pairs.upper, serial.pairs.upper)
+    np.testing.assert_allclose(pooled.hours_moments, serial.hours_moments)
+    assert pooled.rows_per_file == serial.rows_per_file
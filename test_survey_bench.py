@@ -0,0 +1,38 @@
+import pytest
+
+from survey_bench import STAGES, benchmark_file, compare
+from survey_synth import generate_survey
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    return generate_survey(str(tmp_path_factory.mktemp("bench") / "s.csv"), 400)
+
+
+def test_every_stage_is_timed(synthetic):
+    run = benchmark_file(synthetic, plot=False, chunksize=150)
+    assert run["rows"] == 400
+    assert set(run["stages"]) == set(STAGES)
+    for stage in STAGES:
+        record = run["stages"][stage]
+        assert record["wall_s"] >= 0 and record["cpu_s"] >= 0
+    assert run["stages"]["parse"]["wall_s"] > 0
+
+
+def test_memory_run_records_peaks(synthetic):
+    run = benchmark_file(synthetic, plot=False, trace_memory=True)
+    assert run["rows"] == 400
+    assert all(set(record) == {"peak_mb"} for record in run["stages"].values())
+    assert run["stages"]["parse"]["peak_mb"] > 0
+
+
+def test_compare_reports_changed_stages():
+    def results(rows, parse_s):
+        stages = {stage: {"wall_s": 0.0, "cpu_s": 0.0} for stage in STAGES}
+        stages["parse"]["wall_s"] = parse_s
+        return {"runs": [{"rows": rows, "stages": stages}]}
+
+    lines = compare(results(1000, 1.5), results(1000, 2.0))
+    assert len(lines) == 1
+    assert "parse" in lines[0] and "-25%" in lines[0]
+    assert compare(results(1000, 1.0), results(10, 2.0)) == []
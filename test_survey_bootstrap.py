@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+import survey_bootstrap
+from survey_bootstrap import bootstrap_tensor
+from survey_loader import LIKERT_COLUMNS
+from survey_tensor import CountTensor
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+@pytest.fixture(scope="module")
+def year_tensor():
+    return CountTensor.from_survey(DATA, segment="year")
+
+
+def test_intervals_cover_the_estimates(year_tensor):
+    result = bootstrap_tensor(year_tensor, n_boot=500, seed=1, workers=1)
+    for statistic in ["mean", "top2box"]:
+        low, high = result.interval(statistic)
+        estimate = result.estimates[statistic]
+        answered = ~np.isnan(estimate)
+        assert (low[answered] <= estimate[answered] + 1e-6).all()
+        assert (estimate[answered] <= high[answered] + 1e-6).all()
+
+
+def test_top2box_is_nan_for_categorical_questions(year_tensor):
+    result = bootstrap_tensor(year_tensor, n_boot=200, seed=1, workers=1)
+    is_likert = np.array([name in LIKERT_COLUMNS for name in year_tensor.questions])
+    assert np.isnan(result.samples["top2box"][..., ~is_likert]).all()
+    assert np.isnan(result.estimates["top2box"][..., ~is_likert]).all()
+    summary = result.summary()
+    assert np.isnan(summary.loc[("3rd year", "Year of Study"), "top2box_high"])
+    assert summary.loc[("3rd year", "Overall Course Quality"), "top2box"] > 0
+
+
+def test_results_do_not_depend_on_the_worker_count(year_tensor, monkeypatch):
+    # Room for 10 cells per block, so the 56 cells make six jobs.
+    monkeypatch.setattr(survey_bootstrap, "_BLOCK_BYTES", 8 * 200 * 5 * 10)
+    serial = bootstrap_tensor(year_tensor, n_boot=200, seed=7, workers=1)
+    pooled = bootstrap_tensor(year_tensor, n_boot=200, seed=7, workers=3)
+    for statistic in ["mean", "top2box"]:
+        np.testing.assert_array_equal(
+            serial.samples[statistic], pooled.samples[statistic]
+        )
+    other = bootstrap_tensor(year_tensor, n_boot=200, seed=8, workers=1)
+    assert not np.array_equal(serial.samples["mean"], other.samples["mean"])
+
+
+def test_difference_of_a_segment_with_itself_is_zero(year_tensor):
+    result = bootstrap_tensor(year_tensor, n_boot=200, seed=1, workers=1)
+    table = result.difference("3rd year", "3rd year")
+    assert (table["difference"].dropna() == 0).all()
+    assert (table["p_not_greater"] == 1).all()
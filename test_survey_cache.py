@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+import survey_cache
+from survey_cache import TEXT_COLUMNS, open_cache
+from survey_loader import load_survey
+from survey_tally import tally_survey
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def copy_survey(tmp_path):
+    path = tmp_path / "data.csv"
+    with open(DATA, "rb") as fh:
+        path.write_bytes(fh.read())
+    return str(path)
+
+
+def no_rebuild(source, directory=None):
+    pytest.fail("cache was rebuilt")
+
+
+def test_cache_matches_the_csv(tmp_path):
+    path = copy_survey(tmp_path)
+    cache = open_cache(path)
+    survey = load_survey(path)
+    assert cache.n_rows == len(survey)
+    assert cache.tally().to_frame().equals(tally_survey(path).to_frame())
+    np.testing.assert_array_equal(
+        cache["timestamp"], survey["timestamp"].to_numpy("datetime64[s]")
+    )
+    for name in TEXT_COLUMNS:
+        assert cache.text(name).tolist() == survey[name].fillna("").tolist()
+
+
+def test_fresh_cache_is_reused(tmp_path, monkeypatch):
+    path = copy_survey(tmp_path)
+    open_cache(path)
+    monkeypatch.setattr(survey_cache, "build_cache", no_rebuild)
+    assert open_cache(path).n_rows == 86
+
+
+def test_touched_source_keeps_its_cache(tmp_path, monkeypatch):
+    path = copy_survey(tmp_path)
+    open_cache(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    monkeypatch.setattr(survey_cache, "build_cache", no_rebuild)
+    assert open_cache(path).manifest["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+
+def test_changed_source_rebuilds_the_cache(tmp_path):
+    path = copy_survey(tmp_path)
+    assert open_cache(path).n_rows == 86
+    with open(path, "ab") as fh:
+        fh.write(b"\n2/19/2025 16:00:00,3rd year,CSE,Self-Study")
+    assert open_cache(path).n_rows == 87
+
+
+def test_same_size_edit_rebuilds_the_cache(tmp_path):
+    path = copy_survey(tmp_path)
+    before = open_cache(path)["year"].copy()
+    with open(path, "rb") as fh:
+        text = fh.read()
+    edited = text.replace(b",3rd year,", b",1st year,", 1)
+    assert len(edited) == len(text)
+    stat = os.stat(path)
+    with open(path, "wb") as fh:
+        fh.write(edited)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    after = open_cache(path)["year"]
+    assert (after != before).sum() == 1
+
+
+def test_version_bump_rebuilds_the_cache(tmp_path, monkeypatch):
+    path = copy_survey(tmp_path)
+    open_cache(path)
+    monkeypatch.setattr(survey_cache, "CACHE_VERSION", survey_cache.CACHE_VERSION + 1)
+    assert open_cache(path).manifest["version"] == survey_cache.CACHE_VERSION
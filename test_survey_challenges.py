@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from survey_challenges import (
+    OPTIONS,
+    OTHER,
+    cooccurrence,
+    count_all,
+    count_any,
+    encode_challenges,
+    mask_of,
+    option_counts,
+    parse_selection,
+    popcount,
+)
+
+
+def test_selections_become_bitmasks():
+    assert parse_selection("Time management") == mask_of("Time management")
+    assert parse_selection(" difficult course material,Time management, ") == mask_of(
+        "Difficult course material", "Time management"
+    )
+    assert parse_selection("Exams, Time management") == mask_of(
+        OTHER, "Time management"
+    )
+    assert parse_selection("") == 0
+
+
+def test_counts_match_a_row_by_row_loop():
+    answers = pd.Series(
+        [
+            "Difficult course material, Time management",
+            "Time management",
+            None,
+            "Personal motivation, Hostel food",
+            "Time management",
+        ]
+    )
+    masks = encode_challenges(answers)
+    # Difficult, Ineffective, Lack of resources, Time, Motivation, Other
+    expected = [1, 0, 0, 3, 1, 1]
+    assert option_counts(masks).tolist() == expected
+    np.testing.assert_array_equal(np.diag(cooccurrence(masks)), expected)
+    assert popcount(masks).tolist() == [2, 1, 0, 2, 1]
+    assert count_all(masks, "Difficult course material", "Time management") == 1
+    assert count_any(masks, "Personal motivation", "Time management") == 4
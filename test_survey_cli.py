@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from survey_cli import DEFAULT_BUDGET_MS, HEAVY_MODULES, main, parse_import_times
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, "data.csv")
+
+
+def run_importtime(*argv):
+    command = [sys.executable, "-X", "importtime", "survey_cli.py"] + list(argv)
+    result = subprocess.run(command, capture_output=True, text=True, cwd=HERE)
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["tally", "--help"]])
+def test_startup_stays_within_the_import_budget(argv):
+    result = run_importtime(*argv)
+    assert "usage:" in result.stdout
+    total_ms, heavy = parse_import_times(result.stderr)
+    assert 0 < total_ms <= DEFAULT_BUDGET_MS
+    assert heavy == []
+    for name in HEAVY_MODULES:
+        assert "| %s\n" % name not in result.stderr
+
+
+def test_parse_import_times_counts_top_level_modules_once():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |   numpy.core\n"
+        "import time:       500 |       2500 | numpy\n"
+        "import time:      1000 |       1000 | json\n"
+    )
+    assert parse_import_times(stderr) == (3.5, ["numpy"])
+
+
+def test_tally_prints_the_response_table(capsys):
+    assert main(["tally", DATA, "--question", "year"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[3].split() == ["Year", "of", "Study", "3", "52"]
+
+
+def copy_survey(tmp_path, name):
+    path = tmp_path / name
+    with open(DATA, "rb") as fh:
+        path.write_bytes(fh.read())
+    return str(path)
+
+
+def test_crosstab_counts_every_path(tmp_path, capsys):
+    first, second = copy_survey(tmp_path, "a.csv"), copy_survey(tmp_path, "b.csv")
+    assert main(["crosstab", first, "--pair", "year", "workload"]) == 0
+    single = capsys.readouterr().out.splitlines()
+    assert main(["crosstab", first, second, "--pair", "year", "workload"]) == 0
+    double = capsys.readouterr().out.splitlines()
+    assert [int(v) * 2 for v in single[2].split()[2:]] == [
+        int(v) for v in double[2].split()[2:]
+    ]
+
+
+def test_stats_by_segment_counts_every_path(tmp_path, capsys):
+    first, second = copy_survey(tmp_path, "a.csv"), copy_survey(tmp_path, "b.csv")
+    main(["stats", first, "--segment", "year"])
+    single = capsys.readouterr().out.splitlines()
+    main(["stats", str(tmp_path), "--segment", "year"])
+    double = capsys.readouterr().out.splitlines()
+    # "1st year  Year of Study  n  mean  std  top2box"
+    assert int(double[2].split()[5]) == 2 * int(single[2].split()[5])
+    main(["stats", first, second, "--cached"])
+    cached = capsys.readouterr().out
+    main(["stats", first, second])
+    assert capsys.readouterr().out == cached
+
+
+def test_plot_figures_use_the_same_sources(tmp_path, monkeypatch):
+    import survey_render
+
+    first, second = copy_survey(tmp_path, "a.csv"), copy_survey(tmp_path, "b.csv")
+    seen = []
+    monkeypatch.setattr(
+        survey_render,
+        "render_report",
+        lambda specs, **kwargs: seen.append(specs) or {"rendered": [], "skipped": []},
+    )
+    main(["plot", first, second, "--workers", "1", "--out", str(tmp_path)])
+    specs = {spec["name"]: spec for spec in seen[0]}
+    overview = specs["response_vs_count"]["data"]
+    year_counts = [
+        count
+        for question, count in zip(overview["Question"], overview["Count"])
+        if question == "Year of Study"
+    ]
+    assert specs["question_year"]["data"]["counts"] == year_counts
+    assert sum(year_counts) == 2 * 86
+
+
+@pytest.mark.parametrize("option", ["--cached", "--workers=2"])
+def test_submit_has_no_data_options(option):
+    with pytest.raises(SystemExit):
+        main(["submit", DATA, option])
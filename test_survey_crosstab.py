@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from survey_crosstab import chi2_sf, pairwise_survey
+from survey_loader import LIKERT_COLUMNS, QUESTION_LABELS, load_survey
+from survey_tally import CODED_COLUMNS, LEVELS
+
+stats = pytest.importorskip("scipy.stats")
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+@pytest.fixture(scope="module")
+def survey():
+    return load_survey(DATA, columns=CODED_COLUMNS)
+
+
+@pytest.fixture(scope="module")
+def associations():
+    return pairwise_survey(DATA).associations()
+
+
+def test_chi2_sf_matches_scipy():
+    for dof in [1, 2, 3, 7, 16, 40]:
+        for x in [0.01, 0.5, 1.0, 3.0, 10.0, 35.0, 120.0]:
+            assert chi2_sf(x, dof) == pytest.approx(
+                stats.chi2.sf(x, dof), rel=1e-9, abs=1e-300
+            )
+    assert chi2_sf(0.0, 3) == 1.0
+    assert np.isnan(chi2_sf(1.0, 0))
+
+
+def test_table_matches_pandas_crosstab(survey):
+    pairs = pairwise_survey(DATA, chunksize=7)
+    table = pairs.table("year", "overall_quality")
+    expected = pd.crosstab(survey["year"], survey["overall_quality"])
+    expected = expected.reindex(
+        index=LEVELS["year"], columns=LEVELS["overall_quality"], fill_value=0
+    )
+    np.testing.assert_array_equal(table.to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("year", "study_method"),
+        ("overall_quality", "instructor_satisfaction"),
+        ("course_materials", "attend_lectures"),
+    ],
+)
+def test_chi2_matches_scipy(survey, associations, a, b):
+    observed = pd.crosstab(survey[a], survey[b]).to_numpy()
+    observed = observed[observed.sum(axis=1) > 0][:, observed.sum(axis=0) > 0]
+    chi2, p_value, dof, _ = stats.chi2_contingency(observed, correction=False)
+    label_a, label_b = QUESTION_LABELS[a], QUESTION_LABELS[b]
+    assert associations["chi2"].loc[label_a, label_b] == pytest.approx(chi2)
+    assert associations["dof"].loc[label_a, label_b] == dof
+    assert associations["p_value"].loc[label_a, label_b] == pytest.approx(p_value)
+    assert associations["chi2"].loc[label_b, label_a] == pytest.approx(chi2)
+
+
+def test_spearman_matches_scipy(survey, associations):
+    for a, b in zip(LIKERT_COLUMNS, LIKERT_COLUMNS[1:]):
+        both = survey[[a, b]].dropna().astype(float)
+        rho = stats.spearmanr(both[a], both[b]).statistic
+        got = associations["spearman"].loc[QUESTION_LABELS[a], QUESTION_LABELS[b]]
+        assert got == pytest.approx(rho)
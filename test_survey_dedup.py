@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from survey_dedup import EXACT, NEAR, Deduplicator, _SeenHashes
+from survey_loader import load_survey
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def resubmitted():
+    df = load_survey(DATA)
+    again = df.iloc[:5].copy()
+    changed = df.iloc[5:10].copy()
+    changed["overall_quality"] = changed["overall_quality"].fillna(1) % 5 + 1
+    return df, pd.concat([again, changed], ignore_index=True)
+
+
+def test_repeats_are_dropped_and_resubmissions_flagged():
+    df, extra = resubmitted()
+    dedup = Deduplicator()
+    kept = [dedup.filter(df), dedup.filter(extra)]
+    assert sum(len(chunk) for chunk in kept) == 86 + 5
+    flagged = dedup.duplicates()
+    exact = flagged[flagged["Kind"] == EXACT]
+    assert exact["DuplicateOf"].tolist() == [0, 1, 2, 3, 4]
+    near = flagged[flagged["Kind"] == NEAR]
+    # A changed rating moves one feature, which the MinHash estimate of the
+    # similarity may or may not put under the threshold.
+    assert len(near) >= 3
+    assert (near["DuplicateOf"] == near["Row"] - 86).all()
+
+
+def test_small_inputs_use_small_tables():
+    dedup = Deduplicator()
+    dedup.filter(load_survey(DATA))
+    assert dedup.nbytes < 1 << 20
+
+
+def test_growing_tables_match_full_size_ones():
+    df, extra = resubmitted()
+    grown = Deduplicator()
+    for chunk in (df.iloc[:40], df.iloc[40:], extra):
+        grown.filter(chunk)
+    full = Deduplicator()
+    full._reserve(full.band_slots)
+    for chunk in (df.iloc[:40], df.iloc[40:], extra):
+        full.filter(chunk)
+    pd.testing.assert_frame_equal(grown.duplicates(), full.duplicates())
+
+
+def test_seen_hashes_forget_the_oldest_half():
+    seen = _SeenHashes(max_hashes=100)
+    for start in range(0, 150, 10):
+        rows = np.arange(start, start + 10)
+        seen.add(rows.astype(np.uint64) * 7919, rows)
+    assert len(seen) <= 100
+    found = seen.lookup(np.arange(150, dtype=np.uint64) * 7919)
+    assert (found[-50:] == np.arange(100, 150)).all()
+    assert (found[:50] == -1).all()
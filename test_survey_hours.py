@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from survey_hours import COERCED, MISSING, PARSED, REJECTED, parse_hours
+from survey_tally import parse_study_hours
+
+
+def test_spellings_are_parsed_and_classified():
+    answers = pd.Series(
+        ["9", " 12.5 ", "12 hours", "4-5 hrs", "3 to 4", "2 hours per day", "CSE"]
+        + ["200", None]
+    )
+    parsed = parse_hours(answers)
+    np.testing.assert_array_equal(
+        parsed.low, [9, 12.5, 12, 4, 3, 14, np.nan, np.nan, np.nan]
+    )
+    np.testing.assert_array_equal(
+        parsed.high, [9, 12.5, 12, 5, 4, 14, np.nan, np.nan, np.nan]
+    )
+    assert list(parsed.status) == [PARSED, PARSED] + [COERCED] * 4 + [
+        REJECTED,
+        REJECTED,
+        MISSING,
+    ]
+    assert parsed.report() == {"parsed": 2, "coerced": 4, "rejected": 2, "missing": 1}
+
+
+def test_whole_hours_round_ranges_half_up():
+    hours, _ = parse_study_hours(pd.Series(["4-5 hrs", "2.5", "CSE", None]))
+    assert hours.tolist() == [5, 3, -1, -1]
+    assert hours.dtype == np.int16
+
+
+def test_repeated_spellings_reuse_the_parse():
+    answers = pd.Series(["4-5 hrs", "9"] * 1000)
+    assert parse_hours(answers).midpoint[:2].tolist() == [4.5, 9.0]
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+
+from survey_loader import (
+    COLUMN_NAMES,
+    TIMESTAMP_FORMAT,
+    iter_survey,
+    load_survey,
+    parse_timestamps,
+)
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def header_only(tmp_path):
+    path = tmp_path / "header.csv"
+    with open(DATA, "rb") as fh:
+        path.write_bytes(fh.readline())
+    return str(path)
+
+
+def test_load_survey_types_every_column():
+    df = load_survey(DATA)
+    assert list(df.columns) == COLUMN_NAMES
+    assert len(df) == 86
+    assert str(df["overall_quality"].dtype) == "Int8"
+    assert df["year"].cat.ordered
+    assert df["timestamp"].notna().all()
+
+
+def test_header_only_file_yields_no_rows(tmp_path):
+    chunks = list(iter_survey(header_only(tmp_path)))
+    assert sum(len(chunk) for chunk in chunks) == 0
+
+
+def test_parse_timestamps_of_nothing():
+    assert len(parse_timestamps(pd.Series([], dtype=object))) == 0
+
+
+def test_parse_timestamps_matches_pandas_at_the_edges():
+    values = pd.Series(
+        [
+            "2/18/2025 0:09:44",
+            "2/18/9999 0:09:44",  # past the datetime64[ns] range
+            "12/31/1677 23:59:59",
+            "1/1/0001 0:00:00",
+            "1/1/0000 0:00:00",  # no year 0
+            "2/29/2024 1:02:03",
+            "2/29/2023 1:02:03",  # not a leap year
+            "13/1/2025 0:00:00",
+            "2/18/2025 24:00:00",
+            "2/18/25 0:09:44",
+            "2/18/2025 0:09:44 ",
+            "garbage",
+            None,
+        ]
+    )
+    expected = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors="coerce")
+    pd.testing.assert_series_equal(parse_timestamps(values), expected)
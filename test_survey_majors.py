@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from survey_majors import OTHER, MajorCanonicalizer
+
+CSE = "Computer Science and Engineering"
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("CSE", CSE),
+        ("B.Tech (Computer Science & Engg)", CSE),
+        ("Computer science ", CSE),
+        ("mechantronics", "Mechatronics"),
+        ("Mech", "Mechanical Engineering"),
+        ("Civil Engg.", "Civil Engineering"),
+        ("AI & DS", "Artificial Intelligence and Data Science"),
+    ],
+)
+def test_spellings_of_a_program_match(raw, expected):
+    assert MajorCanonicalizer().match(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "Chemical engineering",
+        "Chemical Engg",
+        "Aerospace engineering",
+        "Biotechnology",
+        "Engineering",
+        "Science and technology",
+    ],
+)
+def test_shared_generic_words_are_not_a_match(raw):
+    assert MajorCanonicalizer().match(raw) == OTHER
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "majors.json")
+    first = MajorCanonicalizer(path)
+    majors = first.canonicalize(pd.Series(["CSE", None, "cse", "CSE"]))
+    assert majors.tolist()[0] == CSE and pd.isna(majors.iloc[1])
+    first.save()
+    second = MajorCanonicalizer(path)
+    second.canonicalize(pd.Series(["CSE", "cse"]))
+    assert second.matched == 0
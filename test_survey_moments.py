@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from survey_loader import load_survey
+from survey_moments import (
+    QuantileDigest,
+    QuestionMoments,
+    SurveyMoments,
+    chunk_values,
+    moments_survey,
+)
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def test_split_merge_equals_one_pass():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(1000, 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    whole = QuestionMoments(["a", "b", "c"]).update(values)
+    parts = QuestionMoments(["a", "b", "c"])
+    for block in np.array_split(values, 7):
+        parts.merge(QuestionMoments(["a", "b", "c"]).update(block))
+    np.testing.assert_array_equal(parts.count, whole.count)
+    np.testing.assert_allclose(parts.mean, np.nanmean(values, axis=0))
+    np.testing.assert_allclose(parts.variance(), np.nanvar(values, axis=0))
+    np.testing.assert_allclose(parts.variance(1), whole.variance(1))
+
+
+def test_digest_is_exact_on_discrete_answers():
+    values = np.repeat([1.0, 2.0, 3.0, 4.0, 5.0], [3, 10, 40, 30, 17])
+    digest = QuantileDigest()
+    for block in np.array_split(values, 5):
+        digest.merge(QuantileDigest().add(block))
+    q = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]
+    np.testing.assert_allclose(digest.quantile(q), np.quantile(values, q))
+
+
+def test_digest_bounds_its_size_on_continuous_values():
+    values = np.random.default_rng(1).exponential(size=100_000)
+    digest = QuantileDigest(compression=100)
+    for block in np.array_split(values, 20):
+        digest.add(block)
+    assert len(digest.means) <= 100
+    assert digest.count == len(values)
+    q = np.array([0.01, 0.5, 0.99])
+    estimate = digest.quantile(q, values.min(), values.max())
+    np.testing.assert_allclose(estimate, np.quantile(values, q), rtol=0.02)
+
+
+@pytest.mark.parametrize(
+    "questions, segment",
+    [(["overall_quality"], None), (["study_hours"], "year"), (None, "year")],
+)
+def test_question_subsets(questions, segment):
+    moments = moments_survey(DATA, segment=segment, questions=questions, workers=1)
+    full = SurveyMoments(segment).update(load_survey(DATA))
+    for name in moments.questions:
+        j, k = moments.questions.index(name), full.questions.index(name)
+        assert moments.overall.count[j] == full.overall.count[k]
+        assert moments.overall.mean[j] == pytest.approx(full.overall.mean[k])
+    if segment:
+        counts = sum(m.count for m in moments.segments.values())
+        np.testing.assert_array_equal(counts, moments.overall.count)
+
+
+def test_chunk_values_marks_missing_answers():
+    df = load_survey(DATA)
+    values = chunk_values(df, ["overall_quality", "study_hours"])
+    assert values.shape == (86, 2)
+    assert np.isnan(values[:, 0]).sum() == df["overall_quality"].isna().sum()
+
+
+def test_pooled_moments_match_a_serial_run():
+    pooled = moments_survey(DATA, segment="year", workers=2, chunksize=50)
+    serial = moments_survey(DATA, segment="year", workers=1)
+    np.testing.assert_array_equal(pooled.overall.count, serial.overall.count)
+    np.testing.assert_allclose(pooled.overall.mean, serial.overall.mean)
+    np.testing.assert_allclose(pooled.overall.variance(), serial.overall.variance())
+    for label, moments in serial.segments.items():
+        np.testing.assert_array_equal(pooled.segments[label].count, moments.count)
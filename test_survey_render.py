@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from survey_render import question_specs, render_report
+from survey_tally import tally_survey
+from survey_tensor import CountTensor
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def bar_spec(name, counts):
+    return {
+        "kind": "bar",
+        "name": name,
+        "title": name,
+        "data": {"labels": ["a", "b"], "counts": counts},
+        "options": {"ylabel": "Count"},
+    }
+
+
+def test_unchanged_figures_are_skipped(tmp_path):
+    out_dir = str(tmp_path)
+    specs = [bar_spec("first", [1, 2]), bar_spec("second", [3, 4])]
+    first = render_report(specs, out_dir=out_dir, workers=1)
+    assert len(first["rendered"]) == 2 and first["skipped"] == []
+
+    again = render_report(specs, out_dir=out_dir, workers=1)
+    assert again["rendered"] == [] and len(again["skipped"]) == 2
+
+    specs[1] = bar_spec("second", [3, 5])
+    changed = render_report(specs, out_dir=out_dir, workers=1)
+    assert changed["rendered"] == [os.path.join(out_dir, "second.png")]
+    assert changed["skipped"] == [os.path.join(out_dir, "first.png")]
+
+    forced = render_report(specs, out_dir=out_dir, workers=1, force=True)
+    assert len(forced["rendered"]) == 2
+
+
+def test_deleted_figure_is_rendered_again(tmp_path):
+    out_dir = str(tmp_path)
+    specs = [bar_spec("first", [1, 2])]
+    render_report(specs, out_dir=out_dir, workers=1)
+    os.remove(os.path.join(out_dir, "first.png"))
+    assert len(render_report(specs, out_dir=out_dir, workers=1)["rendered"]) == 1
+
+
+def test_duplicate_names_are_rejected(tmp_path):
+    specs = [bar_spec("same", [1, 2]), bar_spec("same", [3, 4])]
+    with pytest.raises(ValueError):
+        render_report(specs, out_dir=str(tmp_path), workers=1)
+
+
+def test_segment_slugs_do_not_collide():
+    tensor = CountTensor.from_tally(tally_survey(DATA))
+    counts = np.stack([tensor.counts, tensor.counts, tensor.counts])
+    segmented = CountTensor(counts, tensor.questions, "wave", ["A/B", "a b", ""])
+    names = [spec["name"] for spec in question_specs(segmented)]
+    assert len(names) == len(set(names)) == 3 * len(tensor.questions)
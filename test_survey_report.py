@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from survey_report import ReportWriter, as_table
+
+
+def test_as_table_leaves_the_caller_alone():
+    df = pd.DataFrame({1: [1, 2], "b": [3, 4]})
+    table = as_table(df)
+    assert list(table.columns) == ["1", "b"]
+    assert list(df.columns) == [1, "b"]
+
+
+def test_as_table_moves_a_named_index_to_columns():
+    counts = pd.Series([3, 5], index=pd.Index(["x", "y"], name="answer"), name="n")
+    table = as_table(counts)
+    assert list(table.columns) == ["answer", "n"]
+    assert as_table({"a": 1}) is None
+    assert as_table(np.arange(4)).shape == (4, 1)
+
+
+def test_writer_streams_every_format(tmp_path):
+    out_dir = str(tmp_path)
+    with ReportWriter(out_dir, console=False, html_rows=2) as report:
+        report.section("Answer counts", pd.DataFrame({"answer": list("abc")}))
+        report.section("Responses", 86)
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").open()]
+    assert [line["section"] for line in lines] == ["answer_counts"] * 3 + ["responses"]
+    assert lines[-1]["value"] == 86
+    assert pd.read_csv(tmp_path / "answer_counts.csv")["answer"].tolist() == [
+        "a",
+        "b",
+        "c",
+    ]
+    page = (tmp_path / "report.html").read_text()
+    assert "First 2 of 3 rows" in page and page.endswith("</html>\n")
+
+
+def test_duplicate_sections_are_rejected():
+    report = ReportWriter(console=False)
+    report.section("a", 1)
+    with pytest.raises(ValueError):
+        report.section("A", 2)
+
+
+def test_empty_arrays_are_tables():
+    assert as_table(np.array([])).shape == (0, 1)
+    assert as_table(np.zeros((0, 3))).shape == (0, 3)
+    assert as_table(np.zeros((2, 3, 4))).shape == (2, 12)
+    assert as_table(np.float64(1.5)) is None
+    assert as_table(np.array(2)) is None
+
+
+def test_empty_table_section(tmp_path, capsys):
+    with ReportWriter(str(tmp_path)) as report:
+        report.section("nothing", np.array([]))
+        report.section("scalar", np.array(3))
+    assert "nothing" in capsys.readouterr().out
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").open()]
+    assert lines == [{"section": "scalar", "value": 3}]
+    assert (tmp_path / "nothing.csv").read_text().strip() == "0"
+
+
+def test_section_column_does_not_clash_with_the_tag(tmp_path):
+    table = pd.DataFrame({"section": ["A", "B"], "section_": [1, 2], "n": [3, 4]})
+    with ReportWriter(str(tmp_path), console=False) as report:
+        report.section("parts", table)
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").open()]
+    assert lines[0] == {"section": "parts", "section_": "A", "section__": 1, "n": 3}
+    assert list(pd.read_csv(tmp_path / "parts.csv").columns) == list(table.columns)
+    assert list(table.columns) == ["section", "section_", "n"]
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from survey_challenges import OPTIONS, encode_challenges
+from survey_loader import load_survey
+from survey_segments import SegmentIndex, any_of, question_levels, where
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory):
+    # Two copies: 172 rows, so batches straddle the 64-row words.
+    directory = tmp_path_factory.mktemp("segments")
+    paths = []
+    for name in ["a.csv", "b.csv"]:
+        path = directory / name
+        path.write_bytes(open(DATA, "rb").read())
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture(scope="module")
+def survey(sources):
+    return pd.concat([load_survey(path) for path in sources], ignore_index=True)
+
+
+SEGMENTS = [
+    (where(), lambda s: pd.Series(True, index=s.index)),
+    (where(year="3rd year"), lambda s: s["year"] == "3rd year"),
+    (
+        where(year="3rd year", attend_lectures="Always", overall_quality=">=4"),
+        lambda s: (s["year"] == "3rd year")
+        & (s["attend_lectures"] == "Always")
+        & (s["overall_quality"] >= 4),
+    ),
+    (
+        where(year=["1st year", "2nd year"]) | where(course_materials="<3"),
+        lambda s: s["year"].isin(["1st year", "2nd year"])
+        | (s["course_materials"] < 3),
+    ),
+    (
+        where(year=">= 3rd year") & where(instructor_explains=5),
+        lambda s: s["year"].isin(["3rd year", "4th year"])
+        & (s["instructor_explains"] == 5),
+    ),
+    (
+        where(biggest_challenges="Time management"),
+        lambda s: pd.Series(
+            encode_challenges(s["biggest_challenges"])
+            & (1 << OPTIONS.index("Time management"))
+            > 0,
+            index=s.index,
+        ),
+    ),
+]
+
+
+@pytest.mark.parametrize("chunksize", [None, 7, 64, 65])
+def test_segment_counts_match_pandas(sources, survey, chunksize):
+    index = SegmentIndex.from_survey(sources, chunksize=chunksize)
+    assert index.n_rows == len(survey) == 172
+    for segment, select in SEGMENTS:
+        selected = select(survey).fillna(False).to_numpy(dtype=bool)
+        assert index.count(segment) == selected.sum(), segment
+        np.testing.assert_array_equal(index.rows(segment), np.flatnonzero(selected))
+        for question in ["year", "overall_quality", "attend_lectures"]:
+            expected = (
+                survey.loc[selected, question]
+                .value_counts()
+                .reindex(question_levels(question), fill_value=0)
+            )
+            np.testing.assert_array_equal(
+                index.counts(question, segment), expected.to_numpy()
+            )
+
+
+def test_filters_are_canonical_and_cached(sources):
+    index = SegmentIndex.from_survey(sources)
+    a = where(year="3rd year", overall_quality=">=4")
+    b = where(overall_quality=[4, 5]) & where(year="3rd year")
+    assert a == b and hash(a) == hash(b)
+    index.count(a)
+    misses = index.misses
+    index.count(b)
+    assert index.misses == misses and index.hits > 0
+    assert any_of(a, where(year="1st year")) == a | where(year="1st year")
+    assert index.count(where(year="1st year") & where(year="2nd year")) == 0
+
+
+def test_unknown_levels_are_rejected():
+    with pytest.raises(ValueError):
+        where(year="5th year")
+    with pytest.raises(KeyError):
+        where(nonsense=1)
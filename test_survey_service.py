@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from survey_service import (
+    ServiceThread,
+    SurveyClient,
+    SurveyService,
+    survey_responses,
+    validate_response,
+)
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def first_responses(n):
+    return next(survey_responses(DATA))[:n]
+
+
+def serve(wal_path, responses):
+    with ServiceThread(wal_path) as running:
+        with SurveyClient(port=running.port) as client:
+            assert client.submit(responses) == len(responses)
+            return client.stats()
+
+
+def test_responses_survive_a_restart(tmp_path):
+    wal_path = str(tmp_path / "responses.wal")
+    stats = serve(wal_path, first_responses(10))
+    assert stats["n_responses"] == 10
+    assert serve(wal_path, first_responses(5))["n_responses"] == 15
+
+
+def test_invalid_submissions_are_rejected_whole(tmp_path):
+    with ServiceThread(str(tmp_path / "responses.wal")) as running:
+        with SurveyClient(port=running.port) as client:
+            with pytest.raises(ValueError, match="response 1: overall_quality"):
+                client.submit([{"year": "1st year"}, {"overall_quality": 9}])
+            assert client.stats()["n_responses"] == 0
+
+
+def test_replay_skips_corrupt_lines(tmp_path):
+    wal_path = str(tmp_path / "responses.wal")
+    service = SurveyService(wal_path)
+    service.open()
+    service.commit([validate_response(r) for r in first_responses(3)])
+    service._wal.close()
+    with open(wal_path, "ab") as fh:
+        fh.write(b'garbage\n[1, 2]\n{"year": "1st year"}\n')
+    restarted = SurveyService(wal_path)
+    assert restarted.open() == 3
+    assert restarted.skipped_lines == 3
+    assert restarted.store.tally.n_responses == 3
+    assert b'"skipped_log_lines":3' in restarted.stats()
+
+
+def test_failed_commit_is_not_replayed(tmp_path, monkeypatch):
+    wal_path = str(tmp_path / "responses.wal")
+    service = SurveyService(wal_path)
+    service.open()
+    records = [validate_response(r) for r in first_responses(4)]
+    service.commit(records[:2])
+    size = os.path.getsize(wal_path)
+
+    def fail(*args):
+        raise MemoryError
+
+    monkeypatch.setattr(service.store, "add_codes", fail)
+    with pytest.raises(MemoryError):
+        service.commit(records[2:])
+    monkeypatch.undo()
+    assert os.path.getsize(wal_path) == size
+    service.commit(records[3:])
+    service._wal.close()
+
+    restarted = SurveyService(wal_path)
+    assert restarted.open() == 3
+    assert restarted.store.tally.n_responses == 3
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from survey_loader import LIKERT_COLUMNS, QUESTION_LABELS, load_survey
+from survey_stats import histogram_stats, question_stats, weighted_quantile
+from survey_tally import tally_survey
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def test_quantile_matches_numpy_on_expanded_answers():
+    rng = np.random.default_rng(0)
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    q = np.linspace(0, 1, 21)
+    for _ in range(50):
+        counts = rng.integers(0, 6, size=5)
+        if counts.sum() == 0:
+            continue
+        expanded = np.repeat(values, counts)
+        np.testing.assert_allclose(
+            weighted_quantile(values, counts, q), np.quantile(expanded, q)
+        )
+
+
+def test_quantile_of_an_empty_histogram_is_nan():
+    assert np.isnan(weighted_quantile([1, 2], [0, 0], 0.5))
+    assert np.isnan(weighted_quantile([1, 2], [0, 0], [0.25, 0.75])).all()
+
+
+def test_histogram_stats_match_numpy():
+    values = np.array([1, 2, 3, 4, 5])
+    counts = np.array([3, 0, 7, 5, 2])
+    expanded = np.repeat(values, counts)
+    stats = histogram_stats(values, counts, ddof=1, box_levels=[1, 2, 3, 4, 5])
+    assert stats["n"] == len(expanded)
+    assert stats["mean"] == pytest.approx(expanded.mean())
+    assert stats["median"] == pytest.approx(np.median(expanded))
+    assert stats["q1"] == pytest.approx(np.quantile(expanded, 0.25))
+    assert stats["q3"] == pytest.approx(np.quantile(expanded, 0.75))
+    assert stats["variance"] == pytest.approx(np.var(expanded, ddof=1))
+    assert stats["std"] == pytest.approx(np.std(expanded, ddof=1))
+    assert stats["mode"] == 3
+    assert stats["top2box"] == pytest.approx(7 / 17)
+    assert stats["bottom2box"] == pytest.approx(3 / 17)
+
+
+def test_histogram_stats_without_a_scale_or_answers():
+    stats = histogram_stats([1, 2], [4, 1])
+    assert np.isnan(stats["top2box"]) and np.isnan(stats["bottom2box"])
+    empty = histogram_stats([1, 2], [0, 0], box_levels=[1, 2, 3, 4, 5])
+    assert empty["n"] == 0
+    assert all(np.isnan(value) for key, value in empty.items() if key != "n")
+
+
+def test_question_stats_match_the_raw_answers():
+    frame = question_stats(tally_survey(DATA))
+    survey = load_survey(DATA)
+    for name in LIKERT_COLUMNS:
+        answers = survey[name].dropna().to_numpy(dtype=float)
+        row = frame.loc[QUESTION_LABELS[name]]
+        assert row["n"] == len(answers)
+        assert row["mean"] == pytest.approx(answers.mean())
+        assert row["median"] == pytest.approx(np.median(answers))
+        assert row["variance"] == pytest.approx(answers.var())
+        assert row["top2box"] == pytest.approx((answers >= 4).mean())
+    assert QUESTION_LABELS["biggest_challenges"] not in frame.index
+    assert np.isnan(frame.loc[QUESTION_LABELS["year"], "top2box"])
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+import survey_store
+from survey_store import AggregateStore
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def copy_survey(tmp_path):
+    path = tmp_path / "data.csv"
+    with open(DATA, "rb") as fh:
+        path.write_bytes(fh.read())
+    return str(path)
+
+
+def open_store(path):
+    return AggregateStore.open(path, path + ".agg.npz")
+
+
+def test_refresh_counts_the_file_once(tmp_path):
+    path = copy_survey(tmp_path)
+    store = open_store(path)
+    assert store.refresh() == 86
+    assert store.refresh() == 0
+
+
+def test_refresh_waits_for_a_partial_row(tmp_path):
+    # The export has no trailing newline; a half-written row then makes the
+    # only new complete bytes a lone "\n".
+    path = copy_survey(tmp_path)
+    store = open_store(path)
+    store.refresh()
+    with open(path, "ab") as fh:
+        fh.write(b"\n2/19/2025 16:00:00,3rd year")
+    assert store.refresh() == 0
+    assert store.tally.n_responses == 86
+
+
+ROW = (
+    b"2/19/2025 16:00:00,3rd year,CSE,Hands-on projects,4,4,4,4,4,4,4,4,4,4,"
+    b'10,Frequently,Yes,Time management,More labs,"Great course.\nReally, '
+    b'""great"".\nThanks"'
+)
+
+
+@pytest.mark.parametrize("scan_bytes", [7, 1 << 20])
+def test_refresh_waits_for_a_partial_multiline_row(tmp_path, monkeypatch, scan_bytes):
+    # Small scan blocks carry the quote state across block boundaries.
+    monkeypatch.setattr(survey_store, "_SCAN_BYTES", scan_bytes)
+    path = copy_survey(tmp_path)
+    store = open_store(path)
+    store.refresh()
+    with open(path, "ab") as fh:
+        fh.write(b"\n" + ROW[: ROW.index(b"Thanks")])
+    assert store.refresh() == 0
+    with open(path, "ab") as fh:
+        fh.write(ROW[ROW.index(b"Thanks") :])
+    assert store.refresh() == 1
+    with open(path, "ab") as fh:
+        fh.write(b"\n" + ROW + b"\n")
+    assert store.refresh() == 1
+    assert store.tally.n_responses == 88
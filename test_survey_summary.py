@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from survey_summary import grouped_summary, rank_within, top_k_within
+
+
+def long_table(sizes, seed=0, nan_share=0.0):
+    rng = np.random.default_rng(seed)
+    n = sum(sizes)
+    counts = rng.integers(0, 5, n).astype(float)  # small range: many ties
+    counts[rng.random(n) < nan_share] = np.nan
+    return pd.DataFrame(
+        {
+            "Question": np.repeat(["q%03d" % i for i in range(len(sizes))], sizes),
+            "Response": np.arange(n),
+            "Count": counts,
+        }
+    ).sample(frac=1, random_state=seed, ignore_index=True)
+
+
+def expected_top_k(df, k):
+    ranked = df.dropna(subset=["Count"]).sort_values(
+        ["Question", "Count"], ascending=[True, False], kind="stable"
+    )
+    return ranked.groupby("Question").head(k)
+
+
+@pytest.mark.parametrize(
+    "sizes, nan_share",
+    [
+        ([5, 3, 8], 0.0),
+        ([5, 3, 8], 0.3),
+        ([20_000] + [1] * 500, 0.1),  # one huge group, many tiny ones
+    ],
+)
+def test_matches_pandas(sizes, nan_share):
+    df = long_table(sizes, nan_share=nan_share)
+    summary = grouped_summary(df)
+    grouped = df.groupby("Question")["Count"]
+    expected = grouped.agg(["sum", "mean", "count"])
+    np.testing.assert_allclose(summary.groups["sum"], expected["sum"])
+    np.testing.assert_allclose(summary.groups["mean"], expected["mean"])
+    np.testing.assert_array_equal(summary.groups["count"], expected["count"])
+    np.testing.assert_allclose(
+        summary.rows["Rank"], grouped.rank(method="average", ascending=False)
+    )
+    np.testing.assert_allclose(
+        summary.rows["Share"], df["Count"] / grouped.transform("sum")
+    )
+
+    top = summary.top_k(3)
+    expected_rows = expected_top_k(df, 3)
+    assert top["Response"].tolist() == expected_rows["Response"].tolist()
+    assert top["Question"].tolist() == expected_rows["Question"].tolist()
+    expected_position = expected_rows.groupby("Question").cumcount() + 1
+    assert top["Position"].tolist() == expected_position.tolist()
+
+
+def test_ties_share_the_average_rank_within_their_group_only():
+    groups = np.array([0, 0, 0, 1, 1, 1])
+    values = np.array([7.0, 7.0, 3.0, 7.0, 7.0, 7.0])
+    np.testing.assert_array_equal(
+        rank_within(groups, values), [1.5, 1.5, 3.0, 2.0, 2.0, 2.0]
+    )
+    np.testing.assert_array_equal(
+        rank_within(groups, values, descending=False),
+        [2.5, 2.5, 1.0, 2.0, 2.0, 2.0],
+    )
+
+
+def test_nan_values_are_not_ranked_or_picked():
+    groups = np.array([0, 0, 0, 1])
+    values = np.array([np.nan, 2.0, 5.0, np.nan])
+    ranks = rank_within(groups, values)
+    assert np.isnan(ranks[[0, 3]]).all()
+    np.testing.assert_array_equal(ranks[[1, 2]], [2.0, 1.0])
+    rows, position = top_k_within(groups, values, 5)
+    np.testing.assert_array_equal(rows, [2, 1])
+    np.testing.assert_array_equal(position, [0, 1])
+
+
+def test_ties_in_the_top_k_keep_the_input_order():
+    groups = np.zeros(5, dtype=np.int64)
+    values = np.array([1.0, 4.0, 4.0, 4.0, 2.0])
+    rows, _ = top_k_within(groups, values, 2)
+    np.testing.assert_array_equal(rows, [1, 2])
+
+
+def test_integer_counts_keep_their_dtype():
+    df = pd.DataFrame(
+        {"Question": ["a", "a", "b"], "Response": [1, 2, 1], "Count": [3, 4, 5]}
+    )
+    summary = grouped_summary(df)
+    assert summary.groups["sum"].tolist() == [7, 5]
+    assert summary.groups["sum"].dtype == df["Count"].dtype
+    assert summary.top_k(1)["Count"].dtype == df["Count"].dtype
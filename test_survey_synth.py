@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from survey_loader import CATEGORY_LEVELS, LIKERT_COLUMNS, load_survey, read_header
+from survey_synth import generate_survey
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def test_header_matches_the_export(tmp_path):
+    path = generate_survey(str(tmp_path / "synth.csv"), 10)
+    assert read_header(path) == read_header(DATA)
+
+
+def test_rows_load_like_the_export(tmp_path):
+    path = generate_survey(str(tmp_path / "synth.csv"), 500, chunk_rows=120)
+    survey = load_survey(path)
+    assert len(survey) == 500
+    assert survey["timestamp"].is_monotonic_increasing
+    for name, levels in CATEGORY_LEVELS.items():
+        assert set(survey[name].dropna()) <= set(levels)
+    for name in LIKERT_COLUMNS:
+        assert survey[name].between(1, 5).all()
+    assert survey["biggest_challenges"].notna().all()
+
+
+def test_same_seed_gives_the_same_file(tmp_path):
+    first = generate_survey(str(tmp_path / "a.csv"), 300, seed=3)
+    second = generate_survey(str(tmp_path / "b.csv"), 300, seed=3)
+    other = generate_survey(str(tmp_path / "c.csv"), 300, seed=4)
+    with open(first, "rb") as a, open(second, "rb") as b, open(other, "rb") as c:
+        text = a.read()
+        assert text == b.read()
+        assert text != c.read()
+
+
+def test_empty_survey_has_only_the_header(tmp_path):
+    path = generate_survey(str(tmp_path / "empty.csv"), 0)
+    assert read_header(path) == read_header(DATA)
+    assert len(load_survey(path)) == 0
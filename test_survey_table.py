@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from survey_loader import CATEGORY_COLUMNS, LIKERT_COLUMNS, iter_survey, load_survey
+from survey_table import TEXT_COLUMNS, RespondentTable, pack_codes, unpack_codes
+from survey_tally import CODED_COLUMNS, tally_survey
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def test_pack_unpack_round_trip():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 16, size=(257, len(CODED_COLUMNS)), dtype=np.uint8)
+    packed = pack_codes(codes)
+    assert packed.shape == (257, (len(CODED_COLUMNS) + 1) // 2)
+    np.testing.assert_array_equal(unpack_codes(packed), codes)
+
+
+@pytest.mark.parametrize("chunksize", [None, 10])
+def test_to_frame_matches_load_survey(chunksize):
+    table = RespondentTable.from_survey(DATA, chunksize=chunksize)
+    frame = table.to_frame()
+    survey = load_survey(DATA)
+    assert len(table) == len(survey) == 86
+    assert table.bytes_per_respondent() == 16
+    np.testing.assert_array_equal(
+        frame["timestamp"].to_numpy("datetime64[s]"),
+        survey["timestamp"].to_numpy("datetime64[s]"),
+    )
+    for name in LIKERT_COLUMNS:
+        assert frame[name].equals(survey[name])
+    for name in CATEGORY_COLUMNS + ["major"]:
+        assert (
+            frame[name].astype(object).fillna("").tolist()
+            == survey[name].astype(object).fillna("").tolist()
+        )
+    for name in TEXT_COLUMNS:
+        assert frame[name].fillna("").tolist() == survey[name].fillna("").tolist()
+    assert table.tally().to_frame().equals(tally_survey(DATA).to_frame())
+
+
+def test_empty_table():
+    table = RespondentTable.from_chunks([])
+    assert len(table) == 0
+    assert table.bytes_per_respondent() == 0
+    frame = table.to_frame()
+    assert len(frame) == 0
+    assert table.tally().n_responses == 0
+
+
+@pytest.mark.parametrize("stamp", ["1999-12-31 23:59:59", "2136-02-07 06:28:15"])
+def test_timestamps_outside_the_uint32_range_are_rejected(stamp):
+    chunk = next(iter_survey(DATA))
+    chunk.loc[3, "timestamp"] = pd.Timestamp(stamp)
+    with pytest.raises(ValueError):
+        RespondentTable.from_chunks([chunk])
+
+
+def test_timestamps_at_the_range_ends_round_trip():
+    chunk = next(iter_survey(DATA))
+    chunk.loc[0, "timestamp"] = pd.Timestamp("2000-01-01 00:00:00")
+    chunk.loc[1, "timestamp"] = pd.Timestamp("2136-02-07 06:28:14")
+    chunk.loc[2, "timestamp"] = pd.NaT
+    stamps = RespondentTable.from_chunks([chunk]).timestamps()
+    np.testing.assert_array_equal(
+        stamps[:3],
+        np.array(["2000-01-01T00:00:00", "2136-02-07T06:28:14", "NaT"], "M8[s]"),
+    )
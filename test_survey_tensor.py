@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pytest
+
+from survey_loader import load_survey
+from survey_tally import CODED_COLUMNS, encode_chunk
+from survey_tensor import CountTensor
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def test_statistics_match_the_answers():
+    df = load_survey(DATA)
+    tensor = CountTensor.from_survey(DATA)
+    q = CODED_COLUMNS.index("overall_quality")
+    answers = df["overall_quality"].dropna().astype(float)
+    assert tensor.totals()[q] == len(answers)
+    assert tensor.mean()[q] == pytest.approx(answers.mean())
+    assert tensor.std()[q] == pytest.approx(answers.std(ddof=0))
+    assert tensor.top2box()[q] == pytest.approx((answers >= 4).mean())
+
+
+def test_empty_segments_are_nan():
+    codes = encode_chunk(load_survey(DATA))
+    # Every respondent in segment 0 of 3.
+    tensor = CountTensor.from_codes(codes, np.zeros(len(codes), int), 3)
+    assert np.isfinite(tensor.mean()[0]).all()
+    for statistic in (tensor.mean, tensor.variance, tensor.std, tensor.top2box):
+        assert np.isnan(statistic()[1:]).all()
+
+
+def test_share_difference_needs_a_segment_axis():
+    codes = encode_chunk(load_survey(DATA))
+    segmented = CountTensor.from_codes(codes, np.arange(len(codes)) % 2, 2)
+    difference = segmented.share_difference()
+    np.testing.assert_allclose(np.nansum(difference, axis=-1), 0, atol=1e-12)
+    overall = CountTensor.from_codes(codes)
+    with pytest.raises(ValueError):
+        overall.share_difference()
+    assert np.nanmax(np.abs(overall.share_difference(overall))) == 0
@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+
+from survey_text import TermCounts, analyze, feature_bucket, mine_text
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def batch(improvements, feedback=None, year=None, major=None):
+    n = len(improvements)
+    return pd.DataFrame(
+        {
+            "improvements": pd.Series(improvements, dtype=object),
+            "feedback": pd.Series(feedback or [None] * n, dtype=object),
+            "year": pd.Series(year or ["3rd year"] * n, dtype=object),
+            "major": pd.Series(major or ["CSE"] * n, dtype=object),
+        }
+    )
+
+
+def test_terms_and_bigrams():
+    assert analyze("More interactive classes") == (
+        "more",
+        "interactive",
+        "classes",
+        "more interactive",
+        "interactive classes",
+    )
+    # Stopwords and one-letter tokens are dropped; bigrams stop at punctuation.
+    assert analyze("Labs need a PC. Better labs!") == (
+        "labs",
+        "need",
+        "pc",
+        "better",
+        "labs",
+        "labs need",
+        "need pc",
+        "better labs",
+    )
+
+
+def test_placeholders_have_no_features():
+    for text in ["NA", "No", " nothing. ", "No Thanks", "ok!", ""]:
+        assert analyze(text) == ()
+    assert analyze("No exams") != ()
+
+
+def test_update_counts_terms_documents_and_placeholders():
+    counts = TermCounts().update(
+        batch(["More labs", "more labs", "NA", None, "Labs"]), segments=[]
+    )
+    top = counts.top_terms(10)
+    improvements = top[top["Column"] == "improvements"]
+    assert improvements["Term"].tolist() == ["labs", "more", "more labs"]
+    assert improvements["Count"].tolist() == [3, 2, 2]
+    assert improvements["Documents"].unique().tolist() == [3]
+    assert counts.placeholders == {"improvements": 1, "feedback": 0}
+    bigrams = counts.top_terms(10, kind="bigram")
+    assert bigrams["Term"].tolist() == ["more labs"]
+
+
+def test_segments_split_the_counts():
+    counts = TermCounts().update(
+        batch(["labs", "labs", "exams"], year=["1st year", "2nd year", "1st year"]),
+        columns=["improvements"],
+        segments=["year"],
+    )
+    top = counts.top_terms(5, segment="year")
+    assert top["Label"].tolist() == ["1st year", "1st year", "2nd year"]
+    assert top["Term"].tolist() == ["exams", "labs", "labs"]
+
+
+def test_colliding_buckets_are_labelled_the_same_in_any_order():
+    bucket = feature_bucket("labs")
+    first, second = TermCounts(), TermCounts()
+    first.terms[bucket], second.terms[bucket] = "zeta", "alpha"
+    assert TermCounts().merge(first).merge(second).terms[bucket] == "alpha"
+    assert TermCounts().merge(second).merge(first).terms[bucket] == "alpha"
+
+
+def test_merge_equals_one_update():
+    rows = ["More labs", "Better teachers", "more labs please", "NA", "labs"] * 7
+    years = (["1st year", "2nd year", "3rd year"] * 12)[: len(rows)]
+    whole = TermCounts().update(batch(rows, year=years))
+    parts = TermCounts()
+    for start in range(0, len(rows), 4):
+        part = batch(rows[start : start + 4], year=years[start : start + 4])
+        parts.merge(TermCounts().update(part))
+    assert parts.top_terms(5).equals(whole.top_terms(5))
+    assert (parts.keys == whole.keys).all() and (parts.counts == whole.counts).all()
+
+
+def test_pooled_mining_matches_a_serial_run():
+    serial = mine_text(DATA, workers=1).top_terms(20)
+    pooled = mine_text(DATA, workers=2, chunksize=10).top_terms(20)
+    assert len(serial) > 0
+    assert pooled.equals(serial)
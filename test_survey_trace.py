@@ -0,0 +1,71 @@
+import json
+import tracemalloc
+
+import pytest
+
+import survey_trace
+from survey_trace import Tracer, stage
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    was_tracing = tracemalloc.is_tracing()
+    active = Tracer(memory=True)
+    monkeypatch.setattr(survey_trace, "_tracer", active)
+    yield active
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def by_name(tracer):
+    return {record["stage"]: record for record in tracer.records}
+
+
+def test_disabled_stages_record_nothing(monkeypatch):
+    monkeypatch.setattr(survey_trace, "_tracer", None)
+    assert survey_trace.active() is None
+    with stage("load", rows_in=3) as st:
+        st.rows_out = 2
+    assert st.rows_out is None
+    assert stage("other") is st
+
+
+def test_nested_stage_peak_is_folded_into_its_parent(tracer):
+    with stage("outer"):
+        with stage("inner"):
+            block = bytearray(20_000_000)
+            del block
+        with stage("sibling"):
+            pass
+    records = by_name(tracer)
+    assert records["inner"]["peak_traced_mb"] >= 20
+    assert records["sibling"]["peak_traced_mb"] < 1
+    assert records["outer"]["peak_traced_mb"] >= records["inner"]["peak_traced_mb"]
+    assert [records[name]["depth"] for name in ["outer", "inner", "sibling"]] == [
+        0,
+        1,
+        1,
+    ]
+
+
+def test_records_rows_errors_and_traces(tracer, tmp_path):
+    with stage("load", rows_in=10, source="data.csv") as st:
+        st.rows_out = 8
+    with pytest.raises(KeyError):
+        with stage("clean"):
+            raise KeyError("x")
+    records = by_name(tracer)
+    assert records["load"]["rows_in"] == 10 and records["load"]["rows_out"] == 8
+    assert records["load"]["details"] == {"source": "data.csv"}
+    assert records["clean"]["error"] == "KeyError"
+    assert "process_max_rss_mb" in records["load"]
+
+    tracer.path = str(tmp_path / "trace.json")
+    tracer.chrome_path = str(tmp_path / "chrome.json")
+    tracer.write()
+    with open(tracer.path) as fh:
+        assert len(json.load(fh)["stages"]) == 2
+    with open(tracer.chrome_path) as fh:
+        events = json.load(fh)["traceEvents"]
+    assert [event["name"] for event in events] == ["load", "clean"]
+    assert "load" in tracer.report() and "maxrss MB" in tracer.report()